@@ -0,0 +1,89 @@
+"""
+Бенчмарк сжатия шардов домашек: размер на диске против времени загрузки
+
+Генерирует домашки в схеме хранения, раскладывает их по шардам кланов
+(src/core/homework_shards.py) без сжатия и с gzip/zstd разных уровней и
+для каждого варианта выводит время записи, размер каталога шардов и время
+загрузки снимка через DataStore (лучшее из --repeat попыток); сжатие и
+загрузка сравниваются с первым вариантом (по умолчанию без сжатия).
+
+zstd требует Python 3.14 (compression.zstd); без него варианты zstd
+пропускаются.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_compression --homeworks 100000
+    python -m benchmarks.bench_compression --variants none gzip:1 zstd:3 zstd:9
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("TELEGRAM_TOKEN", "123456:BENCH")
+
+from benchmarks.fixtures import FixtureSpec, default_now, iter_api_homeworks
+from src.core.homework_schema import project_homework
+from src.core.homework_shards import SHARDS_DIRNAME, write_shards
+from src.core.snapshot_codec import check_codec
+from src.services.data_loader import DataStore
+
+DEFAULT_VARIANTS = ["none", "gzip:1", "gzip:6", "gzip:9", "zstd:1", "zstd:3", "zstd:9", "zstd:19"]
+
+
+def parse_variant(value: str) -> tuple[str, int | None]:
+    codec, _, level = value.partition(":")
+    return codec, int(level) if level else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--homeworks", type=int, default=100_000)
+    parser.add_argument("--clans", type=int, default=500)
+    parser.add_argument("--variants", nargs="+", default=DEFAULT_VARIANTS, help="кодек[:уровень]")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    spec = FixtureSpec(homeworks=args.homeworks, mentors=100, clans=args.clans)
+    shards: dict[int, list] = {}
+    for hw in iter_api_homeworks(spec, default_now()):
+        record = project_homework(hw)
+        shards.setdefault(record["clan_id"], []).append(record)
+
+    print(f"{args.homeworks} домашек в {len(shards)} шардах, загрузка — лучшая из {args.repeat}\n")
+    print(
+        f"{'вариант':<9} {'запись, с':>10} {'размер, МБ':>11} {'сжатие':>7} "
+        f"{'загрузка, с':>12} {'к первому':>10}"
+    )
+
+    baseline = None
+    for variant in args.variants:
+        codec, level = parse_variant(variant)
+        try:
+            check_codec(codec)
+        except ValueError as e:
+            print(f"{variant:<9} пропущен: {e}")
+            continue
+
+        with tempfile.TemporaryDirectory(prefix="el_compression_") as tmp:
+            root = Path(tmp)
+            started = time.perf_counter()
+            manifest = write_shards(root / SHARDS_DIRNAME, shards, replace_all=True, codec=codec, level=level)
+            write_seconds = time.perf_counter() - started
+            size = sum(entry["size"] for entry in manifest["clans"].values())
+
+            # Каждый раз новый DataStore, чтобы шарды не брались из кэша
+            load_seconds = min(
+                DataStore(root).get("homeworks.json").load_seconds for _ in range(args.repeat)
+            )
+
+        if baseline is None:
+            baseline = (size, load_seconds)
+        print(
+            f"{variant:<9} {write_seconds:>10.2f} {size / 2**20:>11.1f} {baseline[0] / size:>6.1f}x "
+            f"{load_seconds:>12.2f} {load_seconds / baseline[1]:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
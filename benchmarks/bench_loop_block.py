@@ -0,0 +1,107 @@
+"""
+Время блокировки event loop при загрузке и записи снимков
+
+Сравнивает прежний путь (json.load / json.dump прямо в хендлере) с
+DataStore, который разбирает и сериализует JSON вне event loop.
+Блокировка измеряется LoopLagMonitor с мелким интервалом.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_loop_block --homeworks 200000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("TELEGRAM_TOKEN", "123456:BENCH")
+
+from src.services.data_loader import DataStore
+from src.utils.loop_monitor import LoopLagMonitor
+
+
+def make_homeworks(count: int) -> dict:
+    rng = random.Random(42)
+    return {
+        "exported_at": "2026-01-01T00:00:00",
+        "total_pending": count,
+        "homeworks": [
+            {
+                "id": i,
+                "delivery_date": f"2026-01-{rng.randint(1, 28):02d}T12:00:00.000000Z",
+                "status": "Ожидает проверки",
+                "clan_id": rng.randint(1, 500),
+                "user": {"first_name": "Имя", "last_name": f"Фамилия{i % 1000}"},
+                "homework": {"type": {"name": "Тест"}, "lesson": {"topic": f"Тема {i % 300}"}},
+            }
+            for i in range(count)
+        ],
+    }
+
+
+async def measure(label: str, action):
+    monitor = LoopLagMonitor(interval=0.005, warn_threshold=float("inf"))
+    monitor.start()
+    await asyncio.sleep(0.05)
+    monitor.reset()
+
+    started = time.perf_counter()
+    await action()
+    elapsed = time.perf_counter() - started
+
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+    print(
+        f"{label:42} время={elapsed * 1000:7.0f} мс  "
+        f"макс. блокировка={monitor.max_lag * 1000:7.0f} мс  "
+        f"сумма блокировок={monitor.total_blocked * 1000:7.0f} мс"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--homeworks", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        data = make_homeworks(args.homeworks)
+        path = data_dir / "homeworks.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"homeworks.json: {args.homeworks} записей, {path.stat().st_size / 1024 / 1024:.1f} МБ\n")
+
+        async def sync_load():
+            with open(path, "r", encoding="utf-8") as f:
+                json.load(f)
+
+        async def sync_dump():
+            with open(data_dir / "sync.json", "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+
+        store = DataStore(data_dir)
+
+        async def threaded_json_load():
+            def read():
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            await asyncio.to_thread(read)
+
+        async def store_load():
+            await store.load("homeworks.json", force=True)
+
+        async def store_write():
+            await store.write("async.json", data)
+
+        await measure("до: json.load в event loop", sync_load)
+        await measure("json.load в потоке (для сравнения)", threaded_json_load)
+        await measure("после: DataStore.load", store_load)
+        await measure("до: json.dump в event loop", sync_dump)
+        await measure("после: DataStore.write", store_write)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""
+Микробенчмарк накладных расходов MaintenanceMiddleware на одно обновление
+
+Сравнивает текущую проверку (чтение неизменяемого снимка) с прежней
+схемой, где статус читался через await и asyncio.Lock.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_maintenance_middleware --iterations 200000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("TELEGRAM_TOKEN", "123456:BENCH")
+
+from aiogram.types import Message
+
+from src.core.maintenance import maintenance_manager
+from src.middleware.maintenance import MaintenanceMiddleware
+
+
+class LegacyStatusManager:
+    """Прежняя схема: чтение bool под asyncio.Lock"""
+
+    def __init__(self):
+        self._is_active = False
+        self._lock = asyncio.Lock()
+
+    async def is_maintenance_active(self) -> bool:
+        async with self._lock:
+            return self._is_active
+
+
+async def noop_handler(event, data):
+    return None
+
+
+def make_message(text: str) -> Message:
+    return Message.model_validate({
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": 1, "type": "private"},
+        "from": {"id": 1, "is_bot": False, "first_name": "Bench", "username": "bench"},
+        "text": text,
+    })
+
+
+async def measure(label: str, call, iterations: int):
+    # Прогрев
+    for _ in range(1000):
+        await call()
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await call()
+    elapsed = time.perf_counter() - started
+
+    print(f"{label:45} {elapsed / iterations * 1e9:8.0f} нс/обновление")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    middleware = MaintenanceMiddleware()
+    message = make_message("📚 Информация по домашкам")
+    start_command = make_message("/start")
+    data: dict = {}
+
+    legacy = LegacyStatusManager()
+
+    async def legacy_call():
+        if not await legacy.is_maintenance_active():
+            return await noop_handler(message, data)
+
+    async def baseline_call():
+        return await noop_handler(message, data)
+
+    async def middleware_call():
+        return await middleware(noop_handler, message, data)
+
+    async def middleware_allowed_call():
+        return await middleware(noop_handler, start_command, data)
+
+    await measure("вызов handler без middleware", baseline_call, args.iterations)
+    await measure("прежняя проверка (await + asyncio.Lock)", legacy_call, args.iterations)
+    await measure("MaintenanceMiddleware, обслуживание выключено", middleware_call, args.iterations)
+
+    await maintenance_manager.start_maintenance("homeworks", 1)
+    try:
+        await measure("MaintenanceMiddleware, /start при обслуживании", middleware_allowed_call, args.iterations)
+    finally:
+        await maintenance_manager.stop_maintenance()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
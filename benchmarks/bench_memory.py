@@ -0,0 +1,141 @@
+"""
+Бенчмарк памяти и размера снимка домашек
+
+Генерирует homeworks.json заданного размера в схеме 1 (полные ответы API)
+и в текущей схеме хранения (src/core/homework_schema.py), затем в отдельных
+процессах загружает его:
+    - api:      схема 1, словари API как есть (json без преобразования)
+    - records:  схема 1, через DataStore в компактные HomeworkRecord
+    - stored:   текущая схема, через DataStore в HomeworkRecord
+
+Для каждого способа выводит время загрузки, прирост RSS процесса и память,
+удерживаемую снимком по tracemalloc, в пересчёте на запись и на 100 тысяч
+домашек. Каждый способ меряется в свежем процессе, чтобы RSS не смешивался.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_memory --homeworks 100000
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.fixtures import FixtureSpec, default_now, write_dataset
+
+# Способ загрузки: (схема файла, через DataStore)
+MODES = {
+    "api": (1, False),
+    "records": (1, True),
+    "stored": (2, True),
+}
+
+
+def rss_bytes() -> int:
+    """Текущий RSS процесса (Linux)"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def measure_child(mode: str, data_dir: Path) -> dict:
+    """Загружает снимок в текущем процессе и возвращает замеры"""
+    os.environ["OUTPUT_DIR"] = str(data_dir)
+    os.environ.setdefault("TELEGRAM_TOKEN", "123456:BENCH")
+    from src.services.data_loader import DataStore, _read_json
+
+    _, use_store = MODES[mode]
+
+    def load() -> dict:
+        if not use_store:
+            return _read_json(data_dir / "homeworks.json")
+        return DataStore(data_dir).get("homeworks.json").data
+
+    # RSS меряется без tracemalloc: его учёт блоков сам занимает память
+    gc.collect()
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    data = load()
+    load_seconds = time.perf_counter() - started
+    gc.collect()
+    rss = rss_bytes() - rss_before
+    count = len(data["homeworks"])
+    del data
+    gc.collect()
+
+    tracemalloc.start()
+    data = load()
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "mode": mode,
+        "count": count,
+        "load_seconds": load_seconds,
+        "rss": rss,
+        "retained": retained,
+        "peak": peak,
+    }
+
+
+def run_mode(mode: str, data_dir: Path) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_memory", "--child", mode, "--data-dir", str(data_dir)],
+        check=True, capture_output=True, text=True, cwd=Path(__file__).resolve().parent.parent,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--homeworks", type=int, default=100_000)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_child(args.child, args.data_dir)))
+        return
+
+    spec = FixtureSpec(homeworks=args.homeworks, mentors=100, clans=max(1, args.homeworks // 50))
+    now = default_now()
+    with tempfile.TemporaryDirectory(prefix="el_memory_") as tmp:
+        data_dirs = {}
+        for schema in sorted({schema for schema, _ in MODES.values()}):
+            data_dirs[schema] = Path(tmp) / f"schema{schema}"
+            write_dataset(data_dirs[schema], spec, now, schema_version=schema)
+
+        # Старые выгрузки писались с отступами
+        legacy_path = data_dirs[1] / "homeworks.json"
+        legacy = json.loads(legacy_path.read_text(encoding="utf-8"))
+        indented_size = len(json.dumps(legacy, ensure_ascii=False, indent=2).encode("utf-8"))
+        del legacy
+
+        print(f"homeworks.json, {args.homeworks} записей:")
+        print(f"  схема 1 с отступами   {indented_size / 2**20:8.1f} МБ")
+        for schema, data_dir in data_dirs.items():
+            size = (data_dir / "homeworks.json").stat().st_size
+            print(f"  схема {schema}               {size / 2**20:8.1f} МБ")
+        print()
+
+        results = [run_mode(mode, data_dirs[schema]) for mode, (schema, _) in MODES.items()]
+
+    print(
+        f"{'способ':<8} {'загрузка, с':>11} {'RSS, МБ':>9} {'снимок, МБ':>11} "
+        f"{'пик, МБ':>9} {'байт/запись':>12} {'МБ/100k':>9}"
+    )
+    for r in results:
+        per_record = r["retained"] / r["count"] if r["count"] else 0
+        print(
+            f"{r['mode']:<8} {r['load_seconds']:>11.2f} {r['rss'] / 2**20:>9.1f} {r['retained'] / 2**20:>11.1f} "
+            f"{r['peak'] / 2**20:>9.1f} {per_record:>12.0f} {per_record * 100_000 / 2**20:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
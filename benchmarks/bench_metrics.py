@@ -0,0 +1,71 @@
+"""
+Микробенчмарк стоимости метрик
+
+Измеряет запись в счётчик и гистограмму, накладные расходы
+MetricsMiddleware на вызов хендлера и время формирования /metrics.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_metrics --iterations 500000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("TELEGRAM_TOKEN", "123456:BENCH")
+
+from src.core.metrics import MetricsRegistry, registry
+from src.middleware.metrics import MetricsMiddleware
+
+
+def measure_sync(label: str, call, iterations: int):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call()
+    elapsed = time.perf_counter() - started
+    print(f"{label:45} {elapsed / iterations * 1e9:8.0f} нс")
+
+
+async def measure_async(label: str, call, iterations: int):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await call()
+    elapsed = time.perf_counter() - started
+    print(f"{label:45} {elapsed / iterations * 1e9:8.0f} нс")
+
+
+async def noop_handler(event, data):
+    return None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=500_000)
+    args = parser.parse_args()
+
+    bench_registry = MetricsRegistry()
+    counter = bench_registry.counter("bench_total", "bench", ("kind",))
+    histogram = bench_registry.histogram("bench_seconds", "bench", ("handler",))
+
+    measure_sync("Counter.labels().inc()", lambda: counter.labels("sent").inc(), args.iterations)
+    measure_sync("Histogram.labels().observe()", lambda: histogram.labels("show_expiring").observe(0.012), args.iterations)
+
+    middleware = MetricsMiddleware()
+    data: dict = {}
+
+    async def baseline_call():
+        return await noop_handler(None, data)
+
+    async def middleware_call():
+        return await middleware(noop_handler, None, data)
+
+    await measure_async("вызов handler без middleware", baseline_call, args.iterations)
+    await measure_async("MetricsMiddleware", middleware_call, args.iterations)
+
+    started = time.perf_counter()
+    text = registry.render()
+    print(f"{'формирование /metrics':45} {(time.perf_counter() - started) * 1000:8.2f} мс, {len(text)} байт")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
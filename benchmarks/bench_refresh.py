@@ -0,0 +1,137 @@
+"""
+Бенчмарк обновления данных против заглушки API ЕГЭLand
+
+Поднимает benchmarks.fake_egeland на синтетических данных и для каждого
+профиля апстрима (fast, realistic, flaky, throttled) замеряет:
+    - update_homeworks_for_clans в процессе бота (--target updater)
+    - scripts/mentors.py и scripts/homeworks.py в подпроцессах (--target scripts)
+
+Выводит общее время, запросов в секунду, число повторов и ответов 429/5xx.
+Паузы между страницами (DELAY_*) обнуляются, чтобы замер показывал
+поведение клиента, а не вежливые задержки для боевого API.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_refresh --profiles fast throttled --refresh-clans 50
+    python -m benchmarks.bench_refresh --target scripts --profiles realistic
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.fake_egeland import FakeEGELandAPI, PROFILES
+from benchmarks.fixtures import FixtureSpec
+from src.core.homework_shards import SHARDS_DIRNAME, read_manifest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def configure_env(base_url: str, data_dir: Path, retry_backoff: float) -> dict:
+    env = {
+        "BASE_URL": base_url,
+        "API_EMAIL": "bench@example.com",
+        "API_PASSWORD": "bench",
+        "OUTPUT_DIR": str(data_dir),
+        "DELAY": "0",
+        "DELAY_BASE": "0",
+        "DELAY_JITTER": "0",
+        "DELAY_MIN": "0",
+        "RETRY_BACKOFF": str(retry_backoff),
+    }
+    os.environ.update(env)
+    return env
+
+
+def print_row(target: str, profile: str, wall: float, api: FakeEGELandAPI, loaded: int, retries: int | str, ok: bool):
+    requests = api.stats["requests"]
+    errors = sum(api.stats[code] for code in ("500", "502", "503"))
+    print(
+        f"{target:<9} {profile:<10} {wall:>8.2f} {requests:>8} {requests / wall if wall else 0:>8.1f} "
+        f"{retries!s:>8} {api.stats['429']:>6} {errors:>6} {loaded:>9}  {'ok' if ok else 'ОШИБКА'}"
+    )
+
+
+async def bench_updater(api: FakeEGELandAPI, profile: str, clan_ids: list[int]):
+    from src.services.homework_updater import update_homeworks_for_clans
+
+    start = time.perf_counter()
+    result = await update_homeworks_for_clans(clan_ids)
+    wall = time.perf_counter() - start
+    print_row("updater", profile, wall, api, result["total_homeworks"], result["retries"], result["success"])
+    if not result["success"]:
+        print(f"  {result['error']}")
+
+
+async def run_script(name: str) -> tuple[int, str]:
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, str(ROOT_DIR / "scripts" / name),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        # Пустой токен (его не перекроет .env): без уведомлений о новых сдачах
+        env=dict(os.environ, TELEGRAM_TOKEN=""),
+    )
+    output, _ = await proc.communicate()
+    return proc.returncode, output.decode(errors="replace")
+
+
+async def bench_scripts(api: FakeEGELandAPI, profile: str, data_dir: Path):
+    start = time.perf_counter()
+    ok = True
+    for name in ("mentors.py", "homeworks.py"):
+        code, output = await run_script(name)
+        if code != 0 or "Критическая ошибка" in output:
+            ok = False
+            print(output[-1000:])
+    wall = time.perf_counter() - start
+
+    manifest = read_manifest(data_dir / SHARDS_DIRNAME)
+    loaded = sum(entry["count"] for entry in manifest["clans"].values()) if manifest else 0
+    print_row("scripts", profile, wall, api, loaded, "—", ok)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=list(PROFILES))
+    parser.add_argument("--target", choices=["updater", "scripts", "both"], default="updater")
+    parser.add_argument("--homeworks", type=int, default=20_000)
+    parser.add_argument("--mentors", type=int, default=500)
+    parser.add_argument("--clans", type=int, default=200)
+    parser.add_argument("--refresh-clans", type=int, default=50, help="сколько кланов обновляет updater")
+    parser.add_argument("--retry-backoff", type=float, default=0.1)
+    parser.add_argument("--port", type=int, default=8090)
+    args = parser.parse_args()
+
+    spec = FixtureSpec(homeworks=args.homeworks, mentors=args.mentors, clans=args.clans)
+    api = FakeEGELandAPI(spec, PROFILES[args.profiles[0]])
+    base_url = await api.start(port=args.port)
+
+    # Самые большие кланы — худший случай для постраничной загрузки
+    clan_ids = sorted(api.homeworks_by_clan, key=lambda c: len(api.homeworks_by_clan[c]), reverse=True)
+    clan_ids = clan_ids[:args.refresh_clans]
+
+    print(f"Данные: {spec}")
+    print(f"{'цель':<9} {'профиль':<10} {'время, с':>8} {'запросов':>8} {'зап/с':>8} {'повторов':>8} {'429':>6} {'5xx':>6} {'загружено':>9}")
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="el_refresh_") as tmp:
+            data_dir = Path(tmp)
+            configure_env(base_url, data_dir, args.retry_backoff)
+
+            for profile in args.profiles:
+                if args.target in ("updater", "both"):
+                    api.reset_stats(PROFILES[profile])
+                    await bench_updater(api, profile, clan_ids)
+                if args.target in ("scripts", "both"):
+                    api.reset_stats(PROFILES[profile])
+                    await bench_scripts(api, profile, data_dir)
+    finally:
+        from src.services.homework_updater import api_session
+        await api_session.close()
+        await api.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,191 @@
+"""
+Бенчмарк сервисного слоя на синтетических данных
+
+Генерирует набор данных benchmarks.fixtures заданного профиля, загружает
+его в DataStore и замеряет задержку (медиана и p95) и пиковую память
+(tracemalloc) для:
+    - построения индекса пользователей и проверок авторизации
+    - get_homeworks_info и get_expiring_page (без кэша и из кэша)
+    - get_pending_notifications
+    - inline-поиска: построение индексов и запросы по префиксу
+
+Результаты сравниваются с сохранёнными базовыми значениями
+benchmarks/baselines/bench_services.json.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_services --profile 10k
+    python -m benchmarks.bench_services --profile 100k --update-baseline
+    python -m benchmarks.bench_services --profile 10k --check   # код 1 при регрессии
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.fixtures import FixtureSpec, admin_tag, default_now, mentor_tag, write_dataset
+
+PROFILES: dict[str, FixtureSpec] = {
+    "1k": FixtureSpec(homeworks=1_000, mentors=100, admins=5, clans=50),
+    "10k": FixtureSpec(homeworks=10_000, mentors=1_000, admins=20, clans=500),
+    "100k": FixtureSpec(homeworks=100_000, mentors=10_000, admins=50, clans=2_000),
+    "1m": FixtureSpec(homeworks=1_000_000, mentors=10_000, admins=50, clans=5_000),
+}
+
+BASELINES_FILE = Path(__file__).resolve().parent / "baselines" / "bench_services.json"
+
+# Во сколько раз можно ухудшиться относительно базы без сигнала о регрессии
+DEFAULT_TOLERANCE = 1.25
+AUTH_LOOKUPS = 10_000
+# Более короткие замеры слишком шумные для сравнения с базой
+MIN_COMPARABLE_MS = 0.05
+
+
+def measure(func: Callable[[], object], setup: Callable[[], object] | None, repeat: int) -> dict:
+    """Медиана и p95 времени вызова и пиковая память одного вызова"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    p95_index = min(len(timings) - 1, round(0.95 * (len(timings) - 1)))
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[p95_index], 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run_cases(spec: FixtureSpec, repeat: int) -> dict[str, dict]:
+    # Импорт после того, как OUTPUT_DIR указывает на сгенерированные данные
+    from src.services.auth_service import get_user_index, is_admin, is_authorized, resolve_user
+    from src.services.data_loader import data_store, DATA_FILES
+    from src.services.homework_service import get_expiring_page, get_homeworks_info
+    from src.services.notification_service import get_pending_notifications
+    from src.services.render_cache import render_cache
+    from src.services.search_service import homework_search
+
+    asyncio.run(data_store.refresh(list(DATA_FILES)))
+
+    # Смесь известных и неизвестных пользователей
+    usernames = [
+        mentor_tag(i % spec.mentors + 1) if i % 4 else f"stranger_{i}"
+        for i in range(AUTH_LOOKUPS)
+    ]
+    mentor = resolve_user(mentor_tag(1))
+    admin = resolve_user(admin_tag(1))
+
+    def auth_checks():
+        for username in usernames:
+            is_authorized(username)
+            is_admin(username)
+
+    cases = {
+        "auth.user_index_build": (get_user_index, get_user_index.cache_clear),
+        f"auth.checks_x{AUTH_LOOKUPS}": (auth_checks, None),
+        "homeworks_info.mentor.cold": (lambda: get_homeworks_info(mentor), render_cache.cache_clear),
+        "homeworks_info.mentor.cached": (lambda: get_homeworks_info(mentor), None),
+        "homeworks_info.admin.cold": (lambda: get_homeworks_info(admin), render_cache.cache_clear),
+        "expiring.mentor.cold": (lambda: get_expiring_page(mentor, 0), render_cache.cache_clear),
+        "expiring.admin.cold": (lambda: get_expiring_page(admin, 0), render_cache.cache_clear),
+        "notifications.pending": (get_pending_notifications, None),
+        "search.mentor.index_build": (lambda: homework_search.search("а", mentor.clan_ids), homework_search.cache_clear),
+        "search.mentor.prefix": (lambda: homework_search.search("ив", mentor.clan_ids), None),
+        "search.admin.index_build": (lambda: homework_search.search("а", admin.clan_ids), homework_search.cache_clear),
+        "search.admin.prefix": (lambda: homework_search.search("ив", admin.clan_ids), None),
+        "search.admin.two_words": (lambda: homework_search.search("ив лог", admin.clan_ids), None),
+    }
+
+    results = {}
+    for name, (func, setup) in cases.items():
+        results[name] = measure(func, setup, repeat)
+    return results
+
+
+def load_baselines() -> dict:
+    if not BASELINES_FILE.exists():
+        return {}
+    return json.loads(BASELINES_FILE.read_text(encoding="utf-8"))
+
+
+def save_baseline(profile: str, results: dict[str, dict]):
+    baselines = load_baselines()
+    baselines[profile] = results
+    BASELINES_FILE.parent.mkdir(parents=True, exist_ok=True)
+    BASELINES_FILE.write_text(
+        json.dumps(baselines, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+        encoding="utf-8"
+    )
+
+
+def report(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    """Печатает таблицу и возвращает имена случаев с регрессией"""
+    regressions = []
+    print(f"{'случай':<32} {'медиана, мс':>12} {'p95, мс':>10} {'пик, КиБ':>10}  относительно базы")
+    for name, result in results.items():
+        base = baseline.get(name)
+        verdict = "нет базы"
+        if base:
+            time_ratio = 1.0
+            if max(result["median_ms"], base["median_ms"]) >= MIN_COMPARABLE_MS:
+                time_ratio = result["median_ms"] / base["median_ms"]
+            memory_ratio = result["peak_kib"] / base["peak_kib"] if base["peak_kib"] else 1.0
+            verdict = f"время x{time_ratio:.2f}, память x{memory_ratio:.2f}"
+            if time_ratio > tolerance or memory_ratio > tolerance:
+                verdict += "  РЕГРЕССИЯ"
+                regressions.append(name)
+        print(
+            f"{name:<32} {result['median_ms']:>12.3f} {result['p95_ms']:>10.3f} "
+            f"{result['peak_kib']:>10.1f}  {verdict}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=PROFILES, default="10k")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="завершиться с кодом 1 при регрессии")
+    args = parser.parse_args()
+
+    spec = PROFILES[args.profile]
+
+    with tempfile.TemporaryDirectory(prefix="el_bench_") as tmp:
+        start = time.perf_counter()
+        write_dataset(Path(tmp), spec, default_now())
+        print(f"Профиль {args.profile}: {spec}, данные за {time.perf_counter() - start:.1f} с\n")
+
+        os.environ["OUTPUT_DIR"] = tmp
+        os.environ.setdefault("TELEGRAM_TOKEN", "123456:BENCH")
+        results = run_cases(spec, args.repeat)
+
+    regressions = report(results, load_baselines().get(args.profile, {}), args.tolerance)
+
+    if args.update_baseline:
+        save_baseline(args.profile, results)
+        print(f"\nБаза обновлена: {BASELINES_FILE}")
+    elif args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Время запуска бота
+
+Импортирует main.py в отдельном процессе с `python -X importtime`, выводит
+суммарное время импорта и самые дорогие модули, затем прогоняет фазы
+прогрева (src.core.startup.warm_up) на текущем data/.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_startup --top 15
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("TELEGRAM_TOKEN", "123456:BENCH")
+
+
+def parse_importtime(stderr: str) -> list[tuple[int, int, str]]:
+    """Разбирает вывод -X importtime в список (self_us, cumulative_us, module)"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        # Вложенность импорта передаётся отступом после "| "
+        rows.append((int(parts[0]), int(parts[1]), parts[2][1:].rstrip()))
+    return rows
+
+
+def measure_import(module: str) -> tuple[float, list[tuple[int, int, str]]]:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=os.environ.copy(),
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise SystemExit(result.stderr[-2000:])
+    return wall, parse_importtime(result.stderr)
+
+
+async def measure_warm_up() -> dict[str, float]:
+    from src.core.startup import ReadinessGate, warm_up
+    return await warm_up(ReadinessGate())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--no-warm-up", action="store_true")
+    args = parser.parse_args()
+
+    wall, rows = measure_import(args.module)
+    top_level = [row for row in rows if not row[2].startswith(" ")]
+    total_us = sum(cumulative for _, cumulative, _ in top_level)
+
+    print(f"import {args.module}: {total_us / 1000:.1f} мс импорта, {wall * 1000:.1f} мс процесса целиком")
+    print(f"{'self, мс':>10} {'cumul, мс':>10}  модуль")
+    for self_us, cumulative, name in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:>10.1f} {cumulative / 1000:>10.1f}  {name.strip()}")
+
+    if not args.no_warm_up:
+        phases = asyncio.run(measure_warm_up())
+        print("\nПрогрев:")
+        for name, seconds in phases.items():
+            print(f"  {name:<22} {seconds * 1000:8.1f} мс")
+        print(f"  {'итого':<22} {sum(phases.values()) * 1000:8.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
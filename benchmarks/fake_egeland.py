@@ -0,0 +1,217 @@
+"""
+Локальная заглушка API ЕГЭLand
+
+Отдаёт /login, /clan/{id}/homeworks и /mentors с постраничной выдачей
+данных из benchmarks.fixtures. Задержка ответа, доля ошибок 5xx и серии
+ответов 429 с заголовком Retry-After задаются профилем UpstreamProfile,
+поэтому update_homeworks_for_clans и скрипты выгрузки можно гонять без
+реального API.
+
+Отдельный запуск из корня проекта:
+    python -m benchmarks.fake_egeland --profile throttled --port 8090
+    BASE_URL=http://127.0.0.1:8090 API_EMAIL=a API_PASSWORD=b python scripts/mentors.py
+"""
+import argparse
+import asyncio
+import math
+import random
+from collections import Counter, defaultdict
+from dataclasses import dataclass, replace
+from datetime import datetime
+
+from aiohttp import web
+
+from benchmarks.fixtures import FixtureSpec, default_now, generate_api_mentors, iter_api_homeworks
+
+FAKE_TOKEN = "fake-access-token"
+HOMEWORKS_PER_PAGE = 50
+MENTORS_PER_PAGE = 200
+
+
+@dataclass(frozen=True)
+class UpstreamProfile:
+    """Поведение заглушки"""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0  # доля ответов 5xx
+    rate_limit_every: int = 0  # каждые N запросов начинается серия 429 (0 — без ограничения)
+    rate_limit_burst: int = 0  # сколько запросов подряд получают 429
+    retry_after: float = 1.0  # значение Retry-After, секунд
+    seed: int = 7
+
+
+PROFILES: dict[str, UpstreamProfile] = {
+    "fast": UpstreamProfile(),
+    "realistic": UpstreamProfile(latency_ms=80, jitter_ms=40),
+    "flaky": UpstreamProfile(latency_ms=80, jitter_ms=40, error_rate=0.05),
+    "throttled": UpstreamProfile(latency_ms=40, jitter_ms=20, rate_limit_every=50, rate_limit_burst=3, retry_after=1.0),
+}
+
+
+class FakeEGELandAPI:
+    """Заглушка API с постраничной выдачей и настраиваемыми сбоями"""
+
+    def __init__(
+        self,
+        spec: FixtureSpec,
+        profile: UpstreamProfile = UpstreamProfile(),
+        now: datetime | None = None
+    ):
+        self.spec = spec
+        self.profile = profile
+        self.mentors = generate_api_mentors(spec)
+        self.homeworks_by_clan: dict[int, list[dict]] = defaultdict(list)
+        for hw in iter_api_homeworks(spec, now or default_now()):
+            clan_id = hw.pop("clan_id")
+            self.homeworks_by_clan[clan_id].append(hw)
+        # API отдаёт свежие сдачи первыми (sort=delivery_desc)
+        for homeworks in self.homeworks_by_clan.values():
+            homeworks.sort(key=lambda hw: hw["delivery_date"], reverse=True)
+
+        self.stats: Counter = Counter()
+        self._rng = random.Random(profile.seed)
+        self._burst_left = 0
+        self._runner: web.AppRunner | None = None
+
+    # -------------------------------------------------
+    # Сбои и задержки
+    # -------------------------------------------------
+    async def _disturb(self, request: web.Request) -> web.Response | None:
+        """Задержка ответа и, по профилю, ответ 429 или 5xx вместо данных"""
+        profile = self.profile
+        self.stats["requests"] += 1
+
+        if profile.latency_ms or profile.jitter_ms:
+            delay = profile.latency_ms + self._rng.uniform(-profile.jitter_ms, profile.jitter_ms)
+            await asyncio.sleep(max(0.0, delay) / 1000)
+
+        if profile.rate_limit_every and self.stats["requests"] % profile.rate_limit_every == 0:
+            self._burst_left = profile.rate_limit_burst
+        if self._burst_left:
+            self._burst_left -= 1
+            self.stats["429"] += 1
+            return web.json_response(
+                {"message": "Too Many Attempts."},
+                status=429,
+                headers={"Retry-After": f"{profile.retry_after:g}"}
+            )
+
+        if profile.error_rate and self._rng.random() < profile.error_rate:
+            status = self._rng.choice((500, 502, 503))
+            self.stats[str(status)] += 1
+            return web.json_response({"message": "Server Error"}, status=status)
+
+        return None
+
+    @staticmethod
+    def _authorized(request: web.Request) -> bool:
+        return request.headers.get("Authorization") == f"Bearer {FAKE_TOKEN}"
+
+    @staticmethod
+    def _paginate(items: list, request: web.Request, per_page: int) -> dict:
+        page = max(1, int(request.query.get("page", 1)))
+        per_page = int(request.query.get("per_page", per_page))
+        last_page = max(1, math.ceil(len(items) / per_page))
+        start = (page - 1) * per_page
+        return {
+            "data": items[start:start + per_page],
+            "meta": {
+                "current_page": page,
+                "last_page": last_page,
+                "per_page": per_page,
+                "total": len(items),
+            },
+        }
+
+    # -------------------------------------------------
+    # Обработчики
+    # -------------------------------------------------
+    async def _login(self, request: web.Request) -> web.Response:
+        if failure := await self._disturb(request):
+            return failure
+        body = await request.json()
+        if not body.get("email") or not body.get("password"):
+            return web.json_response({"message": "Unauthenticated."}, status=401)
+        self.stats["login"] += 1
+        return web.json_response({"access_token": FAKE_TOKEN, "token_type": "bearer"})
+
+    async def _clan_homeworks(self, request: web.Request) -> web.Response:
+        if failure := await self._disturb(request):
+            return failure
+        if not self._authorized(request):
+            return web.json_response({"message": "Unauthenticated."}, status=401)
+        self.stats["homework_pages"] += 1
+        clan_id = int(request.match_info["clan_id"])
+        homeworks = self.homeworks_by_clan.get(clan_id, [])
+        return web.json_response(self._paginate(homeworks, request, HOMEWORKS_PER_PAGE))
+
+    async def _mentors(self, request: web.Request) -> web.Response:
+        if failure := await self._disturb(request):
+            return failure
+        if not self._authorized(request):
+            return web.json_response({"message": "Unauthenticated."}, status=401)
+        self.stats["mentor_pages"] += 1
+        return web.json_response(self._paginate(self.mentors, request, MENTORS_PER_PAGE))
+
+    # -------------------------------------------------
+    # Запуск
+    # -------------------------------------------------
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/login", self._login)
+        app.router.add_get("/clan/{clan_id:\\d+}/homeworks", self._clan_homeworks)
+        app.router.add_get("/mentors", self._mentors)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8090) -> str:
+        """Запускает сервер и возвращает значение для BASE_URL"""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def reset_stats(self, profile: UpstreamProfile | None = None):
+        self.stats.clear()
+        self._burst_left = 0
+        if profile is not None:
+            self.profile = profile
+            self._rng = random.Random(profile.seed)
+
+
+async def serve(args):
+    spec = FixtureSpec(homeworks=args.homeworks, mentors=args.mentors, clans=args.clans)
+    profile = PROFILES[args.profile]
+    if args.retry_after is not None:
+        profile = replace(profile, retry_after=args.retry_after)
+
+    api = FakeEGELandAPI(spec, profile)
+    base_url = await api.start(port=args.port)
+    print(f"BASE_URL={base_url} (профиль {args.profile}: {profile})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await api.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=PROFILES, default="realistic")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--homeworks", type=int, default=FixtureSpec.homeworks)
+    parser.add_argument("--mentors", type=int, default=FixtureSpec.mentors)
+    parser.add_argument("--clans", type=int, default=FixtureSpec.clans)
+    parser.add_argument("--retry-after", type=float, default=None)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
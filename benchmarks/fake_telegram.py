@@ -0,0 +1,262 @@
+"""
+Локальная заглушка Telegram Bot API
+
+Позволяет запускать диспетчер бота без сети: отдаёт обновления через
+getUpdates, принимает исходящие вызовы (sendMessage, editMessageText,
+sendDocument, sendChatAction и др.) и запоминает время их прихода, чтобы харнессы могли
+мерить задержку ответа и пропускную способность отправки.
+
+Ограничение частоты Telegram имитируется ответом 429 с retry_after на
+каждый retry_after_every-й исходящий вызов.
+"""
+import asyncio
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from aiohttp import web
+
+# Методы, которые не считаются исходящими сообщениями бота
+SERVICE_METHODS = frozenset({"getMe", "getUpdates", "deleteWebhook", "setWebhook", "close"})
+# Методы, ответ которых считается ответом пользователю
+REPLY_METHODS = frozenset({"sendMessage", "editMessageText"})
+
+
+@dataclass
+class SentCall:
+    """Исходящий вызов бота, принятый заглушкой"""
+    method: str
+    payload: dict
+    received_at: float = field(default_factory=time.perf_counter)
+    ok: bool = True  # False — вызов отклонён ответом 429
+
+
+class FakeTelegramAPI:
+    """Минимальная реализация Bot API для локальных замеров"""
+
+    def __init__(self, retry_after_every: int = 0, retry_after: int = 1):
+        """
+        Args:
+            retry_after_every: каждый N-й исходящий вызов получает 429 (0 — никогда)
+            retry_after: значение parameters.retry_after в ответе 429, секунд
+        """
+        self.retry_after_every = retry_after_every
+        self.retry_after = retry_after
+        self.stats: Counter = Counter()
+        self.updates: list[dict] = []
+        self.calls: list[SentCall] = []
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._new_update = asyncio.Event()
+        self._waiters: defaultdict[int, deque[asyncio.Future]] = defaultdict(deque)
+        self._runner: web.AppRunner | None = None
+
+    # -------------------------------------------------
+    # Обновления
+    # -------------------------------------------------
+    def push_update(self, update: dict) -> int:
+        """Ставит обновление в очередь getUpdates и возвращает его update_id"""
+        update_id = self._next_update_id
+        self._next_update_id += 1
+        self.updates.append({**update, "update_id": update_id})
+        self._new_update.set()
+        return update_id
+
+    def wait_reply(self, chat_id: int) -> asyncio.Future:
+        """
+        Future, который завершится при следующем ответе бота в чат chat_id
+
+        Ожидания одного чата завершаются по очереди, по одному на ответ
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[chat_id].append(future)
+        return future
+
+    # -------------------------------------------------
+    # Обработчики методов
+    # -------------------------------------------------
+    async def _get_updates(self, payload: dict):
+        offset = int(payload.get("offset") or 0)
+        timeout = float(payload.get("timeout") or 0)
+
+        pending = [u for u in self.updates if u["update_id"] >= offset]
+        if not pending and timeout:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            pending = [u for u in self.updates if u["update_id"] >= offset]
+
+        # Подтверждённые обновления больше не нужны
+        self.updates = pending
+        return pending
+
+    def _resolve_waiter(self, chat_id: int):
+        waiters = self._waiters.get(chat_id)
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(time.perf_counter())
+                return
+
+    def _message(self, chat_id: int, message_id: int, text: str) -> dict:
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": text,
+        }
+
+    def _send_message(self, payload: dict):
+        chat_id = int(payload["chat_id"])
+        message_id = self._next_message_id
+        self._next_message_id += 1
+        self._resolve_waiter(chat_id)
+        return self._message(chat_id, message_id, payload.get("text", ""))
+
+    def _send_document(self, payload: dict):
+        message = self._send_message(payload)
+        document = payload.get("document")
+        message["document"] = {
+            "file_id": f"fake_{message['message_id']}",
+            "file_unique_id": f"fake_{message['message_id']}",
+            "file_name": getattr(document, "filename", None),
+        }
+        message["caption"] = payload.get("caption", "")
+        del message["text"]
+        return message
+
+    def _edit_message_text(self, payload: dict):
+        # Inline-сообщения (inline_message_id) Bot API подтверждает значением True
+        if "chat_id" not in payload:
+            return True
+        chat_id = int(payload["chat_id"])
+        self._resolve_waiter(chat_id)
+        return self._message(chat_id, int(payload.get("message_id") or 0), payload.get("text", ""))
+
+    def _rate_limited(self, method: str) -> bool:
+        if method in SERVICE_METHODS or not self.retry_after_every:
+            return False
+        return self.stats["outbound"] % self.retry_after_every == 0
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        payload = dict(await request.post())
+        call = SentCall(method=method, payload=payload)
+        self.calls.append(call)
+        self.stats[method] += 1
+
+        if method not in SERVICE_METHODS:
+            self.stats["outbound"] += 1
+            if self._rate_limited(method):
+                call.ok = False
+                self.stats["429"] += 1
+                return web.json_response({
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                })
+
+        if method == "getMe":
+            result = {
+                "id": 1,
+                "is_bot": True,
+                "first_name": "Fake",
+                "username": "fake_bot",
+            }
+        elif method == "getUpdates":
+            result = await self._get_updates(payload)
+        elif method == "sendMessage":
+            result = self._send_message(payload)
+        elif method == "sendDocument":
+            result = self._send_document(payload)
+        elif method == "editMessageText":
+            result = self._edit_message_text(payload)
+        else:
+            result = True
+
+        return web.json_response({"ok": True, "result": result})
+
+    # -------------------------------------------------
+    # Запуск
+    # -------------------------------------------------
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081) -> str:
+        """Запускает сервер и возвращает базовый URL для TelegramAPIServer"""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def sent_times(self, methods: frozenset[str] = REPLY_METHODS) -> list[float]:
+        """Время прихода успешных исходящих сообщений"""
+        return [call.received_at for call in self.calls if call.ok and call.method in methods]
+
+
+def make_text_update(chat_id: int, text: str, username: str) -> dict:
+    """Синтетическое обновление с текстовым сообщением от пользователя"""
+    return {
+        "message": {
+            "message_id": 1,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {
+                "id": chat_id,
+                "is_bot": False,
+                "first_name": "Bench",
+                "username": username,
+            },
+            "text": text,
+        }
+    }
+
+
+def make_callback_update(chat_id: int, message_id: int, data: str, username: str) -> dict:
+    """Синтетическое нажатие inline-кнопки под сообщением бота"""
+    user = {
+        "id": chat_id,
+        "is_bot": False,
+        "first_name": "Bench",
+        "username": username,
+    }
+    return {
+        "callback_query": {
+            "id": f"cb_{chat_id}_{message_id}_{time.monotonic_ns()}",
+            "from": user,
+            "chat_instance": str(chat_id),
+            "data": data,
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"},
+                "text": "",
+            },
+        }
+    }
+
+
+def make_inline_query_update(chat_id: int, query: str, username: str) -> dict:
+    """Синтетический inline-запрос (@bot текст) от пользователя"""
+    return {
+        "inline_query": {
+            "id": f"iq_{chat_id}_{time.monotonic_ns()}",
+            "from": {
+                "id": chat_id,
+                "is_bot": False,
+                "first_name": "Bench",
+                "username": username,
+            },
+            "query": query,
+            "offset": "",
+        }
+    }
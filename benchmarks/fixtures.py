@@ -0,0 +1,273 @@
+"""
+Генератор синтетических данных для бенчмарков
+
+Создаёт детерминированные mentors.json, admins.json и homeworks.json в
+формате скриптов выгрузки (домашки — в текущей схеме хранения, см.
+src/core/homework_schema.py). При одинаковых параметрах, seed и now файлы
+совпадают побайтно. Записи ДЗ пишутся потоком, поэтому генерация миллиона
+заданий не держит их все в памяти.
+
+Даты сдачи задаются относительно now: примерно четверть заданий
+просрочена (>72 ч), четверть истекает в ближайшие 24 часа.
+
+Запуск из корня проекта:
+    python -m benchmarks.fixtures --out /tmp/el_data --homeworks 100000 --mentors 10000 --clans 2000 --fan-out 3
+
+Затем бот или бенчмарк читают данные из этого каталога:
+    OUTPUT_DIR=/tmp/el_data python main.py
+"""
+import argparse
+import json
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+from src.core.homework_schema import SCHEMA_VERSION, project_homework
+
+FIRST_NAMES = ("Иван", "Мария", "Пётр", "Анна", "Дмитрий", "Екатерина", "Алексей", "Ольга", "Сергей", "Юлия")
+LAST_NAMES = ("Иванов", "Петрова", "Смирнов", "Кузнецова", "Попов", "Соколова", "Лебедев", "Новикова", "Козлов", "Морозова")
+TOPICS = ("Логарифмы", "Векторы", "Интегралы", "Производная", "Тригонометрия", "Вероятность", "Стереометрия", "Уравнения")
+HOMEWORK_TYPES = ("Тест", "Вторая часть", "Сочинение", "Домашнее задание")
+PENDING_STATUS = "Ожидает проверки"
+
+# Запись ДЗ отстаёт от now на 0..96 часов
+MAX_HOURS_AGO = 96
+
+
+@dataclass(frozen=True)
+class FixtureSpec:
+    """Параметры набора данных"""
+    homeworks: int = 10_000
+    mentors: int = 1_000
+    admins: int = 20
+    clans: int = 500
+    fan_out: int = 3  # кланов на наставника
+    seed: int = 42
+
+
+def mentor_tag(index: int) -> str:
+    return f"mentor_{index:05d}"
+
+
+def admin_tag(index: int) -> str:
+    return f"admin_{index:03d}"
+
+
+def format_delivery_date(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000000Z")
+
+
+def generate_clans(spec: FixtureSpec) -> list[dict]:
+    """Кланы в формате API (clansMentor)"""
+    return [
+        {
+            "id": clan_id,
+            "name": f"Клан {clan_id}",
+            "slogan": None,
+            "target": None,
+            "class": 10 + clan_id % 2,
+            "max_students_count": 30,
+        }
+        for clan_id in range(1, spec.clans + 1)
+    ]
+
+
+def generate_api_mentors(spec: FixtureSpec) -> list[dict]:
+    """
+    Наставники в формате ответа API /mentors
+
+    Каждый наставник ведёт fan_out кланов; кланы раздаются по кругу,
+    поэтому у каждого клана примерно mentors * fan_out / clans наставников
+    """
+    rng = random.Random(spec.seed)
+    clans = generate_clans(spec)
+    mentors = []
+
+    for i in range(1, spec.mentors + 1):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        clan_indexes = {(i * spec.fan_out + k) % spec.clans for k in range(spec.fan_out)}
+        mentors.append({
+            "id": i,
+            "first_name": first,
+            "last_name": last,
+            "email": f"{mentor_tag(i)}@example.com",
+            "phone": None,
+            "vk_id": None,
+            "telegram_id": str(1_000_000 + i),
+            "telegram_tag": mentor_tag(i),
+            "clansMentor": [clans[idx] for idx in sorted(clan_indexes)],
+            "courses": [],
+        })
+
+    return mentors
+
+
+def to_saved_mentor(mentor: dict) -> dict:
+    """Приводит наставника API к виду, который сохраняет scripts/mentors.py"""
+    return {
+        "id": mentor["id"],
+        "first_name": mentor["first_name"],
+        "last_name": mentor["last_name"],
+        "full_name": f"{mentor['first_name']} {mentor['last_name']}",
+        "email": mentor["email"],
+        "phone": mentor["phone"],
+        "vk_id": mentor["vk_id"],
+        "telegram_id": mentor["telegram_id"],
+        "telegram_tag": mentor["telegram_tag"],
+        "clans_mentor": mentor["clansMentor"],
+        "courses": mentor["courses"],
+    }
+
+
+def generate_admins(spec: FixtureSpec) -> list[dict]:
+    return [
+        {
+            "id": 900_000 + i,
+            "first_name": "Админ",
+            "last_name": str(i),
+            "full_name": f"Админ {i}",
+            "telegram_id": 2_000_000 + i,
+            "telegram_tag": admin_tag(i),
+            "clans_mentor": [],
+        }
+        for i in range(1, spec.admins + 1)
+    ]
+
+
+def clan_weights(spec: FixtureSpec) -> list[float]:
+    """Неравномерное распределение ДЗ по кланам (у немногих кланов их много)"""
+    rng = random.Random(spec.seed + 1)
+    return [rng.paretovariate(1.5) for _ in range(spec.clans)]
+
+
+def iter_api_homeworks(spec: FixtureSpec, now: datetime) -> Iterator[dict]:
+    """
+    ДЗ в формате ответа API /clan/{id}/homeworks с добавленным clan_id
+
+    Порядок и содержимое зависят только от spec и now
+    """
+    rng = random.Random(spec.seed + 2)
+    clan_ids = list(range(1, spec.clans + 1))
+    weights = clan_weights(spec)
+    batch = 1024
+
+    for start in range(0, spec.homeworks, batch):
+        size = min(batch, spec.homeworks - start)
+        for offset, clan_id in enumerate(rng.choices(clan_ids, weights, k=size)):
+            hw_id = start + offset + 1
+            delivery = now - timedelta(seconds=rng.randrange(MAX_HOURS_AGO * 3600))
+            yield {
+                "id": hw_id,
+                "delivery_date": format_delivery_date(delivery),
+                "status": PENDING_STATUS,
+                "user": {
+                    "id": 5_000_000 + rng.randrange(spec.homeworks * 2 + 1),
+                    "first_name": rng.choice(FIRST_NAMES),
+                    "last_name": rng.choice(LAST_NAMES),
+                },
+                "homework": {
+                    "id": rng.randrange(10_000),
+                    "type": {"name": rng.choice(HOMEWORK_TYPES)},
+                    "lesson": {"topic": rng.choice(TOPICS)},
+                },
+                "clan_id": clan_id,
+            }
+
+
+def _write_json_stream(path: Path, header: dict, key: str, items) -> int:
+    """Пишет {**header, key: [items...]} не собирая список в памяти"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        prefix = json.dumps(header, ensure_ascii=False)[:-1]
+        f.write(prefix + (", " if header else "") + json.dumps(key) + ": [")
+        for item in items:
+            if count:
+                f.write(",\n")
+            f.write(json.dumps(item, ensure_ascii=False))
+            count += 1
+        f.write("]}")
+    return count
+
+
+def write_dataset(
+    out_dir: Path,
+    spec: FixtureSpec,
+    now: datetime,
+    schema_version: int = SCHEMA_VERSION
+) -> dict[str, int]:
+    """
+    Записывает mentors.json, admins.json и homeworks.json в out_dir
+
+    schema_version=1 пишет домашки полными ответами API, как старые выгрузки
+
+    Returns:
+        количество записей в каждом файле
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    exported_at = now.replace(tzinfo=None).isoformat()
+
+    mentors = [to_saved_mentor(m) for m in generate_api_mentors(spec)]
+    admins = generate_admins(spec)
+
+    homeworks_header = {"exported_at": exported_at, "total_pending": spec.homeworks, "clans_processed": spec.clans}
+    homeworks = iter_api_homeworks(spec, now)
+    if schema_version >= 2:
+        homeworks_header = {"schema_version": schema_version, **homeworks_header}
+        homeworks = (project_homework(hw) for hw in homeworks)
+
+    counts = {
+        "mentors.json": _write_json_stream(
+            out_dir / "mentors.json",
+            {"export_date": exported_at, "total_unique_mentors": len(mentors)},
+            "mentors", mentors
+        ),
+        "admins.json": _write_json_stream(
+            out_dir / "admins.json",
+            {"total_unique_admins": len(admins)},
+            "admins", admins
+        ),
+        "homeworks.json": _write_json_stream(
+            out_dir / "homeworks.json", homeworks_header, "homeworks", homeworks
+        ),
+    }
+    return counts
+
+
+def default_now() -> datetime:
+    """Текущий час в UTC: в пределах часа генерация воспроизводима"""
+    return datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--homeworks", type=int, default=FixtureSpec.homeworks)
+    parser.add_argument("--mentors", type=int, default=FixtureSpec.mentors)
+    parser.add_argument("--admins", type=int, default=FixtureSpec.admins)
+    parser.add_argument("--clans", type=int, default=FixtureSpec.clans)
+    parser.add_argument("--fan-out", type=int, default=FixtureSpec.fan_out)
+    parser.add_argument("--seed", type=int, default=FixtureSpec.seed)
+    parser.add_argument("--now", type=datetime.fromisoformat, default=None, help="опорное время, ISO 8601 (UTC)")
+    args = parser.parse_args()
+
+    spec = FixtureSpec(
+        homeworks=args.homeworks,
+        mentors=args.mentors,
+        admins=args.admins,
+        clans=args.clans,
+        fan_out=min(args.fan_out, args.clans),
+        seed=args.seed,
+    )
+    now = args.now or default_now()
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+
+    for filename, count in write_dataset(args.out, spec, now).items():
+        print(f"{args.out / filename}: {count:,} записей")
+
+
+if __name__ == "__main__":
+    main()
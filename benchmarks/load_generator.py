@@ -0,0 +1,290 @@
+"""
+Нагрузочный генератор для диспетчера бота
+
+Поднимает заглушку Bot API (benchmarks.fake_telegram) и диспетчер из
+src/bot.py в режиме polling на синтетических данных benchmarks.fixtures.
+
+Режимы:
+    users   — N одновременных пользователей нажимают кнопки меню; каждый
+              ждёт обработки своего обновления и паузу --think-time
+    replay  — воспроизведение записанной трассы (JSONL) по её отметкам
+              времени, независимо от скорости ответов
+    fanout  — рассылка напоминаний N получателям через send_messages
+
+Отчёт: задержка обработки обновления p50/p95/p99 (от постановки в очередь
+getUpdates до завершения хендлеров и от начала feed_update), обновлений в
+секунду и исходящих сообщений в секунду. Заглушка может отвечать 429 с
+retry_after на каждый N-й исходящий вызов (--retry-after-every).
+
+Трасса — по одному JSON на строку: {"at": 0.15, "chat_id": 1, "username": "mentor_00001", "text": "/start"}.
+Записать трассу прогона: --record trace.jsonl.
+
+Запуск из корня проекта:
+    python -m benchmarks.load_generator users --users 200 --presses 5
+    python -m benchmarks.load_generator replay --trace trace.jsonl --speed 2
+    python -m benchmarks.load_generator fanout --recipients 2000 --retry-after-every 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+os.environ.setdefault("TELEGRAM_TOKEN", "123456:HARNESS")
+
+from benchmarks.fake_telegram import FakeTelegramAPI, make_text_update
+from benchmarks.fixtures import FixtureSpec, default_now, mentor_tag, write_dataset
+
+MENU_ACTIONS = ("/start", "📚 Информация по домашкам", "⏰ Истекающие домашки")
+FIRST_CHAT_ID = 100_000
+
+
+@dataclass
+class TraceEvent:
+    """Одно обновление трассы: отметка времени от начала прогона, отправитель, текст"""
+    at: float
+    chat_id: int
+    username: str
+    text: str
+
+
+@dataclass
+class UpdateTiming:
+    pushed_at: float
+    started_at: float = 0.0
+    done_at: float = 0.0
+
+
+class DispatcherProbe:
+    """
+    Засекает время обработки каждого обновления диспетчером
+
+    Оборачивает dp.feed_update, через который проходят все обновления
+    polling-цикла, включая outer middleware
+    """
+
+    def __init__(self, dp):
+        self.timings: dict[int, UpdateTiming] = {}
+        self._done: dict[int, asyncio.Future] = {}
+        feed_update = dp.feed_update
+
+        async def timed_feed_update(bot, update, **kwargs):
+            timing = self.timings.get(update.update_id)
+            if timing:
+                timing.started_at = time.perf_counter()
+            try:
+                return await feed_update(bot, update, **kwargs)
+            finally:
+                if timing:
+                    timing.done_at = time.perf_counter()
+                    future = self._done.pop(update.update_id, None)
+                    if future and not future.done():
+                        future.set_result(timing)
+
+        dp.feed_update = timed_feed_update
+
+    def push(self, fake: FakeTelegramAPI, event: TraceEvent) -> asyncio.Future:
+        """Ставит обновление в очередь и возвращает future его обработки"""
+        future = asyncio.get_running_loop().create_future()
+        pushed_at = time.perf_counter()
+        update_id = fake.push_update(make_text_update(event.chat_id, event.text, event.username))
+        self.timings[update_id] = UpdateTiming(pushed_at=pushed_at)
+        self._done[update_id] = future
+        return future
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    values = sorted(values)
+    if len(values) == 1:
+        cuts = values * 99
+    else:
+        cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98], "max": values[-1]}
+
+
+def print_latency(label: str, values: list[float]):
+    stats = percentiles(values)
+    if not stats:
+        print(f"{label}: нет данных")
+        return
+    print(
+        f"{label:<22} p50={stats['p50'] * 1000:8.2f} мс  p95={stats['p95'] * 1000:8.2f} мс  "
+        f"p99={stats['p99'] * 1000:8.2f} мс  max={stats['max'] * 1000:8.2f} мс"
+    )
+
+
+def report(probe: DispatcherProbe, fake: FakeTelegramAPI, wall: float, timeouts: int):
+    done = [t for t in probe.timings.values() if t.done_at]
+    print(f"\nОбновлений: {len(done)} за {wall:.2f} с ({len(done) / wall:.1f}/с), не дождались: {timeouts}")
+    print_latency("очередь + обработка", [t.done_at - t.pushed_at for t in done])
+    print_latency("обработка", [t.done_at - t.started_at for t in done])
+
+    sent = fake.sent_times()
+    print(
+        f"Исходящих сообщений: {len(sent)} ({len(sent) / wall:.1f}/с), "
+        f"sendChatAction: {fake.stats['sendChatAction']}, ответов 429: {fake.stats['429']}"
+    )
+
+
+def generate_trace(users: int, presses: int, think_time: float, mentors: int, seed: int) -> list[TraceEvent]:
+    """Сценарий для пользователей: кто, что и примерно когда нажимает"""
+    rng = random.Random(seed)
+    events = []
+    for user in range(users):
+        at = rng.uniform(0, think_time)
+        for _ in range(presses):
+            events.append(TraceEvent(
+                at=round(at, 4),
+                chat_id=FIRST_CHAT_ID + user,
+                username=mentor_tag(user % mentors + 1),
+                text=rng.choice(MENU_ACTIONS),
+            ))
+            at += rng.expovariate(1 / think_time) if think_time else 0.0
+    return sorted(events, key=lambda e: e.at)
+
+
+def load_trace(path: Path) -> list[TraceEvent]:
+    with open(path, encoding="utf-8") as f:
+        events = [TraceEvent(**json.loads(line)) for line in f if line.strip()]
+    return sorted(events, key=lambda e: e.at)
+
+
+def save_trace(path: Path, events: list[TraceEvent]):
+    with open(path, "w", encoding="utf-8") as f:
+        for event in sorted(events, key=lambda e: e.at):
+            f.write(json.dumps(asdict(event), ensure_ascii=False) + "\n")
+
+
+async def run_users(probe, fake, events: list[TraceEvent], think_time: float, timeout: float) -> tuple[list[TraceEvent], int]:
+    """Замкнутый цикл: каждый пользователь ждёт обработки, затем делает паузу"""
+    by_user: dict[int, list[TraceEvent]] = {}
+    for event in events:
+        by_user.setdefault(event.chat_id, []).append(event)
+
+    recorded: list[TraceEvent] = []
+    timeouts = 0
+    start = time.perf_counter()
+
+    async def user_session(user_events: list[TraceEvent]):
+        nonlocal timeouts
+        await asyncio.sleep(user_events[0].at)
+        for event in user_events:
+            recorded.append(TraceEvent(round(time.perf_counter() - start, 4), event.chat_id, event.username, event.text))
+            try:
+                await asyncio.wait_for(probe.push(fake, event), timeout)
+            except asyncio.TimeoutError:
+                timeouts += 1
+            if think_time:
+                await asyncio.sleep(random.expovariate(1 / think_time))
+
+    await asyncio.gather(*(user_session(user_events) for user_events in by_user.values()))
+    return recorded, timeouts
+
+
+async def run_replay(probe, fake, events: list[TraceEvent], speed: float, timeout: float) -> int:
+    """Открытый цикл: обновления подаются по отметкам трассы"""
+    start = time.perf_counter()
+    futures = []
+    for event in events:
+        delay = event.at / speed - (time.perf_counter() - start)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        futures.append(probe.push(fake, event))
+
+    results = await asyncio.gather(
+        *(asyncio.wait_for(future, timeout) for future in futures),
+        return_exceptions=True
+    )
+    return sum(isinstance(result, asyncio.TimeoutError) for result in results)
+
+
+async def run_fanout(bot, fake, recipients: int, batch_size: int, batch_interval: float):
+    from src.services.notification_service import send_messages
+
+    messages = [(FIRST_CHAT_ID + i, f"⚠️ Напоминание #{i}") for i in range(recipients)]
+    start = time.perf_counter()
+    sent, failed = await send_messages(bot, messages, batch_size=batch_size, batch_interval=batch_interval)
+    wall = time.perf_counter() - start
+    print(
+        f"\nРассылка {recipients} получателям: {wall:.2f} с, {sent / wall:.1f} сообщений/с, "
+        f"успешно={sent}, ошибок={failed}, ответов 429: {fake.stats['429']}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=["users", "replay", "fanout"])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--presses", type=int, default=5)
+    parser.add_argument("--think-time", type=float, default=0.2, help="средняя пауза пользователя, с")
+    parser.add_argument("--trace", type=Path, help="трасса для режима replay")
+    parser.add_argument("--speed", type=float, default=1.0, help="ускорение воспроизведения трассы")
+    parser.add_argument("--record", type=Path, help="сохранить трассу прогона users")
+    parser.add_argument("--recipients", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=25)
+    parser.add_argument("--batch-interval", type=float, default=0.0)
+    parser.add_argument("--retry-after-every", type=int, default=0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--homeworks", type=int, default=10_000)
+    parser.add_argument("--mentors", type=int, default=1_000)
+    parser.add_argument("--clans", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--api-port", type=int, default=8083)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.mode == "replay" and not args.trace:
+        parser.error("для режима replay нужна --trace")
+
+    spec = FixtureSpec(homeworks=args.homeworks, mentors=args.mentors, clans=args.clans)
+
+    with tempfile.TemporaryDirectory(prefix="el_load_") as tmp:
+        write_dataset(Path(tmp), spec, default_now())
+        os.environ["OUTPUT_DIR"] = tmp
+
+        from benchmarks.webhook_harness import make_bot
+        from src.bot import dp
+        from src.core.startup import warm_up
+
+        await warm_up()
+
+        fake = FakeTelegramAPI(retry_after_every=args.retry_after_every, retry_after=args.retry_after)
+        api_base = await fake.start(port=args.api_port)
+        bot = make_bot(api_base)
+
+        try:
+            if args.mode == "fanout":
+                await run_fanout(bot, fake, args.recipients, args.batch_size, args.batch_interval)
+                return
+
+            probe = DispatcherProbe(dp)
+            polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False))
+            try:
+                start = time.perf_counter()
+                if args.mode == "users":
+                    events = generate_trace(args.users, args.presses, args.think_time, spec.mentors, args.seed)
+                    recorded, timeouts = await run_users(probe, fake, events, args.think_time, args.timeout)
+                    if args.record:
+                        save_trace(args.record, recorded)
+                else:
+                    timeouts = await run_replay(probe, fake, load_trace(args.trace), args.speed, args.timeout)
+                wall = time.perf_counter() - start
+            finally:
+                await dp.stop_polling()
+                await polling
+
+            report(probe, fake, wall, timeouts)
+        finally:
+            await bot.session.close()
+            await fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+"""
+Сравнение задержки ответа в режимах webhook и polling без сети
+
+Поднимает заглушку Bot API (benchmarks.fake_telegram), подключает к ней
+диспетчер бота и отправляет синтетические обновления:
+- webhook: POST на локальный webhook-сервер с секретным заголовком
+- polling: через очередь getUpdates заглушки
+
+Задержка — время от отправки обновления до первого sendMessage в этот чат.
+
+Запуск из корня проекта:
+    python -m benchmarks.webhook_harness --mode both --count 200 --username alice
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import aiohttp
+
+os.environ.setdefault("TELEGRAM_TOKEN", "123456:HARNESS")
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from benchmarks.fake_telegram import FakeTelegramAPI, make_text_update
+
+WEBHOOK_PATH = "/webhook"
+WEBHOOK_SECRET = "harness-secret"
+FIRST_CHAT_ID = 10_000
+
+
+def make_bot(api_base: str) -> Bot:
+    session = AiohttpSession(api=TelegramAPIServer.from_base(api_base))
+    return Bot(
+        token=os.environ["TELEGRAM_TOKEN"],
+        session=session,
+        default=DefaultBotProperties(parse_mode="HTML")
+    )
+
+
+def summarize(mode: str, latencies: list[float]):
+    latencies = sorted(latencies)
+    if not latencies:
+        print(f"{mode}: нет ответов")
+        return
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+    print(
+        f"{mode:8} n={len(latencies):5}  "
+        f"mean={statistics.mean(latencies) * 1000:7.2f} мс  "
+        f"p50={statistics.median(latencies) * 1000:7.2f} мс  "
+        f"p95={p95 * 1000:7.2f} мс"
+    )
+
+
+async def bench_webhook(dp, api_base: str, fake: FakeTelegramAPI, args) -> list[float]:
+    from src.webhook import create_webhook_app, run_webhook
+
+    bot = make_bot(api_base)
+    app = create_webhook_app(bot, dp, path=WEBHOOK_PATH, secret_token=WEBHOOK_SECRET)
+    runner = await run_webhook(app, "127.0.0.1", args.webhook_port)
+    url = f"http://127.0.0.1:{args.webhook_port}{WEBHOOK_PATH}"
+    headers = {"X-Telegram-Bot-Api-Secret-Token": WEBHOOK_SECRET}
+
+    latencies = []
+    try:
+        async with aiohttp.ClientSession() as http:
+            # Запрос с неверным секретом должен быть отклонён
+            async with http.post(url, json={"update_id": 0}) as resp:
+                assert resp.status == 401, f"секрет не проверяется: HTTP {resp.status}"
+
+            for i in range(args.count):
+                chat_id = FIRST_CHAT_ID + i
+                reply = fake.wait_reply(chat_id)
+                update = {**make_text_update(chat_id, args.text, args.username), "update_id": i + 1}
+                started = time.perf_counter()
+                async with http.post(url, json=update, headers=headers) as resp:
+                    resp.raise_for_status()
+                answered = await asyncio.wait_for(reply, args.timeout)
+                latencies.append(answered - started)
+    finally:
+        await runner.cleanup()
+        await bot.session.close()
+
+    return latencies
+
+
+async def bench_polling(dp, api_base: str, fake: FakeTelegramAPI, args) -> list[float]:
+    bot = make_bot(api_base)
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False))
+
+    latencies = []
+    try:
+        for i in range(args.count):
+            chat_id = FIRST_CHAT_ID + i
+            reply = fake.wait_reply(chat_id)
+            started = time.perf_counter()
+            fake.push_update(make_text_update(chat_id, args.text, args.username))
+            answered = await asyncio.wait_for(reply, args.timeout)
+            latencies.append(answered - started)
+    finally:
+        await dp.stop_polling()
+        await polling
+        await bot.session.close()
+
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["webhook", "polling", "both"], default="both")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--text", default="/start")
+    parser.add_argument("--username", default="bench_user")
+    parser.add_argument("--api-port", type=int, default=8081)
+    parser.add_argument("--webhook-port", type=int, default=8082)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    from src.bot import dp
+    from src.core.startup import warm_up
+
+    # Замеряется ответ прогретого бота, как после запуска main.py
+    await warm_up()
+
+    fake = FakeTelegramAPI()
+    api_base = await fake.start(port=args.api_port)
+
+    try:
+        if args.mode in ("webhook", "both"):
+            summarize("webhook", await bench_webhook(dp, api_base, fake, args))
+        if args.mode in ("polling", "both"):
+            summarize("polling", await bench_polling(dp, api_base, fake, args))
+    finally:
+        await fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,16 +3,106 @@ import logging
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from src.bot import bot, dp
-from src.services.notification_service import get_pending_notifications
+from src.config.settings import (
+    BOT_MODE,
+    WEBHOOK_BASE_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBAPP_HOST,
+    WEBAPP_PORT,
+    METRICS_HOST,
+    METRICS_PORT,
+)
+from src.core.maintenance import maintenance_manager
+from src.core.shared_state import shared_state, WORKER_ID
+from src.core.startup import readiness, warm_up
+from src.services.data_loader import data_store, DATA_FILES
+from src.services.homework_updater import api_session
+from src.services.notification_service import get_pending_notifications, send_messages
+from src.services.refresh_jobs import refresh_jobs
+from src.utils.loop_monitor import loop_monitor
+
+NOTIFICATIONS_INTERVAL_MINUTES = 6
+
+scheduler = AsyncIOScheduler()
+metrics_runner = None
+warm_up_tasks: set[asyncio.Task] = set()
 
 
 async def send_notifications_job():
+    # При нескольких процессах бота уведомления рассылает только лидер
+    is_leader = await shared_state.try_lead(
+        "notifications", WORKER_ID, ttl=NOTIFICATIONS_INTERVAL_MINUTES * 60 * 2
+    )
+    if not is_leader:
+        return
+
+    # Свежие снимки загружаются вне event loop до синхронного расчёта
+    await data_store.refresh(list(DATA_FILES))
     notifications = get_pending_notifications()
-    for chat_id, text in notifications:
-        try:
-            await bot.send_message(chat_id, text)
-        except Exception as e:
-            logging.error(f"Не удалось отправить уведомление {chat_id}: {e}")
+    if notifications:
+        sent, failed = await send_messages(bot, notifications)
+        logging.info(f"Напоминания отправлены: успешно={sent}, ошибок={failed}")
+
+
+async def warm_up_bot():
+    if BOT_MODE == "webhook":
+        # Сервер принимает запросы сразу, обновления ждут прогрева в ReadinessMiddleware
+        task = asyncio.create_task(warm_up(readiness))
+        warm_up_tasks.add(task)
+        task.add_done_callback(warm_up_tasks.discard)
+    else:
+        # В режиме polling обновления не запрашиваются до конца прогрева
+        await warm_up(readiness)
+
+
+async def start_metrics():
+    global metrics_runner
+    if METRICS_PORT:
+        from src.metrics_server import run_metrics_server
+        metrics_runner = await run_metrics_server(METRICS_HOST, METRICS_PORT)
+
+
+async def stop_metrics():
+    global metrics_runner
+    if metrics_runner is not None:
+        await metrics_runner.cleanup()
+        metrics_runner = None
+
+
+async def start_scheduler():
+    scheduler.add_job(
+        send_notifications_job,
+        "interval",
+        minutes=NOTIFICATIONS_INTERVAL_MINUTES,  # Каждые ~6 минут
+        id="notifications",
+        replace_existing=True
+    )
+    # Подхватываем режим обслуживания, включённый другим процессом бота
+    scheduler.add_job(
+        maintenance_manager.sync,
+        "interval",
+        seconds=maintenance_manager.SYNC_INTERVAL,
+        id="maintenance_sync",
+        replace_existing=True
+    )
+    scheduler.start()
+    loop_monitor.start()
+    logging.info("Планировщик уведомлений активен.")
+
+
+async def stop_scheduler():
+    if scheduler.running:
+        scheduler.shutdown()
+        logging.info("Планировщик уведомлений остановлен.")
+    await shared_state.release_leadership("notifications", WORKER_ID)
+    await loop_monitor.stop()
+
+
+async def stop_refresh_jobs():
+    # Незавершённые обновления отменяются, затем закрывается общая сессия API
+    await refresh_jobs.shutdown()
+    await api_session.close()
 
 
 async def main():
@@ -21,14 +111,33 @@ async def main():
         format="%(asctime)s - %(levelname)s - %(name)s - %(message)s"
     )
 
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(send_notifications_job, "interval", minutes=6)  # Каждые ~6 минут
-    scheduler.start()
+    # Прогрев, планировщик и сервер метрик запускаются и останавливаются вместе с диспетчером
+    dp.startup.register(warm_up_bot)
+    dp.startup.register(start_scheduler)
+    dp.startup.register(start_metrics)
+    dp.shutdown.register(stop_scheduler)
+    dp.shutdown.register(stop_metrics)
+    dp.shutdown.register(stop_refresh_jobs)
 
-    logging.info("Бот запущен. Планировщик уведомлений активен.")
-    
-    await dp.start_polling(bot)
+    if BOT_MODE == "webhook":
+        from src.webhook import create_webhook_app, run_webhook
+
+        app = create_webhook_app(
+            bot, dp,
+            path=WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET,
+            base_url=WEBHOOK_BASE_URL
+        )
+        runner = await run_webhook(app, WEBAPP_HOST, WEBAPP_PORT)
+        logging.info("Бот запущен в режиме webhook.")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+    else:
+        logging.info("Бот запущен в режиме polling.")
+        await dp.start_polling(bot)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,187 @@
+"""
+Сводка по трассе обновления домашек (JSONL)
+
+Показывает, на что ушло время прогона: ожидание API, паузы между
+страницами, повторы после 429/5xx, разбор JSON и запись файла; задержки
+страниц по перцентилям, самые долгие кланы и оценку времени прогона при
+параллельной загрузке нескольких кланов. Для выгрузки, публикующей кланы
+по одному (события publish), — когда данные первых кланов стали видны боту.
+
+Трассы пишут бот (data/traces/clans_*.jsonl, data/traces/homeworks_*.jsonl)
+и scripts/homeworks.py с переменной REFRESH_TRACE_FILE.
+
+Запуск:
+    python scripts/analyze_refresh_trace.py data/traces/homeworks_20250101_120000_000000.jsonl
+    python scripts/analyze_refresh_trace.py data/traces --concurrency 1 2 4 8
+"""
+import argparse
+import heapq
+import json
+from collections import Counter
+from pathlib import Path
+
+# Категории времени в порядке вывода: (ключ, подпись)
+CATEGORIES = [
+    ("upstream", "ожидание API"),
+    ("backoff", "паузы перед повторами"),
+    ("sleep", "паузы между страницами"),
+    ("parse", "разбор JSON"),
+    ("write", "запись файла"),
+    ("login", "авторизация"),
+]
+
+
+def load_events(path: Path) -> list[dict]:
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Последняя строка может быть недописана, если прогон прервали
+                print(f"  {path.name}:{line_no}: пропущена повреждённая строка")
+    return events
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def estimate_wall(clan_ms: list[float], workers: int) -> float:
+    """
+    Время загрузки кланов на workers параллельных воркерах
+
+    Кланы раздаются от самых долгих к коротким свободному воркеру (LPT).
+    Оценка не учитывает, что при параллельной загрузке API чаще отвечает 429
+    """
+    loads = [0.0] * workers
+    for duration in sorted(clan_ms, reverse=True):
+        heapq.heapreplace(loads, loads[0] + duration)
+    return max(loads)
+
+
+def summarize(path: Path, events: list[dict], top: int, concurrency: list[int]):
+    by_type: dict[str, list[dict]] = {}
+    for event in events:
+        by_type.setdefault(event.get("event"), []).append(event)
+
+    start = (by_type.get("run_start") or [{}])[0]
+    end = (by_type.get("run_end") or [None])[0]
+    pages = by_type.get("page", [])
+    clans = by_type.get("clan", [])
+
+    wall = end["ms"] if end else max((e.get("t", 0) for e in events), default=0) * 1000
+
+    totals = {
+        "upstream": sum(p.get("upstream_ms", 0) for p in pages),
+        "backoff": sum(p.get("backoff_ms", 0) for p in pages),
+        "parse": sum(p.get("parse_ms", 0) for p in pages),
+        "sleep": sum(e.get("ms", 0) for e in by_type.get("sleep", [])),
+        "write": sum(e.get("ms", 0) for e in by_type.get("write", [])),
+        "login": sum(e.get("ms", 0) for e in by_type.get("login", [])),
+    }
+
+    print(f"\n=== {path.name} ===")
+    print(
+        f"Источник: {start.get('source', '?')}, начат {start.get('started_at', '?')}, "
+        f"кланов: {start.get('clans', len(clans))}"
+    )
+    if end:
+        status = "успешно" if end.get("ok") else f"ошибка: {end.get('error')}"
+        print(
+            f"Итог: {status}; загружено {end.get('items', 0):,}, "
+            f"запросов {end.get('requests', 0):,}, повторов {end.get('retries', 0):,}"
+        )
+    else:
+        print("Итог: run_end нет — прогон прерван или ещё идёт")
+
+    print(f"\nВремя прогона: {wall / 1000:,.1f} с")
+    accounted = 0.0
+    for key, label in CATEGORIES:
+        value = totals[key]
+        accounted += value
+        print(f"  {label:<26} {value / 1000:>10,.1f} с  {value * 100 / wall if wall else 0:>5.1f}%")
+    other = max(0.0, wall - accounted)
+    print(f"  {'прочее':<26} {other / 1000:>10,.1f} с  {other * 100 / wall if wall else 0:>5.1f}%")
+
+    if pages:
+        latencies = [p["upstream_ms"] for p in pages if p.get("retries", 0) == 0]
+        items = [p.get("items", 0) for p in pages]
+        statuses = Counter(p.get("status", "?") for p in pages)
+        retried = sum(1 for p in pages if p.get("retries", 0))
+        print(f"\nСтраниц: {len(pages):,} (пустых {items.count(0):,}, с повторами {retried:,})")
+        print(f"  заданий на страницу: {sum(items) / len(items):.1f}")
+        if latencies:
+            print(
+                f"  ответ API без повторов, мс: p50 {percentile(latencies, 0.5):.0f}  "
+                f"p95 {percentile(latencies, 0.95):.0f}  p99 {percentile(latencies, 0.99):.0f}  "
+                f"max {max(latencies):.0f}"
+            )
+        print("  итоговые статусы: " + ", ".join(f"{code}: {count}" for code, count in statuses.most_common()))
+
+    published = by_type.get("publish", [])
+    if published:
+        seconds = [e.get("t", 0) for e in published]
+        items = sum(e.get("items", 0) for e in published)
+        half = percentile(seconds, 0.5)
+        print(f"\nПубликация по кланам: {len(published)} кланов, {items:,} заданий")
+        print(
+            f"  первый клан через {seconds[0]:,.1f} с, половина кланов — через {half:,.1f} с, "
+            f"последний — через {seconds[-1]:,.1f} с"
+        )
+
+    if clans:
+        print(f"\nСамые долгие кланы (из {len(clans)}):")
+        for clan in sorted(clans, key=lambda c: c.get("ms", 0), reverse=True)[:top]:
+            print(
+                f"  клан {clan['clan']:<8} {clan.get('ms', 0) / 1000:>8.1f} с  "
+                f"страниц {clan.get('pages', 0):>4}  заданий {clan.get('items', 0):>6}"
+            )
+
+        clan_ms = [c.get("ms", 0) for c in clans]
+        fixed = totals["login"] + totals["write"]
+        print("\nОценка при параллельной загрузке кланов:")
+        for workers in concurrency:
+            estimate = estimate_wall(clan_ms, workers) + fixed
+            print(f"  воркеров {workers:>3}: ~{estimate / 1000:,.1f} с")
+        print("  (лимит частоты API не учтён: паузы и повторы масштабируются вместе с воркерами)")
+
+
+def collect_paths(paths: list[Path]) -> list[Path]:
+    result = []
+    for path in paths:
+        if path.is_dir():
+            result.extend(sorted(path.glob("*.jsonl")))
+        else:
+            result.append(path)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", type=Path, help="файлы трасс или каталоги с ними")
+    parser.add_argument("--top", type=int, default=10, help="сколько самых долгих кланов показать")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    paths = collect_paths(args.paths)
+    if not paths:
+        print("Трассы не найдены")
+        return
+
+    for path in paths:
+        events = load_events(path)
+        if not events:
+            print(f"\n=== {path.name} === пустая трасса")
+            continue
+        summarize(path, events, args.top, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
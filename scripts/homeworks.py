@@ -1,187 +1,96 @@
+"""
+Полная выгрузка ДЗ, ожидающих проверки, — ЕГЭLand
+
+Обёртка командной строки над src.services.homework_updater.refresh_all_homeworks:
+та же выгрузка, что запускает админ-панель бота. Кланы загружаются по
+приоритету и публикуются в data/homeworks/ по одному; запущенный бот
+подхватывает их по mtime манифеста.
+
+Если задан TELEGRAM_TOKEN, наставники получают уведомления о новых сдачах
+в своих кланах, как после выгрузки из админ-панели.
+
+Если задана переменная REFRESH_TRACE_FILE, пишет в этот файл JSONL-трассу
+прогона (формат — src/utils/refresh_trace.py).
+"""
 from pathlib import Path
+import asyncio
 import os
-import time
-import json
-import requests
-from datetime import datetime
-import random
-from urllib.parse import quote
+import sys
 
 from dotenv import load_dotenv
 
-# -------------------------------------------------
-# Загрузка конфигурации
-# -------------------------------------------------
 ROOT_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(ROOT_DIR / ".env")
 
-API_BASE_URL = os.getenv("BASE_URL")
-if not API_BASE_URL:
-    raise RuntimeError("BASE_URL не задан в .env")
-
-LOGIN_URL = f"{API_BASE_URL}/login"
-
-DELAY_BASE = float(os.getenv("DELAY_BASE", 4.5))
-DELAY_JITTER = float(os.getenv("DELAY_JITTER", 1.8))
-PER_PAGE = int(os.getenv("PER_PAGE", 50))
-
-OUTPUT_DIR = ROOT_DIR / os.getenv("OUTPUT_DIR", "data")
-HOMEWORKS_FILE = OUTPUT_DIR / os.getenv("OUTPUT_FILE_HOMEWORKS", "homeworks.json")
+sys.path.insert(0, str(ROOT_DIR))
+from src.services.homework_updater import api_session, refresh_all_homeworks
+from src.core.types import JobProgress
 
-PENDING_FILTER = quote("Ожидает проверки")
 
-# -------------------------------------------------
-# API-функции
-# -------------------------------------------------
-def login(email: str, password: str) -> str:
-    """Авторизация и получение токена"""
-    resp = requests.post(
-        LOGIN_URL,
-        json={"email": email, "password": password},
-        timeout=15
-    )
-    resp.raise_for_status()
-    return resp.json()["access_token"]
+def print_progress(progress: JobProgress):
+    if not progress.done:
+        print(f"Кланов для выгрузки: {progress.total}")
+        return
+    failed = f", не загружено {progress.failed}" if progress.failed else ""
+    print(f"→ {progress.current} ({progress.done}/{progress.total}) | всего заданий: {progress.items:,}{failed}")
 
 
-def get_clan_homeworks_page(token: str, clan_id: int, page: int = 1) -> tuple[list, dict]:
-    """Получение одной страницы домашних заданий клана"""
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/json",
-    }
+async def notify_mentors(diffs: list) -> None:
+    if not diffs or not os.getenv("TELEGRAM_TOKEN"):
+        return
+    # aiogram импортируется несколько секунд: только когда есть что отправить
+    from src.bot import bot
+    from src.services.notification_service import get_new_submission_notifications, send_messages
 
-    params = {
-        "page": page,
-        "filter": "Ожидает проверки",
-        "sort": "delivery_desc",
-        "lesson_id": "",
-    }
+    try:
+        notifications = get_new_submission_notifications(diffs)
+        if notifications:
+            sent, failed = await send_messages(bot, notifications)
+            print(f"Уведомлений о новых сдачах: {sent}" + (f", ошибок {failed}" if failed else ""))
+    finally:
+        await bot.session.close()
 
-    url = f"{API_BASE_URL}/clan/{clan_id}/homeworks"
 
+async def run() -> dict:
+    trace_file = os.getenv("REFRESH_TRACE_FILE")
+    diffs = []
     try:
-        resp = requests.get(url, headers=headers, params=params, timeout=30)
-        
-        if resp.status_code == 429:
-            print("  429 Too Many Requests → ждём 60 секунд...")
-            time.sleep(60)
-            return get_clan_homeworks_page(token, clan_id, page)
-
-        resp.raise_for_status()
-        data = resp.json()
-        return data.get("data", []), data.get("meta", {})
-
-    except (requests.Timeout, requests.ConnectionError) as e:
-        print(f"  Ошибка соединения (клан {clan_id}, стр {page}): {e}")
-        return [], {}
-    except requests.HTTPError as e:
-        print(f"  HTTP {resp.status_code} (клан {clan_id}, стр {page}): {resp.text[:300]}")
-        return [], {}
-    except Exception as e:
-        print(f"  Неожиданная ошибка (клан {clan_id}, стр {page}): {e}")
-        return [], {}
-
-
-# -------------------------------------------------
-# Утилиты
-# -------------------------------------------------
-def extract_unique_clan_ids(mentors_path: Path) -> list[int]:
-    if not mentors_path.exists():
-        raise FileNotFoundError(f"Файл не найден: {mentors_path}")
-
-    with open(mentors_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    clan_ids = set()
-    for mentor in data.get("mentors", []):
-        for clan in mentor.get("clans_mentor", []):
-            if cid := clan.get("id"):
-                clan_ids.add(cid)
-    return sorted(clan_ids)
-
-
-def add_clan_context(homework: dict, clan_id: int):
-    homework["clan_id"] = clan_id
-
-
-# -------------------------------------------------
-# Основная логика
-# -------------------------------------------------
-def main():
+        return await refresh_all_homeworks(
+            print_progress, Path(trace_file) if trace_file else None, diffs.append
+        )
+    finally:
+        await api_session.close()
+        # И после ошибки: опубликованные кланы уже в данных бота. Сбой
+        # уведомлений не должен подменять итог выгрузки
+        try:
+            await notify_mentors(diffs)
+        except Exception as e:
+            print(f"Не удалось отправить уведомления о новых сдачах: {e}")
+
+
+def main() -> int:
     print("Выгрузка ДЗ, ожидающих проверки — ЕГЭLand\n")
+    result = asyncio.run(run())
 
-    email = os.getenv("API_EMAIL")
-    password = os.getenv("API_PASSWORD")
-    if not email or not password:
-        raise RuntimeError("API_EMAIL или API_PASSWORD не заданы в .env")
-
-    print("Авторизация... ", end="")
-    token = login(email, password)
-    print("OK")
-
-    mentors_path = OUTPUT_DIR / os.getenv("OUTPUT_FILE_MENTORS", "mentors.json")
-    print("Чтение списка кланов... ", end="")
-    clan_ids = extract_unique_clan_ids(mentors_path)
-    print(f"{len(clan_ids)} уникальных кланов")
-
-    all_homeworks = []
-    processed = 0
-
-    for clan_id in clan_ids:
-        processed += 1
-        print(f"\n→ Клан {clan_id}  ({processed}/{len(clan_ids)})")
-
-        page = 1
-        clan_count = 0
-
-        while True:
-            print(f"  стр {page}... ", end="", flush=True)
-            homeworks, meta = get_clan_homeworks_page(token, clan_id, page)
-
-            if not homeworks:
-                print("пусто")
-                break
-
-            for hw in homeworks:
-                add_clan_context(hw, clan_id)
-
-            all_homeworks.extend(homeworks)
-            clan_count += len(homeworks)
-
-            last_page = meta.get("last_page", 1)
-            print(f"+{len(homeworks)}  (по клану: {clan_count} | всего: {len(all_homeworks)})")
-
-            if page >= last_page:
-                break
-
-            page += 1
-            # Случайная человеческая задержка
-            sleep_time = DELAY_BASE + random.uniform(-DELAY_JITTER, DELAY_JITTER)
-            time.sleep(max(1.0, sleep_time))
-
-    # Сохранение результата
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-    result = {
-        "exported_at": datetime.now().isoformat(),
-        "total_pending": len(all_homeworks),
-        "clans_processed": len(clan_ids),
-        "homeworks": all_homeworks
-    }
-
-    with open(HOMEWORKS_FILE, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    if not result["success"]:
+        print(f"\nКритическая ошибка: {result['error']}")
+        return 1
 
-    print(f"\nГотово!")
-    print(f"Всего заданий ожидающих проверки: {len(all_homeworks):,}")
-    print(f"Сохранено → {HOMEWORKS_FILE}")
+    print("\nГотово!")
+    print(f"Кланов обновлено: {result['updated_clans']}")
+    print(f"Всего заданий ожидающих проверки: {result['total_homeworks']:,}")
+    if result["added"] or result["removed"]:
+        print(f"Новых на проверку: {result['added']}, проверено с прошлой выгрузки: {result['removed']}")
+    if result["rejected"]:
+        print(f"Отброшено некорректных: {result['rejected']}")
+    if result["failed_clans"]:
+        print(f"Не загружены (оставлены прошлые данные): {', '.join(map(str, result['failed_clans']))}")
+    return 0
 
 
 if __name__ == "__main__":
     try:
-        main()
+        sys.exit(main())
     except KeyboardInterrupt:
         print("\nОстановлено пользователем")
-    except Exception as e:
-        print(f"\nКритическая ошибка: {e}")
\ No newline at end of file
+        sys.exit(130)
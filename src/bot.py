@@ -4,8 +4,17 @@ from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 
 from src.config.settings import TELEGRAM_TOKEN
-from src.handlers import start, info, expiring, update_homeworks, admin
+from src.handlers import start, info, expiring, search, update_homeworks, admin
 from src.middleware.maintenance import MaintenanceMiddleware
+from src.middleware.metrics import MetricsMiddleware
+from src.middleware.timing import TimingMiddleware
+from src.middleware.data import DataMiddleware
+from src.middleware.readiness import ReadinessMiddleware
+from src.middleware.user_context import UserContextMiddleware
+from src.core.shared_state import shared_state, create_fsm_storage
+
+if not TELEGRAM_TOKEN:
+    raise ValueError("TELEGRAM_TOKEN не найден в .env файле")
 
 bot = Bot(
     token=TELEGRAM_TOKEN,
@@ -14,14 +23,37 @@ bot = Bot(
     )
 )
 
-dp = Dispatcher()
+# Хранилище FSM общее для всех процессов бота, если настроен общий backend
+dp = Dispatcher(storage=create_fsm_storage(shared_state))
+
+# Полное время обработки обновления; медленные пишутся в лог с разбивкой
+dp.update.outer_middleware(TimingMiddleware())
+
+# До завершения прогрева обновления ждут или получают ответ "бот запускается"
+dp.update.outer_middleware(ReadinessMiddleware())
+
+# Снимки данных загружаются вне event loop до вызова хендлеров
+dp.update.outer_middleware(DataMiddleware())
+
+# Пользователь определяется один раз на обновление, неавторизованные отклоняются
+dp.message.outer_middleware(UserContextMiddleware())
+dp.callback_query.outer_middleware(UserContextMiddleware())
+dp.inline_query.outer_middleware(UserContextMiddleware())
 
 # Подключаем middleware для режима обслуживания
 dp.message.middleware(MaintenanceMiddleware())
+dp.callback_query.middleware(MaintenanceMiddleware())
+dp.inline_query.middleware(MaintenanceMiddleware())
+
+# Время работы хендлеров для /metrics
+dp.message.middleware(MetricsMiddleware())
+dp.callback_query.middleware(MetricsMiddleware())
+dp.inline_query.middleware(MetricsMiddleware())
 
 # Подключаем роутеры
 dp.include_router(start.router)
 dp.include_router(info.router)
 dp.include_router(expiring.router)
+dp.include_router(search.router)
 dp.include_router(update_homeworks.router)
 dp.include_router(admin.router)
\ No newline at end of file
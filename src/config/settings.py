@@ -2,14 +2,59 @@ from pathlib import Path
 from dotenv import load_dotenv
 import os
 
+from src.core.snapshot_codec import check_codec, parse_level
+
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
-DATA_DIR = BASE_DIR / "data"
+# Тот же каталог, куда пишут скрипты выгрузки (OUTPUT_DIR)
+DATA_DIR = BASE_DIR / os.getenv("OUTPUT_DIR", "data")
 
+# Проверяется в src/bot.py: скриптам выгрузки токен не нужен
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 BASE_URL = os.getenv("BASE_URL")
 
-if not TELEGRAM_TOKEN:
-    raise ValueError("TELEGRAM_TOKEN не найден в .env файле")
\ No newline at end of file
+# Режим получения обновлений: "polling" или "webhook"
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+
+# Настройки webhook-режима
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL")  # публичный адрес, например https://bot.example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", 8080))
+
+# Эндпоинт метрик Prometheus; METRICS_PORT=0 отключает его
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+
+# Обновления дольше порога пишутся в лог с разбивкой по вызовам сервисов
+SLOW_UPDATE_THRESHOLD_MS = float(os.getenv("SLOW_UPDATE_THRESHOLD_MS", 500))
+
+# Трассы обновления домашек (JSONL); хранятся последние REFRESH_TRACE_KEEP
+# прогонов каждой операции, 0 отключает трассировку
+REFRESH_TRACE_DIR = DATA_DIR / "traces"
+REFRESH_TRACE_KEEP = int(os.getenv("REFRESH_TRACE_KEEP", 20))
+
+# Сжатие файлов шардов домашек: "none", "gzip" или "zstd"; уровень пустой —
+# по умолчанию для кодека. Читаются файлы с любым сжатием
+SNAPSHOT_COMPRESSION = os.getenv("SNAPSHOT_COMPRESSION", "none")
+SNAPSHOT_COMPRESSION_LEVEL = parse_level(os.getenv("SNAPSHOT_COMPRESSION_LEVEL"))
+
+# Общее состояние процессов бота: "memory" (один процесс) или "sqlite"
+SHARED_STATE_BACKEND = os.getenv("SHARED_STATE_BACKEND", "memory")
+SHARED_STATE_PATH = Path(os.getenv("SHARED_STATE_PATH", DATA_DIR / "shared_state.sqlite3"))
+
+if BOT_MODE not in ("polling", "webhook"):
+    raise ValueError(f"Неизвестный BOT_MODE: {BOT_MODE} (ожидается polling или webhook)")
+
+check_codec(SNAPSHOT_COMPRESSION)
+
+if SHARED_STATE_BACKEND not in ("memory", "sqlite"):
+    raise ValueError(
+        f"Неизвестный SHARED_STATE_BACKEND: {SHARED_STATE_BACKEND} (ожидается memory или sqlite)"
+    )
+
+if BOT_MODE == "webhook" and not WEBHOOK_SECRET:
+    raise ValueError("WEBHOOK_SECRET обязателен в webhook-режиме")
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""
+Схема хранения домашек в homeworks.json
+
+Ответ API /clan/{id}/homeworks содержит десятки вложенных полей, а бот
+читает восемь. При загрузке из API каждая домашка проецируется в плоскую
+запись текущей версии схемы и проверяется:
+
+    {"id": 1, "clan_id": 2, "delivery_date": "2025-09-21T22:02:06.000000Z",
+     "status": "Ожидает проверки", "first_name": "...", "last_name": "...",
+     "topic": "..." | null, "type_name": "..."}
+
+Версии схемы (поле schema_version в корне файла):
+    1 — полные ответы API с добавленным clan_id (поля schema_version нет)
+    2 — плоские записи выше, файл пишется без отступов
+
+Модуль не зависит от настроек бота: его используют и скрипты выгрузки.
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+from src.utils.datetime import parse_delivery_date
+
+SCHEMA_VERSION = 2
+
+# Название задания, если у домашки нет ни темы урока, ни типа
+UNKNOWN_TASK = "??"
+
+
+class HomeworkValidationError(ValueError):
+    """Домашку из API нельзя сохранить: нет обязательного поля или оно некорректно"""
+    pass
+
+
+@dataclass
+class IngestReport:
+    """Итог проекции пачки домашек"""
+    accepted: int = 0
+    repaired: int = 0  # из принятых: сохранены с подставленным значением
+    rejected: int = 0
+    reasons: Counter = field(default_factory=Counter)
+
+    def merge(self, other: "IngestReport"):
+        self.accepted += other.accepted
+        self.repaired += other.repaired
+        self.rejected += other.rejected
+        self.reasons.update(other.reasons)
+
+    def summary(self) -> str:
+        text = f"принято {self.accepted}, исправлено {self.repaired}, отброшено {self.rejected}"
+        if self.reasons:
+            text += " (" + ", ".join(f"{reason}: {count}" for reason, count in self.reasons.most_common()) + ")"
+        return text
+
+
+def _text(value: Any) -> str:
+    return value.strip() if isinstance(value, str) else ""
+
+
+def _dict(value: Any) -> dict:
+    return value if isinstance(value, dict) else {}
+
+
+def project_homework(hw: dict, clan_id: Optional[int] = None, report: Optional[IngestReport] = None) -> dict:
+    """
+    Проецирует домашку из ответа API в запись схемы SCHEMA_VERSION
+
+    Args:
+        hw: домашка в формате API
+        clan_id: клан, из которого она загружена (иначе берётся hw["clan_id"])
+        report: сюда записываются исправления
+
+    Raises:
+        HomeworkValidationError: нет id, клана, даты сдачи или статуса
+    """
+    hw_id = hw.get("id")
+    if not isinstance(hw_id, int) or isinstance(hw_id, bool):
+        raise HomeworkValidationError("id")
+
+    clan_id = hw.get("clan_id") if clan_id is None else clan_id
+    if not isinstance(clan_id, int) or isinstance(clan_id, bool):
+        raise HomeworkValidationError("clan_id")
+
+    delivery_date = hw.get("delivery_date")
+    try:
+        parse_delivery_date(delivery_date)
+    except (TypeError, ValueError, AttributeError):
+        raise HomeworkValidationError("delivery_date")
+
+    status = _text(hw.get("status"))
+    if not status:
+        raise HomeworkValidationError("status")
+
+    user = _dict(hw.get("user"))
+    homework = _dict(hw.get("homework"))
+    topic = _text(_dict(homework.get("lesson")).get("topic")) or None
+    type_name = _text(_dict(homework.get("type")).get("name"))
+
+    # Раньше такие домашки падали на hw["homework"]["type"]["name"] при выводе
+    if not type_name and not topic:
+        type_name = UNKNOWN_TASK
+        if report is not None:
+            report.repaired += 1
+            report.reasons["type_name"] += 1
+
+    return {
+        "id": hw_id,
+        "clan_id": clan_id,
+        "delivery_date": delivery_date,
+        "status": status,
+        "first_name": _text(user.get("first_name")),
+        "last_name": _text(user.get("last_name")),
+        "topic": topic,
+        "type_name": type_name,
+    }
+
+
+def project_homeworks(
+    homeworks: Iterable[dict],
+    clan_id: Optional[int] = None
+) -> tuple[list[dict], IngestReport]:
+    """
+    Проецирует пачку домашек, отбрасывая некорректные
+
+    Returns:
+        (записи схемы, отчёт о принятых, исправленных и отброшенных)
+    """
+    report = IngestReport()
+    records = []
+    for hw in homeworks:
+        try:
+            records.append(project_homework(hw, clan_id, report))
+            report.accepted += 1
+        except HomeworkValidationError as e:
+            report.rejected += 1
+            report.reasons[str(e)] += 1
+    return records, report
+
+
+def is_stored_record(item: dict) -> bool:
+    """Запись схемы 2+ (а не домашка в формате API, как в схеме 1)"""
+    return "type_name" in item
@@ -0,0 +1,255 @@
+"""
+Раскладка домашек по файлам кланов
+
+Вместо одного homeworks.json домашки хранятся в каталоге data/homeworks/:
+
+    manifest.json   {"schema_version": 2, "updated_at": "...",
+                     "clans": {"12": {"file": "clan_12.json", "count": 40,
+                                      "size": 9120, "exported_at": "...",
+                                      "oldest_delivery": "..."}}}
+    clan_12.json    {"schema_version": 2, "clan_id": 12, "exported_at": "...",
+                     "homeworks": [записи схемы, см. homework_schema]}
+
+Обновление клана перезаписывает только его шард и манифест. Каждый файл
+пишется атомарно (временный файл и os.replace), манифест — последним,
+поэтому по манифесту всегда видны только целиком записанные шарды.
+Читатели определяют, что данные изменились, по mtime манифеста.
+
+Писать в каталог могут одновременно несколько процессов бота и скрипт
+выгрузки. Чтение, изменение и запись манифеста идут под файловой
+блокировкой .manifest.lock (manifest_lock), иначе процессы затирали бы
+записи манифеста друг друга.
+
+Полная выгрузка публикует кланы по одному, по мере загрузки, в порядке
+clan_priority: по манифесту прошлой выгрузки сначала идут кланы с самой
+давней сдачей (ближайшим дедлайном) и с наибольшим числом домашек.
+
+Шарды можно сжимать (snapshot_codec): clan_12.json.gz, clan_12.json.zst.
+Манифест всегда пишется без сжатия.
+
+Модуль не зависит от настроек бота: его используют и скрипты выгрузки.
+"""
+import io
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировка только внутри процесса (DataStore)
+    fcntl = None
+
+from src.core.homework_schema import SCHEMA_VERSION
+from src.core.snapshot_codec import CODECS, open_write
+
+SHARDS_DIRNAME = "homeworks"
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".manifest.lock"
+
+
+def shard_name(clan_id: int, codec: str = "none") -> str:
+    return f"clan_{clan_id}.json{CODECS[codec]}"
+
+
+def _shard_clan(path: Path) -> str:
+    """Клан по имени файла шарда с любым сжатием: clan_12.json.gz → 12"""
+    return path.name.split(".", 1)[0].removeprefix("clan_")
+
+
+def _remove_shard(directory: Path, clan_key: str, keep: Optional[str] = None):
+    """Удаляет файлы шарда клана во всех вариантах сжатия, кроме keep"""
+    for codec in CODECS:
+        name = shard_name(clan_key, codec)
+        if name != keep:
+            (directory / name).unlink(missing_ok=True)
+
+
+def _delivery_date(item: Any) -> str:
+    # Записи схемы — словари при выгрузке и HomeworkRecord в боте
+    return item["delivery_date"] if isinstance(item, dict) else item.delivery_date
+
+
+def write_json_atomic(
+    path: Path,
+    data: Any,
+    indent: Optional[int] = None,
+    default: Optional[Callable[[Any], Any]] = None,
+    codec: str = "none",
+    level: Optional[int] = None
+) -> int:
+    """
+    Атомарно записывает JSON: во временный файл, затем переименование
+
+    indent=None пишет без отступов и пробелов — для больших файлов.
+    json.dump отдаёт текст частями, поэтому сжатие идёт потоком
+
+    Returns:
+        размер записанного файла в байтах
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    separators = (",", ":") if indent is None else None
+    with io.TextIOWrapper(open_write(tmp_path, codec, level), encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent, separators=separators, default=default)
+    os.replace(tmp_path, path)
+    return path.stat().st_size
+
+
+def read_manifest(directory: Path) -> Optional[dict]:
+    """Манифест каталога шардов или None, если раскладки ещё нет"""
+    try:
+        with open(directory / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def manifest_lock(directory: Path) -> Iterator[None]:
+    """
+    Межпроцессная блокировка манифеста каталога шардов
+
+    flock снимается сам, если процесс упал, поэтому зависшей блокировки
+    не бывает. Блокирует поток, вызывать из asyncio.to_thread
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / LOCK_NAME, "ab") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def write_shards(
+    directory: Path,
+    shards: dict[int, list],
+    replace_all: bool = False,
+    default: Optional[Callable[[Any], Any]] = None,
+    codec: str = "none",
+    level: Optional[int] = None
+) -> dict:
+    """
+    Записывает шарды кланов и обновляет манифест
+
+    Args:
+        directory: каталог шардов
+        shards: {клан: его домашки}; клан с пустым списком удаляется
+        replace_all: полная выгрузка — кланы, которых нет в shards,
+            тоже удаляются
+        default: сериализация элементов, которые json не умеет писать сам
+        codec, level: сжатие шардов (см. snapshot_codec)
+
+    Returns:
+        новый манифест
+    """
+    with manifest_lock(directory):
+        return _write_shards(directory, shards, replace_all, default, codec, level)
+
+
+def _write_shards(
+    directory: Path,
+    shards: dict[int, list],
+    replace_all: bool,
+    default: Optional[Callable[[Any], Any]],
+    codec: str,
+    level: Optional[int]
+) -> dict:
+    manifest = None if replace_all else read_manifest(directory)
+    clans = dict(manifest["clans"]) if manifest else {}
+    exported_at = datetime.now().isoformat()
+
+    written = {str(clan_id) for clan_id, items in shards.items() if items}
+    if replace_all:
+        # Шарды прошлой выгрузки, которых нет в новой
+        removed = {_shard_clan(path) for path in directory.glob("clan_*.json*")} - written
+    else:
+        removed = {str(clan_id) for clan_id, items in shards.items() if not items}
+
+    for clan_id, items in shards.items():
+        if not items:
+            continue
+        name = shard_name(clan_id, codec)
+        size = write_json_atomic(
+            directory / name,
+            {
+                "schema_version": SCHEMA_VERSION,
+                "clan_id": clan_id,
+                "exported_at": exported_at,
+                "homeworks": items,
+            },
+            default=default,
+            codec=codec,
+            level=level,
+        )
+        clans[str(clan_id)] = {
+            "file": name,
+            "count": len(items),
+            "size": size,
+            "exported_at": exported_at,
+            # Даты в одном формате ISO, поэтому минимум строки — самая давняя сдача
+            "oldest_delivery": min(_delivery_date(item) for item in items),
+        }
+
+    for key in removed:
+        clans.pop(key, None)
+
+    manifest = {"schema_version": SCHEMA_VERSION, "updated_at": exported_at, "clans": clans}
+    write_json_atomic(directory / MANIFEST_NAME, manifest, indent=2)
+
+    # Файлы удаляются после манифеста: до этого он на них ещё ссылается
+    for key in removed:
+        _remove_shard(directory, key)
+    # Шарды, записанные раньше с другим сжатием
+    for key in written:
+        _remove_shard(directory, key, keep=clans[key]["file"])
+
+    return manifest
+
+
+def prune_shards(
+    directory: Path,
+    keep: Iterable[int],
+    codec: str = "none",
+    level: Optional[int] = None
+) -> Optional[dict]:
+    """
+    Удаляет шарды кланов, которых нет в keep (завершение полной выгрузки,
+    опубликованной по кланам)
+
+    Returns:
+        новый манифест или None, если удалять нечего
+    """
+    kept = {str(clan_id) for clan_id in keep}
+    with manifest_lock(directory):
+        manifest = read_manifest(directory) or {"clans": {}}
+        stale = set(manifest["clans"]) | {_shard_clan(path) for path in directory.glob("clan_*.json*")}
+        stale -= kept
+        if not stale:
+            return None
+        return _write_shards(directory, {int(key): [] for key in stale}, False, None, codec, level)
+
+
+def clan_priority(clan_ids: Iterable[int], manifest: Optional[dict]) -> list[int]:
+    """
+    Порядок загрузки кланов при полной выгрузке
+
+    Сначала кланы с самой давней домашкой на проверке (ближайший или уже
+    прошедший дедлайн), при равенстве — с наибольшим числом домашек.
+    Кланы, которых нет в манифесте (новые или без домашек), — в конце
+    """
+    entries = manifest["clans"] if manifest else {}
+
+    def key(clan_id: int):
+        entry = entries.get(str(clan_id))
+        if entry is None:
+            return (1, "", 0, clan_id)
+        # У шардов, записанных до появления oldest_delivery, даты нет
+        return (0, entry.get("oldest_delivery") or "\uffff", -entry.get("count", 0), clan_id)
+
+    return sorted(clan_ids, key=key)
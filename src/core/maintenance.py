@@ -3,46 +3,101 @@
 Управляет состоянием обслуживания бота при обновлении баз данных
 """
 import asyncio
+import json
 from datetime import datetime
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 import logging
 
+from src.core.metrics import registry, MAINTENANCE_DURATION
+from src.core.shared_state import lock_owner, shared_state
+
 logger = logging.getLogger(__name__)
 
+# Ключ статуса и блокировки обслуживания в общем состоянии
+MAINTENANCE_KEY = "maintenance"
+# Блокировка освобождается сама, если процесс упал во время обновления
+MAINTENANCE_LOCK_TTL = 3 * 60 * 60
+
 
-@dataclass
+@dataclass(frozen=True)
 class MaintenanceStatus:
-    """Статус режима обслуживания"""
+    """Статус режима обслуживания (неизменяемый снимок)"""
     is_active: bool = False
     operation: Optional[str] = None  # "homeworks" или "mentors"
     started_at: Optional[datetime] = None
     estimated_duration: Optional[int] = None  # в минутах
     message: Optional[str] = None
 
+    def to_json(self) -> str:
+        data = asdict(self)
+        if self.started_at:
+            data["started_at"] = self.started_at.isoformat()
+        return json.dumps(data, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, raw: Optional[str]) -> "MaintenanceStatus":
+        if not raw:
+            return cls()
+        data = json.loads(raw)
+        if data.get("started_at"):
+            data["started_at"] = datetime.fromisoformat(data["started_at"])
+        return cls(**data)
+
+
+INACTIVE_STATUS = MaintenanceStatus()
+
 
 class MaintenanceManager:
-    """Менеджер режима обслуживания"""
+    """
+    Менеджер режима обслуживания
+    
+    Текущий статус — неизменяемый снимок, который целиком заменяется
+    при изменении. Чтение (is_active, status) не требует ни await,
+    ни блокировки, поэтому проверка в middleware почти бесплатна.
+    
+    Статус хранится в общем состоянии, чтобы включение обслуживания
+    в одном процессе бота было видно остальным: sync() периодически
+    перечитывает его и подменяет локальный снимок.
+    """
+    
+    SYNC_INTERVAL = 2.0
     
     def __init__(self):
-        self._status = MaintenanceStatus()
-        self._lock = asyncio.Lock()
+        self._status = INACTIVE_STATUS
+        # Сериализует только изменения статуса, чтение идёт без блокировки
+        self._write_lock = asyncio.Lock()
     
-    async def is_maintenance_active(self) -> bool:
-        """Проверяет, активен ли режим обслуживания"""
-        async with self._lock:
-            return self._status.is_active
+    @property
+    def status(self) -> MaintenanceStatus:
+        """Текущий снимок статуса"""
+        return self._status
     
-    async def get_status(self) -> MaintenanceStatus:
-        """Получает текущий статус"""
-        async with self._lock:
-            return MaintenanceStatus(
-                is_active=self._status.is_active,
-                operation=self._status.operation,
-                started_at=self._status.started_at,
-                estimated_duration=self._status.estimated_duration,
-                message=self._status.message
-            )
+    @property
+    def is_active(self) -> bool:
+        """Активен ли режим обслуживания"""
+        return self._status.is_active
+    
+    @property
+    def maintenance_message(self) -> str:
+        """Сообщение для пользователей"""
+        status = self._status
+        if not status.is_active:
+            return "Бот работает в обычном режиме."
+        return status.message or "🔧 Бот временно недоступен"
+    
+    async def sync(self):
+        """Подменяет локальный снимок статусом из общего состояния"""
+        raw = await shared_state.get_value(MAINTENANCE_KEY)
+        status = MaintenanceStatus.from_json(raw) if raw else INACTIVE_STATUS
+        if status != self._status:
+            self._status = status
+    
+    async def _publish(self, status: MaintenanceStatus):
+        """Публикует новый снимок локально и в общем состоянии"""
+        value = status.to_json() if status.is_active else None
+        await shared_state.set_value(MAINTENANCE_KEY, value)
+        self._status = status
     
     async def start_maintenance(
         self, 
@@ -61,33 +116,43 @@ class MaintenanceManager:
         Returns:
             True если удалось включить, False если уже активен
         """
-        async with self._lock:
+        async with self._write_lock:
+            await self.sync()
             if self._status.is_active:
                 logger.warning(
                     f"Попытка включить maintenance mode, но он уже активен: {self._status.operation}"
                 )
                 return False
             
-            self._status.is_active = True
-            self._status.operation = operation
-            self._status.started_at = datetime.now()
-            self._status.estimated_duration = estimated_duration
+            # Блокировка защищает от одновременного включения в разных процессах.
+            # Владелец не запоминается: снимает её stop_maintenance любого процесса
+            if not await shared_state.acquire_lock(MAINTENANCE_KEY, lock_owner(), MAINTENANCE_LOCK_TTL):
+                logger.warning("Попытка включить maintenance mode, но его включает другой процесс")
+                return False
             
             if custom_message:
-                self._status.message = custom_message
+                message = custom_message
             else:
                 operation_names = {
                     "homeworks": "домашних заданий",
                     "mentors": "наставников"
                 }
                 op_name = operation_names.get(operation, "данных")
-                self._status.message = (
+                message = (
                     f"🔧 Бот временно недоступен\n\n"
                     f"Выполняется обновление базы {op_name}.\n"
                     f"Примерное время: ~{estimated_duration} мин.\n\n"
                     f"Пожалуйста, подождите. Бот автоматически возобновит работу после завершения."
                 )
             
+            await self._publish(MaintenanceStatus(
+                is_active=True,
+                operation=operation,
+                started_at=datetime.now(),
+                estimated_duration=estimated_duration,
+                message=message
+            ))
+            
             logger.info(
                 f"Maintenance mode ВКЛЮЧЕН: {operation}, "
                 f"длительность: {estimated_duration} мин"
@@ -101,36 +166,38 @@ class MaintenanceManager:
         Returns:
             True если удалось отключить, False если не был активен
         """
-        async with self._lock:
-            if not self._status.is_active:
+        async with self._write_lock:
+            await self.sync()
+            status = self._status
+            if not status.is_active:
                 logger.warning("Попытка отключить maintenance mode, но он не активен")
                 return False
             
-            operation = self._status.operation
             duration = None
-            if self._status.started_at:
-                duration = (datetime.now() - self._status.started_at).total_seconds() / 60
+            if status.started_at:
+                duration = (datetime.now() - status.started_at).total_seconds() / 60
+                MAINTENANCE_DURATION.labels(status.operation or "unknown").observe(duration * 60)
             
-            self._status.is_active = False
-            self._status.operation = None
-            self._status.started_at = None
-            self._status.estimated_duration = None
-            self._status.message = None
+            await self._publish(INACTIVE_STATUS)
+            # Без владельца намеренно: статус общий, и выключить обслуживание
+            # должен любой процесс — в том числе если включивший его упал
+            await shared_state.release_lock(MAINTENANCE_KEY)
             
             logger.info(
-                f"Maintenance mode ВЫКЛЮЧЕН: {operation}, "
+                f"Maintenance mode ВЫКЛЮЧЕН: {status.operation}, "
                 f"фактическая длительность: {duration:.1f} мин" if duration else ""
             )
             return True
-    
-    async def get_maintenance_message(self) -> str:
-        """Получает сообщение для пользователей"""
-        async with self._lock:
-            if not self._status.is_active:
-                return "Бот работает в обычном режиме."
-            
-            return self._status.message or "🔧 Бот временно недоступен"
 
 
 # Глобальный экземпляр менеджера
 maintenance_manager = MaintenanceManager()
+
+
+@registry.add_collector
+def _collect_maintenance():
+    status = maintenance_manager.status
+    yield (
+        "bot_maintenance_active", "gauge", "Включён ли режим обслуживания",
+        [("bot_maintenance_active", {"operation": status.operation or ""}, int(status.is_active))]
+    )
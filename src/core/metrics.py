@@ -0,0 +1,313 @@
+"""
+Метрики бота в формате Prometheus
+
+Минимальная реализация счётчиков, gauge и гистограмм без внешних
+зависимостей. Запись — словарь по кортежу меток и сложение чисел, поэтому
+инструментирование можно держать включённым в проде. Значения, которые
+сервисы и так считают (кэш отрисовки, снимки данных, задержки event loop),
+снимаются коллекторами только в момент запроса /metrics.
+
+Все изменения метрик выполняются в event loop; из потоков пула их вызывать
+не нужно.
+"""
+import math
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+# Границы гистограмм по умолчанию, секунды
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Sample = tuple[str, dict[str, str], float]
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Общая часть метрик: имя, описание и дочерние значения по меткам"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Значение метрики для набора меток (в порядке labelnames)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: ожидаются метки {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _label_dict(self, values: tuple) -> dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class _CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Монотонно растущий счётчик (имя по соглашению оканчивается на _total)"""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0):
+        self._default.value += amount
+
+    @property
+    def value(self) -> float:
+        return self._default.value
+
+    def samples(self):
+        for values, child in self._children.items():
+            yield self.name, self._label_dict(values), child.value
+
+
+class _GaugeValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+
+class Gauge(_Metric):
+    """Текущее значение"""
+
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeValue()
+
+    def set(self, value: float):
+        self._default.value = value
+
+    def inc(self, amount: float = 1.0):
+        self._default.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self._default.value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._default.value
+
+    def samples(self):
+        for values, child in self._children.items():
+            yield self.name, self._label_dict(values), child.value
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # последняя корзина — +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: "_HistogramValue"):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Оценка квантиля по корзинам, как histogram_quantile в Prometheus:
+        линейная интерполяция внутри корзины. Значения выше последней
+        границы оцениваются самой этой границей
+
+        Returns:
+            None, если наблюдений нет
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.bounds[-1]
+
+
+class Histogram(_Metric):
+    """Распределение значений по корзинам"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def children(self) -> dict[tuple, _HistogramValue]:
+        """Значения по кортежам меток"""
+        return dict(self._children)
+
+    def merged(self) -> _HistogramValue:
+        """Сумма значений по всем меткам"""
+        total = _HistogramValue(self.bounds)
+        for child in self._children.values():
+            total.merge(child)
+        return total
+
+    def samples(self):
+        for values, child in self._children.items():
+            labels = self._label_dict(values)
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), child.counts):
+                cumulative += count
+                yield self.name + "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield self.name + "_sum", labels, child.sum
+            yield self.name + "_count", labels, child.count
+
+
+class MetricsRegistry:
+    """Набор метрик и коллекторов, отдаваемых на /metrics"""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], Iterable[tuple[str, str, str, Iterable[Sample]]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable):
+        """
+        Регистрирует функцию, которая при каждом запросе /metrics возвращает
+        кортежи (имя, тип, описание, [(имя сэмпла, метки, значение), ...])
+        """
+        self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        """Текстовый формат Prometheus 0.0.4"""
+        lines = []
+
+        def emit(name, type_name, documentation, samples):
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {type_name}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+
+        for metric in self._metrics.values():
+            emit(metric.name, metric.type_name, metric.documentation, metric.samples())
+        for collector in self._collectors:
+            for family in collector():
+                emit(*family)
+
+        return "\n".join(lines) + "\n"
+
+
+# Глобальный реестр метрик бота
+registry = MetricsRegistry()
+
+HANDLER_DURATION = registry.histogram(
+    "bot_handler_duration_seconds", "Время работы хендлера", ("handler",)
+)
+HANDLER_ERRORS = registry.counter(
+    "bot_handler_errors_total", "Исключения в хендлерах", ("handler",)
+)
+SNAPSHOT_LOADS = registry.counter(
+    "bot_snapshot_loads_total", "Загрузки и записи снимков данных", ("file", "source")
+)
+API_REQUEST_DURATION = registry.histogram(
+    "egeland_api_request_duration_seconds", "Время запроса к API ЕГЭLand", ("endpoint",)
+)
+API_RESPONSES = registry.counter(
+    "egeland_api_responses_total", "Ответы API ЕГЭLand по статусу", ("endpoint", "status")
+)
+NOTIFICATION_QUEUE_DEPTH = registry.gauge(
+    "bot_notification_queue_depth", "Сообщения рассылки, ожидающие отправки"
+)
+NOTIFICATIONS_SENT = registry.counter(
+    "bot_notifications_total", "Отправка сообщений рассылки", ("result",)
+)
+MAINTENANCE_DURATION = registry.histogram(
+    "bot_maintenance_duration_seconds", "Длительность режима обслуживания", ("operation",),
+    buckets=(30, 60, 300, 600, 1800, 3600, 7200, 10800)
+)
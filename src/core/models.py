@@ -0,0 +1,30 @@
+"""
+Модели данных
+"""
+from dataclasses import dataclass
+from typing import Literal, Optional
+
+UserRole = Literal["mentor", "admin"]
+
+
+@dataclass(frozen=True)
+class UserContext:
+    """
+    Пользователь Telegram, сопоставленный с наставниками и администраторами
+
+    Вычисляется один раз на обновление (UserContextMiddleware) и передаётся
+    в хендлеры через data["user_ctx"]
+    """
+    username: Optional[str]
+    telegram_id: Optional[int] = None
+    role: Optional[UserRole] = None  # None — пользователь не найден
+    clan_ids: tuple[int, ...] = ()
+    is_admin: bool = False
+
+    @property
+    def is_authorized(self) -> bool:
+        return self.role is not None
+
+    @property
+    def has_clans(self) -> bool:
+        return bool(self.clan_ids)
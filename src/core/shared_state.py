@@ -0,0 +1,272 @@
+"""
+Общее состояние для нескольких процессов бота
+
+Блокировки, статус обслуживания, хранилище FSM и выбор лидера для задач
+планировщика вынесены за единый интерфейс SharedState:
+- MemorySharedState — состояние внутри одного процесса (по умолчанию)
+- SQLiteSharedState — общий файл SQLite, позволяет запускать несколько
+  процессов бота на одной машине
+"""
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey, StateType
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from src.config.settings import SHARED_STATE_BACKEND, SHARED_STATE_PATH
+
+# Идентификатор текущего процесса бота — владелец блокировок и лидерства
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def lock_owner() -> str:
+    """
+    Уникальный владелец одного захвата блокировки
+
+    WORKER_ID общий для всех корутин процесса, и повторный захват с ним
+    проходит; владелец из lock_owner() этого не допускает
+    """
+    return f"{WORKER_ID}:{uuid.uuid4().hex}"
+
+
+class SharedState(ABC):
+    """Интерфейс общего состояния"""
+
+    @abstractmethod
+    async def acquire_lock(self, name: str, owner: str, ttl: float) -> bool:
+        """
+        Захватывает блокировку name на ttl секунд
+
+        Повторный захват тем же владельцем продлевает блокировку (так
+        продлевается лидерство). Для взаимного исключения владельца берут
+        из lock_owner() и с ним же снимают блокировку.
+        Просроченная блокировка (например, упавшего процесса) считается свободной.
+
+        Returns:
+            True если блокировка принадлежит owner, иначе False
+        """
+
+    @abstractmethod
+    async def release_lock(self, name: str, owner: Optional[str] = None) -> None:
+        """Снимает блокировку; если owner указан — только свою"""
+
+    @abstractmethod
+    async def is_locked(self, name: str) -> bool:
+        """Проверяет, занята ли блокировка"""
+
+    @abstractmethod
+    async def get_value(self, key: str) -> Optional[str]:
+        """Читает значение по ключу"""
+
+    @abstractmethod
+    async def set_value(self, key: str, value: Optional[str]) -> None:
+        """Записывает значение; None удаляет ключ"""
+
+    async def try_lead(self, role: str, owner: str, ttl: float) -> bool:
+        """
+        Выбор лидера для роли (например, задачи планировщика)
+
+        Лидер продлевает аренду при каждом вызове; если он перестал
+        вызывать try_lead дольше ttl, лидером становится другой процесс
+        """
+        return await self.acquire_lock(f"leader:{role}", owner, ttl)
+
+    async def release_leadership(self, role: str, owner: str) -> None:
+        """Отказывается от лидерства, например при остановке процесса"""
+        await self.release_lock(f"leader:{role}", owner)
+
+    async def close(self) -> None:
+        pass
+
+
+class MemorySharedState(SharedState):
+    """Состояние внутри одного процесса"""
+
+    def __init__(self):
+        self._locks: dict[str, tuple[str, float]] = {}
+        self._values: dict[str, str] = {}
+
+    async def acquire_lock(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        current = self._locks.get(name)
+        if current and current[0] != owner and current[1] > now:
+            return False
+        self._locks[name] = (owner, now + ttl)
+        return True
+
+    async def release_lock(self, name: str, owner: Optional[str] = None) -> None:
+        current = self._locks.get(name)
+        if current and (owner is None or current[0] == owner):
+            del self._locks[name]
+
+    async def is_locked(self, name: str) -> bool:
+        current = self._locks.get(name)
+        return bool(current and current[1] > time.time())
+
+    async def get_value(self, key: str) -> Optional[str]:
+        return self._values.get(key)
+
+    async def set_value(self, key: str, value: Optional[str]) -> None:
+        if value is None:
+            self._values.pop(key, None)
+        else:
+            self._values[key] = value
+
+
+class SQLiteSharedState(SharedState):
+    """
+    Состояние в общем файле SQLite
+
+    Атомарность между процессами обеспечивают файловые блокировки SQLite
+    (BEGIN IMMEDIATE). Запросы выполняются в пуле потоков, чтобы не
+    блокировать event loop.
+    """
+
+    def __init__(self, path: Path):
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS locks ("
+                "name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self._path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("PRAGMA busy_timeout=10000")
+            yield conn
+        finally:
+            conn.close()
+
+    def _acquire_lock_sync(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT owner, expires_at FROM locks WHERE name = ?", (name,)
+                ).fetchone()
+                if row and row[0] != owner and row[1] > now:
+                    conn.execute("ROLLBACK")
+                    return False
+                conn.execute(
+                    "INSERT OR REPLACE INTO locks (name, owner, expires_at) VALUES (?, ?, ?)",
+                    (name, owner, now + ttl)
+                )
+                conn.execute("COMMIT")
+                return True
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _release_lock_sync(self, name: str, owner: Optional[str]) -> None:
+        with self._connect() as conn:
+            if owner is None:
+                conn.execute("DELETE FROM locks WHERE name = ?", (name,))
+            else:
+                conn.execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner))
+
+    def _is_locked_sync(self, name: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM locks WHERE name = ? AND expires_at > ?", (name, time.time())
+            ).fetchone()
+            return row is not None
+
+    def _get_value_sync(self, key: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else None
+
+    def _set_value_sync(self, key: str, value: Optional[str]) -> None:
+        with self._connect() as conn:
+            if value is None:
+                conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+            else:
+                conn.execute(
+                    "INSERT OR REPLACE INTO kv (key, value, updated_at) VALUES (?, ?, ?)",
+                    (key, value, time.time())
+                )
+
+    async def acquire_lock(self, name: str, owner: str, ttl: float) -> bool:
+        return await asyncio.to_thread(self._acquire_lock_sync, name, owner, ttl)
+
+    async def release_lock(self, name: str, owner: Optional[str] = None) -> None:
+        await asyncio.to_thread(self._release_lock_sync, name, owner)
+
+    async def is_locked(self, name: str) -> bool:
+        return await asyncio.to_thread(self._is_locked_sync, name)
+
+    async def get_value(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get_value_sync, key)
+
+    async def set_value(self, key: str, value: Optional[str]) -> None:
+        await asyncio.to_thread(self._set_value_sync, key, value)
+
+
+class SharedStateStorage(BaseStorage):
+    """Хранилище FSM aiogram поверх SharedState"""
+
+    def __init__(self, state: SharedState):
+        self._state = state
+
+    @staticmethod
+    def _key(key: StorageKey, part: str) -> str:
+        return (
+            f"fsm:{key.bot_id}:{key.chat_id}:{key.user_id}:"
+            f"{key.thread_id}:{key.business_connection_id}:{key.destiny}:{part}"
+        )
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        if isinstance(state, State):
+            state = state.state
+        await self._state.set_value(self._key(key, "state"), state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await self._state.get_value(self._key(key, "state"))
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        value = json.dumps(dict(data), ensure_ascii=False) if data else None
+        await self._state.set_value(self._key(key, "data"), value)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        value = await self._state.get_value(self._key(key, "data"))
+        return json.loads(value) if value else {}
+
+    async def close(self) -> None:
+        await self._state.close()
+
+
+def create_shared_state() -> SharedState:
+    """Создаёт общее состояние по настройке SHARED_STATE_BACKEND"""
+    if SHARED_STATE_BACKEND == "sqlite":
+        return SQLiteSharedState(SHARED_STATE_PATH)
+    return MemorySharedState()
+
+
+def create_fsm_storage(state: SharedState) -> BaseStorage:
+    """Хранилище FSM: в памяти для одного процесса, иначе общее"""
+    if isinstance(state, MemorySharedState):
+        return MemoryStorage()
+    return SharedStateStorage(state)
+
+
+# Глобальный экземпляр общего состояния
+shared_state = create_shared_state()
@@ -0,0 +1,78 @@
+"""
+Сжатие файлов снимков
+
+Файлы шардов домашек можно писать сжатыми gzip или zstd (переменные
+SNAPSHOT_COMPRESSION и SNAPSHOT_COMPRESSION_LEVEL). Сжатие и распаковка
+потоковые: JSON пишется в сжимающий поток по частям, а читается частями
+из распаковывающего. Формат при чтении определяется по сигнатуре файла,
+поэтому несжатые и сжатые файлы читаются одинаково.
+
+zstd — модуль compression.zstd стандартной библиотеки (Python 3.14).
+Модуль не зависит от настроек бота: его используют и скрипты выгрузки.
+"""
+import gzip
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+# Кодек: расширение файла
+CODECS = {
+    "none": "",
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+# Уровни по умолчанию: gzip.open по умолчанию жмёт на 9, это медленно
+DEFAULT_LEVELS = {
+    "gzip": 6,
+    "zstd": 3,
+}
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _zstd():
+    from compression import zstd
+    return zstd
+
+
+def check_codec(codec: str):
+    """
+    Raises:
+        ValueError: неизвестный кодек или zstd недоступен в этом Python
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Неизвестное сжатие снимков: {codec} (ожидается {', '.join(CODECS)})")
+    if codec == "zstd":
+        try:
+            _zstd()
+        except ImportError:
+            raise ValueError("Сжатие zstd требует Python 3.14+ (модуль compression.zstd)")
+
+
+def parse_level(value: Optional[str]) -> Optional[int]:
+    """Уровень сжатия из переменной окружения; пустое значение — уровень кодека по умолчанию"""
+    return int(value) if value else None
+
+
+def open_read(path: Path) -> BinaryIO:
+    """Открывает файл снимка на чтение, распаковывая gzip и zstd на лету"""
+    with open(path, "rb") as f:
+        magic = f.read(len(ZSTD_MAGIC))
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(path, "rb")
+    if magic == ZSTD_MAGIC:
+        return _zstd().open(path, "rb")
+    return open(path, "rb")
+
+
+def open_write(path: Path, codec: str = "none", level: Optional[int] = None) -> BinaryIO:
+    """Открывает файл на запись со сжатием codec"""
+    if codec == "none":
+        return open(path, "wb")
+    level = DEFAULT_LEVELS[codec] if level is None else level
+    if codec == "gzip":
+        return gzip.open(path, "wb", compresslevel=level)
+    if codec == "zstd":
+        return _zstd().open(path, "wb", level=level)
+    raise ValueError(f"Неизвестное сжатие снимков: {codec}")
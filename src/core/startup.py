@@ -0,0 +1,103 @@
+"""
+Прогрев бота при запуске
+Загружает снимки данных, строит индексы и готовит статические клавиатуры
+до того, как бот начнёт отвечать пользователям
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from src.keyboards.admin_menu import get_admin_menu
+from src.keyboards.main_menu import get_main_menu
+from src.services.audience_service import get_audience_index
+from src.services.auth_service import get_user_index
+from src.services.data_loader import data_store, DATA_FILES
+
+logger = logging.getLogger(__name__)
+
+
+class ReadinessGate:
+    """
+    Флаг готовности бота
+
+    Пока прогрев не завершён, ReadinessMiddleware ждёт его не дольше
+    WAIT_TIMEOUT секунд, а затем отвечает "бот запускается"
+    """
+
+    WAIT_TIMEOUT = 5.0
+
+    def __init__(self):
+        self._event = asyncio.Event()
+        self.phases: dict[str, float] = {}
+
+    @property
+    def is_ready(self) -> bool:
+        return self._event.is_set()
+
+    def mark_ready(self):
+        self._event.set()
+
+    async def wait(self, timeout: float | None = None) -> bool:
+        """Ждёт завершения прогрева; возвращает готовность бота"""
+        if self._event.is_set():
+            return True
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+async def _load_snapshots():
+    await data_store.refresh(list(DATA_FILES))
+
+
+async def _build_indexes():
+    get_audience_index()
+    get_user_index()
+
+
+async def _prerender_keyboards():
+    for has_clans in (False, True):
+        for is_admin in (False, True):
+            get_main_menu(has_clans=has_clans, is_admin=is_admin)
+    get_admin_menu()
+
+
+WARM_UP_PHASES: tuple[tuple[str, Callable[[], Awaitable[None]]], ...] = (
+    ("load_snapshots", _load_snapshots),
+    ("build_indexes", _build_indexes),
+    ("prerender_keyboards", _prerender_keyboards),
+)
+
+
+async def warm_up(gate: ReadinessGate | None = None) -> dict[str, float]:
+    """
+    Выполняет фазы прогрева и логирует время каждой
+
+    Ошибка фазы не мешает запуску: данные догрузятся лениво при первом
+    обращении. Флаг готовности выставляется в любом случае.
+
+    Returns:
+        словарь {фаза: длительность в секундах}
+    """
+    gate = gate or readiness
+    total_start = time.perf_counter()
+
+    for name, phase in WARM_UP_PHASES:
+        start = time.perf_counter()
+        try:
+            await phase()
+        except Exception:
+            logger.exception(f"Фаза прогрева {name} завершилась ошибкой")
+        gate.phases[name] = time.perf_counter() - start
+        logger.info(f"Прогрев: {name} за {gate.phases[name] * 1000:.1f} мс")
+
+    gate.mark_ready()
+    logger.info(f"Бот прогрет за {(time.perf_counter() - total_start) * 1000:.1f} мс")
+    return dict(gate.phases)
+
+
+# Глобальный флаг готовности
+readiness = ReadinessGate()
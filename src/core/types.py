@@ -1,4 +1,18 @@
-from typing import TypedDict, Literal, Any
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, TypedDict, Literal, Any, Optional
+
+from src.utils.datetime import parse_delivery_date
+
+
+class ClanDict(TypedDict):
+    id: int
+    name: str
+    slogan: str
+    target: int | None
+    class_: int   # class — зарезервированное слово, поэтому class_
+    max_students_count: int
 
 
 class MentorDict(TypedDict):
@@ -21,15 +35,6 @@ class AdminDict(TypedDict):
     clans_mentor: list[ClanDict]
 
 
-class ClanDict(TypedDict):
-    id: int
-    name: str
-    slogan: str
-    target: int | None
-    class_: int   # class — зарезервированное слово, поэтому class_
-    max_students_count: int
-
-
 class HomeworkDict(TypedDict):
     id: int
     delivery_date: str
@@ -39,4 +44,118 @@ class HomeworkDict(TypedDict):
     homework: dict
 
 
-HomeworkStatus = Literal["overdue", "expiring_soon", "in_time", None]
\ No newline at end of file
+def _intern(value: Any) -> str:
+    return sys.intern(str(value).strip()) if value else ""
+
+
+class HomeworkRecord:
+    """
+    Домашка в памяти бота: только поля HomeworkDict, которые читают сервисы
+
+    Вместо ответа API с вложенными user и homework хранит плоские слоты.
+    Повторяющиеся строки (статус, имена, темы и типы заданий) интернируются,
+    поэтому у всех записей они ссылаются на один объект. Дата сдачи
+    разбирается один раз при загрузке.
+    """
+
+    __slots__ = ("id", "clan_id", "delivery", "status", "first_name", "last_name", "topic", "type_name")
+
+    def __init__(
+        self,
+        id: int,
+        clan_id: int,
+        delivery: datetime,
+        status: str,
+        first_name: str,
+        last_name: str,
+        topic: Optional[str],
+        type_name: str
+    ):
+        self.id = id
+        self.clan_id = clan_id
+        self.delivery = delivery
+        self.status = status
+        self.first_name = first_name
+        self.last_name = last_name
+        self.topic = topic
+        self.type_name = type_name
+
+    @classmethod
+    def from_stored(cls, item: dict) -> "HomeworkRecord":
+        """Запись из homeworks.json текущей схемы (см. homework_schema)"""
+        topic = item.get("topic")
+        return cls(
+            id=item["id"],
+            clan_id=item["clan_id"],
+            delivery=parse_delivery_date(item["delivery_date"]),
+            status=_intern(item["status"]),
+            first_name=_intern(item.get("first_name")),
+            last_name=_intern(item.get("last_name")),
+            topic=_intern(topic) if topic else None,
+            type_name=_intern(item.get("type_name")),
+        )
+
+    @classmethod
+    def from_api(cls, hw: HomeworkDict) -> "HomeworkRecord":
+        """Запись из домашки в формате API (схема 1: с добавленным clan_id)"""
+        user = hw.get("user") or {}
+        homework = hw.get("homework") or {}
+        lesson = homework.get("lesson") or {}
+        homework_type = homework.get("type") or {}
+        topic = lesson.get("topic")
+        return cls(
+            id=hw["id"],
+            clan_id=hw["clan_id"],
+            delivery=parse_delivery_date(hw["delivery_date"]),
+            status=_intern(hw.get("status")),
+            first_name=_intern(user.get("first_name")),
+            last_name=_intern(user.get("last_name")),
+            topic=_intern(topic) if topic is not None else None,
+            type_name=_intern(homework_type.get("name")),
+        )
+
+    @property
+    def delivery_date(self) -> str:
+        """Дата сдачи в формате API: 2025-09-21T22:02:06.000000Z"""
+        return f"{self.delivery:%Y-%m-%dT%H:%M:%S.%f}Z"
+
+    @property
+    def student(self) -> str:
+        return f"{self.first_name} {self.last_name}".strip() or "??"
+
+    @property
+    def task_name(self) -> str:
+        """Тема урока, а если её нет — название типа задания"""
+        return self.topic or self.type_name
+
+    def to_stored(self) -> dict:
+        """Запись для homeworks.json текущей схемы"""
+        return {
+            "id": self.id,
+            "clan_id": self.clan_id,
+            "delivery_date": self.delivery_date,
+            "status": self.status,
+            "first_name": self.first_name,
+            "last_name": self.last_name,
+            "topic": self.topic,
+            "type_name": self.type_name,
+        }
+
+    def __repr__(self) -> str:
+        return f"HomeworkRecord(id={self.id}, clan_id={self.clan_id}, delivery_date={self.delivery_date!r})"
+
+
+HomeworkStatus = Literal["overdue", "expiring_soon", "in_time", None]
+
+@dataclass(frozen=True)
+class JobProgress:
+    """Ход задачи обновления: done из total единиц unit, загружено items записей"""
+    done: int = 0
+    total: int = 0
+    unit: str = ""
+    items: int = 0
+    failed: int = 0
+    current: str = ""
+
+
+ProgressCallback = Callable[[JobProgress], None]
@@ -3,26 +3,37 @@
 """
 import asyncio
 import logging
-from pathlib import Path
+from datetime import datetime
 from aiogram import Router, F
-from aiogram.types import Message
-from aiogram.filters import StateFilter
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message, CallbackQuery, BufferedInputFile
+from aiogram.filters import StateFilter, Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
-from src.handlers.base import check_authorization
-from src.services.auth_service import is_admin, get_user_clan_ids, get_mentors
+from src.core.models import UserContext
+from src.services.audience_service import AudienceSegment, get_recipients
+from src.services.notification_service import broadcast, get_new_submission_notifications, send_messages
 from src.services.admin_service import create_admin
-from src.keyboards.admin_menu import get_admin_menu
+from src.services.runtime_stats import render_runtime_stats
+from src.services.homework_updater import refresh_all_homeworks
+from src.services.mentor_updater import refresh_mentors
+from src.services.refresh_jobs import RefreshJob, refresh_jobs
+from src.keyboards.admin_menu import JobCallback, get_admin_menu, get_job_keyboard
 from src.keyboards.main_menu import get_main_menu
-from src.config.settings import BASE_DIR
 from src.core.maintenance import maintenance_manager
+from src.utils.profiling import profiler, ProfilerBusyError, is_idle, to_collapsed, top_functions
+from src.utils.telegram import escape_html
+from src.utils.refresh_trace import new_trace_path
 
 router = Router(name="admin")
 logger = logging.getLogger(__name__)
 
-# Блокировка для предотвращения одновременных обновлений
-_update_lock = set()
+# Длительность профилирования по команде /profile, секунд
+PROFILE_DEFAULT_SECONDS = 10
+PROFILE_MAX_SECONDS = 60
+# Ссылки на фоновые задачи профилирования, чтобы их не собрал GC
+profiler_tasks: set[asyncio.Task] = set()
 
 
 class AdminCreationStates(StatesGroup):
@@ -35,11 +46,9 @@ class AdminCreationStates(StatesGroup):
     waiting_for_confirmation = State()
 
 
-async def check_admin_rights(message: Message) -> bool:
+async def check_admin_rights(message: Message, user_ctx: UserContext) -> bool:
     """Проверяет, является ли пользователь администратором"""
-    username = message.from_user.username
-    
-    if not is_admin(username):
+    if not user_ctx.is_admin:
         await message.answer(
             "❌ У вас нет прав администратора.\n"
             "Эта функция доступна только администраторам."
@@ -48,50 +57,38 @@ async def check_admin_rights(message: Message) -> bool:
     return True
 
 
-async def notify_all_users(bot, message: str):
+async def notify_all_users(
+    bot,
+    message: str,
+    segment: AudienceSegment = "all",
+    clan_ids: list[int] | None = None
+):
     """
-    Отправляет уведомление всем пользователям бота
+    Отправляет уведомление пользователям бота
     
     Args:
         bot: экземпляр бота
         message: текст уведомления
+        segment: сегмент аудитории ("all", "admins", "mentors" или "clans")
+        clan_ids: кланы для сегмента "clans"
     """
-    mentors = get_mentors()
-    
-    sent_count = 0
-    failed_count = 0
+    recipients = get_recipients(segment, clan_ids)
     
-    for mentor in mentors:
-        telegram_id = mentor.get("telegram_id")
-        if not telegram_id:
-            continue
-        
-        try:
-            await bot.send_message(telegram_id, message)
-            sent_count += 1
-            # Небольшая задержка, чтобы не превысить лимиты Telegram
-            await asyncio.sleep(0.05)
-        except Exception as e:
-            failed_count += 1
-            logger.error(f"Не удалось отправить уведомление {telegram_id}: {e}")
+    sent_count, failed_count = await broadcast(bot, recipients, message)
     
     logger.info(
-        f"Уведомления отправлены: успешно={sent_count}, ошибок={failed_count}"
+        f"Уведомления отправлены ({segment}): успешно={sent_count}, ошибок={failed_count}"
     )
     
     return sent_count, failed_count
 
 
 @router.message(F.text == "🔧 Админ-панель")
-async def show_admin_panel(message: Message):
+async def show_admin_panel(message: Message, user_ctx: UserContext):
     """Показывает админ-панель"""
     
-    # Проверка авторизации
-    if not await check_authorization(message):
-        return
-    
     # Проверка прав администратора
-    if not await check_admin_rights(message):
+    if not await check_admin_rights(message, user_ctx):
         return
     
     await message.answer(
@@ -102,272 +99,314 @@ async def show_admin_panel(message: Message):
 
 
 @router.message(F.text == "◀️ Назад в главное меню")
-async def back_to_main_menu(message: Message, state: FSMContext):
+async def back_to_main_menu(message: Message, state: FSMContext, user_ctx: UserContext):
     """Возврат в главное меню"""
     
     # Очищаем состояние, если оно было активно
     await state.clear()
     
-    username = message.from_user.username
-    clan_ids = get_user_clan_ids(username)
-    has_clans = len(clan_ids) > 0
-    is_user_admin = is_admin(username)
-    
     await message.answer(
         "Главное меню",
-        reply_markup=get_main_menu(has_clans=has_clans, is_admin=is_user_admin)
+        reply_markup=get_main_menu(has_clans=user_ctx.has_clans, is_admin=user_ctx.is_admin)
     )
 
 
-async def run_script_async(
-    script_name: str, 
-    chat_id: int, 
-    bot,
-    operation_type: str,
-    estimated_minutes: int
-):
-    """
-    Запускает скрипт асинхронно с блокировкой бота
-    
-    Args:
-        script_name: имя скрипта для запуска
-        chat_id: ID чата для уведомлений
-        bot: экземпляр бота
-        operation_type: тип операции ("homeworks" или "mentors")
-        estimated_minutes: примерная длительность в минутах
-    """
-    script_path = BASE_DIR / "scripts" / script_name
-    
-    logger.info(f"Запуск скрипта: {script_path}")
-    
-    try:
-        # Включаем режим обслуживания
-        maintenance_started = await maintenance_manager.start_maintenance(
-            operation=operation_type,
-            estimated_duration=estimated_minutes
+def _format_elapsed(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+def render_job_status(job: RefreshJob) -> str:
+    """Текст сообщения о ходе задачи обновления"""
+    progress = job.progress
+    lines = [f"🔄 <b>{job.title}</b>", ""]
+    if progress.total:
+        percent = progress.done * 100 // progress.total
+        lines.append(f"Готово: {progress.done} из {progress.total} {progress.unit} ({percent}%)")
+    else:
+        lines.append("Запуск...")
+    if progress.items:
+        lines.append(f"Загружено записей: {progress.items:,}")
+    if progress.failed:
+        lines.append(f"Не загружено: {progress.failed}")
+    if progress.current:
+        lines.append(f"Последний: {escape_html(progress.current)}")
+    lines.append(f"Прошло: {_format_elapsed(job.elapsed)}")
+    return "\n".join(lines)
+
+
+def render_job_result(job: RefreshJob, result: dict | None, error: BaseException | None) -> str:
+    """Итог задачи обновления"""
+    elapsed = _format_elapsed(job.elapsed)
+    if job.cancelled:
+        text = f"⏹ <b>{job.title}: остановлено</b> через {elapsed}"
+        if job.name == "homeworks":
+            text += f"\n\nУже загруженные кланы обновлены ({job.progress.done} из {job.progress.total})."
+        else:
+            text += "\n\nДанные не изменились."
+        return text
+
+    if error is not None or result is None or not result.get("success"):
+        reason = str(error) if error is not None else (result or {}).get("error") or "Неизвестная ошибка"
+        return (
+            f"❌ <b>{job.title}: ошибка</b>\n\n"
+            f"<code>{escape_html(reason[-500:])}</code>"
         )
-        
-        if not maintenance_started:
-            await bot.send_message(
-                chat_id,
-                "⚠️ Не удалось включить режим обслуживания. "
-                "Возможно, другое обновление уже выполняется."
+
+    if job.name == "homeworks":
+        failed = result["failed_clans"]
+        return (
+            f"✅ <b>База домашек обновлена</b> за {elapsed}\n\n"
+            f"• Кланов: {result['updated_clans']}\n"
+            f"• Домашек на проверке: {result['total_homeworks']:,}\n"
+            + (f"• Новых на проверку: {result['added']}\n" if result["added"] else "")
+            + (f"• Проверено с прошлой выгрузки: {result['removed']}\n" if result["removed"] else "")
+            + (f"• Отброшено некорректных: {result['rejected']}\n" if result["rejected"] else "")
+            + (
+                f"• Не загружены (остались прошлые данные): {', '.join(map(str, failed[:20]))}"
+                + ("…" if len(failed) > 20 else "") + "\n"
+                if failed else ""
             )
-            return
-        
-        # Получаем сообщение для пользователей
-        maintenance_msg = await maintenance_manager.get_maintenance_message()
-        
-        # Отправляем уведомление всем пользователям
-        sent, failed = await notify_all_users(bot, maintenance_msg)
-        
-        await bot.send_message(
-            chat_id,
-            f"📢 Уведомления отправлены:\n"
-            f"✅ Успешно: {sent}\n"
-            f"❌ Ошибок: {failed}\n\n"
-            f"🔧 Режим обслуживания активирован\n"
-            f"Запуск скрипта..."
         )
-        
-        # Запускаем скрипт
-        process = await asyncio.create_subprocess_exec(
-            "python3",
-            str(script_path),
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=str(BASE_DIR)
+
+    return (
+        f"✅ <b>База наставников обновлена</b> за {elapsed}\n\n"
+        f"• Наставников в API: {result['total_mentors']}\n"
+        f"• Сохранено (есть Telegram и кланы): {result['saved_mentors']}"
+    )
+
+
+async def start_refresh_job(message: Message, name: str, title: str, run, after=None) -> RefreshJob | None:
+    """
+    Запускает задачу обновления в фоне
+
+    Ход задачи показывается правкой одного сообщения с кнопкой остановки,
+    итог приходит отдельным сообщением. after — корутина без аргументов,
+    которая выполняется после итога, в том числе при ошибке и отмене
+
+    Returns:
+        задача или None, если такое обновление уже выполняется
+    """
+    if await refresh_jobs.is_running(name):
+        await message.answer(
+            "⏳ Обновление уже выполняется.\n"
+            "Пожалуйста, дождитесь завершения предыдущего обновления."
+        )
+        return None
+
+    status_msg = await message.answer(f"🔄 <b>{title}</b>\n\nЗапуск...", reply_markup=get_job_keyboard(name))
+
+    async def on_progress(job: RefreshJob):
+        try:
+            await status_msg.edit_text(render_job_status(job), reply_markup=get_job_keyboard(name))
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                raise
+
+    async def on_done(job: RefreshJob, result, error):
+        text = render_job_result(job, result, error)
+        try:
+            await status_msg.edit_text(text)
+        except TelegramBadRequest:
+            pass
+        # Правка сообщения не приходит уведомлением, итог — отдельным сообщением
+        await message.answer(text)
+        if after is not None:
+            await after()
+
+    job = await refresh_jobs.start(name, title, run, on_progress, on_done)
+    if job is None:
+        await status_msg.edit_text(
+            "⏳ Обновление уже выполняется.\n"
+            "Пожалуйста, дождитесь завершения предыдущего обновления."
         )
-        
-        # Ожидаем завершения
-        stdout, stderr = await process.communicate()
-        
-        # Декодируем вывод
-        stdout_text = stdout.decode('utf-8') if stdout else ""
-        stderr_text = stderr.decode('utf-8') if stderr else ""
-        
-        # Логируем результаты
-        logger.info(f"Скрипт {script_name} завершен с кодом: {process.returncode}")
-        if stdout_text:
-            logger.info(f"STDOUT:\n{stdout_text}")
-        if stderr_text:
-            logger.error(f"STDERR:\n{stderr_text}")
-        
-        # Отключаем режим обслуживания
-        await maintenance_manager.stop_maintenance()
-        
-        # Отправляем уведомление пользователю
-        if process.returncode == 0:
-            # Определяем тип обновления для сообщения
-            if "mentors" in script_name.lower():
-                success_msg = "✅ База наставников обновлена"
-            elif "homework" in script_name.lower():
-                success_msg = "✅ База домашек обновлена"
-            else:
-                success_msg = "✅ Обновление завершено"
-            
-            await bot.send_message(
-                chat_id,
-                success_msg
-            )
-            
-            # Уведомляем всех пользователей о завершении
-            completion_msg = (
-                "✅ <b>Обновление завершено</b>\n\n"
-                "Бот снова доступен для работы.\n"
-                "Все данные обновлены."
-            )
-            await notify_all_users(bot, completion_msg)
-        else:
-            error_msg = stderr_text[-500:] if stderr_text else "Неизвестная ошибка"
-            await bot.send_message(
-                chat_id,
-                f"❌ <b>Ошибка выполнения скрипта</b>\n\n"
-                f"📄 <code>{script_name}</code>\n"
-                f"Код возврата: {process.returncode}\n\n"
-                f"Ошибка:\n<code>{error_msg}</code>\n\n"
-                f"🟢 Режим обслуживания отключен"
-            )
-    
-    except Exception as e:
-        logger.error(f"Ошибка при запуске скрипта {script_name}: {e}", exc_info=True)
-        
-        # В случае ошибки обязательно отключаем режим обслуживания
+    return job
+
+
+async def refresh_mentors_in_maintenance(bot, progress) -> dict:
+    """
+    Обновление базы наставников в режиме обслуживания
+
+    База наставников определяет, кто может пользоваться ботом, поэтому на
+    время обновления бот блокируется, а пользователи получают уведомления
+    о начале и конце. Режим снимается и при ошибке, и при отмене
+    """
+    if not await maintenance_manager.start_maintenance(operation="mentors", estimated_duration=10):
+        return {
+            "success": False,
+            "error": "Не удалось включить режим обслуживания. Возможно, другое обновление уже выполняется."
+        }
+
+    try:
+        await notify_all_users(bot, maintenance_manager.maintenance_message)
+        result = await refresh_mentors(progress)
+    finally:
         await maintenance_manager.stop_maintenance()
-        
-        await bot.send_message(
-            chat_id,
-            f"❌ <b>Критическая ошибка</b>\n\n"
-            f"Не удалось запустить скрипт <code>{script_name}</code>\n\n"
-            f"Ошибка: {str(e)}\n\n"
-            f"🟢 Режим обслуживания отключен"
+
+    if result["success"]:
+        await notify_all_users(
+            bot,
+            "✅ <b>Обновление завершено</b>\n\n"
+            "Бот снова доступен для работы.\n"
+            "Все данные обновлены."
         )
-    
-    finally:
-        # Снимаем блокировку
-        _update_lock.discard(chat_id)
+    return result
 
 
 @router.message(F.text == "👤 Обновить базу наставников")
-async def update_mentors(message: Message):
+async def update_mentors(message: Message, user_ctx: UserContext):
     """Обновляет всю базу наставников"""
     
-    # Проверка авторизации
-    if not await check_authorization(message):
-        return
-    
     # Проверка прав администратора
-    if not await check_admin_rights(message):
-        return
-    
-    chat_id = message.chat.id
-    
-    # Проверка блокировки
-    if chat_id in _update_lock:
-        await message.answer(
-            "⏳ Обновление уже выполняется.\n"
-            "Пожалуйста, дождитесь завершения предыдущего обновления."
-        )
+    if not await check_admin_rights(message, user_ctx):
         return
     
     # Проверяем, не активен ли уже режим обслуживания
-    if await maintenance_manager.is_maintenance_active():
+    if maintenance_manager.is_active:
         await message.answer(
             "⚠️ Бот уже находится в режиме обслуживания.\n"
             "Дождитесь завершения текущего обновления."
         )
         return
     
-    # Добавляем блокировку
-    _update_lock.add(chat_id)
-    
-    # Информируем о начале обновления
-    await message.answer(
-        "🔄 <b>Запуск обновления базы наставников...</b>\n\n"
-        "⏳ Процесс запущен в фоновом режиме.\n"
-        "⚠️ <b>БОТ БУДЕТ ЗАБЛОКИРОВАН на время обновления</b>\n\n"
-        "Примерное время: ~5-10 минут\n"
-        "Все пользователи получат уведомление."
+    job = await start_refresh_job(
+        message, "mentors", "Обновление базы наставников",
+        lambda progress: refresh_mentors_in_maintenance(message.bot, progress)
     )
-    
-    # Запускаем скрипт асинхронно с блокировкой бота
-    asyncio.create_task(
-        run_script_async(
-            script_name="mentors.py",
-            chat_id=chat_id,
-            bot=message.bot,
-            operation_type="mentors",
-            estimated_minutes=10
+    if job is not None:
+        await message.answer(
+            "⚠️ <b>БОТ БУДЕТ ЗАБЛОКИРОВАН на время обновления</b>\n\n"
+            "Примерное время: ~5-10 минут\n"
+            "Все пользователи получат уведомление."
         )
-    )
 
 
 @router.message(F.text == "📚 Обновить базу домашек")
-async def update_all_homeworks_handler(message: Message):
+async def update_all_homeworks_handler(message: Message, user_ctx: UserContext):
     """Обновляет всю базу домашних заданий"""
     
-    # Проверка авторизации
-    if not await check_authorization(message):
-        return
-    
     # Проверка прав администратора
-    if not await check_admin_rights(message):
-        return
-    
-    chat_id = message.chat.id
-    
-    # Проверка блокировки
-    if chat_id in _update_lock:
-        await message.answer(
-            "⏳ Обновление уже выполняется.\n"
-            "Пожалуйста, дождитесь завершения предыдущего обновления."
-        )
+    if not await check_admin_rights(message, user_ctx):
         return
     
     # Проверяем, не активен ли уже режим обслуживания
-    if await maintenance_manager.is_maintenance_active():
+    if maintenance_manager.is_active:
         await message.answer(
             "⚠️ Бот уже находится в режиме обслуживания.\n"
             "Дождитесь завершения текущего обновления."
         )
         return
     
-    # Добавляем блокировку
-    _update_lock.add(chat_id)
-    
-    # Информируем о начале обновления
-    await message.answer(
-        "🔄 <b>Запуск обновления базы домашних заданий...</b>\n\n"
-        "⏳ Процесс запущен в фоновом режиме.\n"
-        "⚠️ <b>БОТ БУДЕТ ЗАБЛОКИРОВАН на время обновления</b>\n\n"
-        "Примерное время: ~30-60 минут\n"
-        "Все пользователи получат уведомление."
+    # Изменения опубликованных кланов; собираются и при отмене выгрузки
+    diffs = []
+
+    async def notify_mentors():
+        notifications = get_new_submission_notifications(diffs)
+        if notifications:
+            await send_messages(message.bot, notifications)
+
+    # Кланы публикуются по мере загрузки, первыми — самые срочные
+    await start_refresh_job(
+        message, "homeworks", "Обновление базы домашек",
+        lambda progress: refresh_all_homeworks(progress, new_trace_path("homeworks"), diffs.append),
+        after=notify_mentors
     )
-    
-    # Запускаем скрипт асинхронно с блокировкой бота
-    asyncio.create_task(
-        run_script_async(
-            script_name="homeworks.py",
-            chat_id=chat_id,
-            bot=message.bot,
-            operation_type="homeworks",
-            estimated_minutes=60
+
+
+@router.callback_query(JobCallback.filter(F.action == "cancel"))
+async def cancel_refresh_job(callback: CallbackQuery, callback_data: JobCallback, user_ctx: UserContext):
+    """Останавливает задачу обновления по кнопке под сообщением о ходе"""
+    if not user_ctx.is_admin:
+        await callback.answer("❌ Доступно только администраторам", show_alert=True)
+        return
+
+    if await refresh_jobs.cancel(callback_data.name):
+        await callback.answer("⏹ Останавливаю обновление...")
+    else:
+        await callback.answer("Обновление уже завершено")
+
+
+# ========== Статистика и профилирование ==========
+
+@router.message(Command("stats"))
+@router.message(F.text == "📊 Статистика бота")
+async def show_runtime_stats(message: Message, user_ctx: UserContext):
+    """Сводка состояния бота: снимки, кэши, обновления кланов, задержки, память"""
+
+    # Проверка прав администратора
+    if not await check_admin_rights(message, user_ctx):
+        return
+
+    await message.answer(render_runtime_stats())
+
+
+async def run_profiler_async(bot, chat_id: int, seconds: int):
+    """Профилирует процесс бота и отправляет collapsed stacks документом"""
+    try:
+        stacks = await profiler.profile(seconds)
+    except ProfilerBusyError:
+        await bot.send_message(chat_id, "⏳ Профилирование уже выполняется, дождитесь результата.")
+        return
+    except Exception as e:
+        logger.error(f"Ошибка профилирования: {e}")
+        await bot.send_message(chat_id, f"❌ Ошибка профилирования: {escape_html(str(e))}")
+        return
+
+    total = sum(stacks.values())
+    busy = sum(count for stack, count in stacks.items() if not is_idle(stack))
+    top = "\n".join(
+        f"• {escape_html(name)} — {count * 100 / total:.1f}%"
+        for name, count in top_functions(stacks)
+    )
+
+    filename = f"profile_{datetime.now():%Y%m%d_%H%M%S}.folded"
+    await bot.send_document(
+        chat_id,
+        BufferedInputFile(to_collapsed(stacks).encode("utf-8"), filename=filename),
+        caption=(
+            f"📈 <b>Профиль за {seconds} с</b>\n"
+            f"Выборок: {total}, event loop занят: {busy * 100 / max(total, 1):.1f}%\n\n"
+            + (f"Чаще всего на вершине стека:\n{top}\n\n" if top else "")
+            + "Формат collapsed stacks: flamegraph.pl или speedscope.app"
         )
     )
 
 
+@router.message(Command("profile"))
+async def profile_bot(message: Message, command: CommandObject, user_ctx: UserContext):
+    """Запускает выборочный профилировщик на N секунд: /profile [N]"""
+
+    # Проверка прав администратора
+    if not await check_admin_rights(message, user_ctx):
+        return
+
+    seconds = PROFILE_DEFAULT_SECONDS
+    if command.args:
+        if not command.args.strip().isdigit():
+            await message.answer(f"Использование: /profile [секунды, 1–{PROFILE_MAX_SECONDS}]")
+            return
+        seconds = min(max(int(command.args.strip()), 1), PROFILE_MAX_SECONDS)
+
+    if profiler.is_running:
+        await message.answer("⏳ Профилирование уже выполняется, дождитесь результата.")
+        return
+
+    await message.answer(f"📈 Профилирование запущено на {seconds} с...")
+
+    # Профилирование идёт в фоне, чтобы не держать обработку обновления
+    task = asyncio.create_task(run_profiler_async(message.bot, message.chat.id, seconds))
+    profiler_tasks.add(task)
+    task.add_done_callback(profiler_tasks.discard)
+
+
 # ========== FSM для создания администратора ==========
 
 @router.message(F.text == "➕ Создать администратора")
-async def start_create_admin(message: Message, state: FSMContext):
+async def start_create_admin(message: Message, state: FSMContext, user_ctx: UserContext):
     """Начинает процесс создания администратора"""
     
-    # Проверка авторизации
-    if not await check_authorization(message):
-        return
-    
     # Проверка прав администратора
-    if not await check_admin_rights(message):
+    if not await check_admin_rights(message, user_ctx):
         return
     
     await state.set_state(AdminCreationStates.waiting_for_first_name)
@@ -543,7 +582,7 @@ async def process_confirmation(message: Message, state: FSMContext):
     admin_data = data["admin_data"]
     
     # Создаем администратора
-    result = create_admin(admin_data)
+    result = await create_admin(admin_data)
     
     # Очищаем состояние
     await state.clear()
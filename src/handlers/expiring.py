@@ -1,18 +1,44 @@
+import logging
+
 from aiogram import Router, F
-from aiogram.types import Message
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message, CallbackQuery
+
+from src.core.models import UserContext
+from src.keyboards.pagination import PageCallback, get_pagination_keyboard
+from src.services.homework_service import get_expiring_page
 
-from src.handlers.base import check_authorization
-from src.services.homework_service import get_expiring_homeworks_text
-from src.utils.telegram import send_split_message   # ← добавь этот импорт
+logger = logging.getLogger(__name__)
 
 router = Router(name="expiring")
 
+EXPIRING_VIEW = "expiring"
+
 
 @router.message(F.text == "⏰ Истекающие домашки")
-async def show_expiring(message: Message):
-    if not await check_authorization(message):
+async def show_expiring(message: Message, user_ctx: UserContext):
+    # Одно сообщение с первой страницей, остальные — правкой по кнопкам
+    text, page, total = get_expiring_page(user_ctx, 0)
+    
+    await message.answer(text, reply_markup=get_pagination_keyboard(EXPIRING_VIEW, page, total))
+
+
+@router.callback_query(PageCallback.filter(F.view == EXPIRING_VIEW))
+async def turn_expiring_page(callback: CallbackQuery, callback_data: PageCallback, user_ctx: UserContext):
+    if not isinstance(callback.message, Message):
+        # Сообщение слишком старое: бот больше не может его изменить
+        await callback.answer("Список устарел, откройте его заново", show_alert=True)
         return
     
-    text = get_expiring_homeworks_text(message.from_user.username)
+    text, page, total = get_expiring_page(user_ctx, callback_data.page)
+    
+    try:
+        await callback.message.edit_text(
+            text, reply_markup=get_pagination_keyboard(EXPIRING_VIEW, page, total)
+        )
+    except TelegramBadRequest as e:
+        # Повторное нажатие на ту же страницу без изменений в списке
+        if "message is not modified" not in str(e):
+            raise
     
-    await send_split_message(message, text)
\ No newline at end of file
+    await callback.answer()
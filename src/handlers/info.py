@@ -3,7 +3,7 @@
 from aiogram import Router, F
 from aiogram.types import Message
 
-from src.handlers.base import check_authorization
+from src.core.models import UserContext
 from src.services.homework_service import get_homeworks_info
 from src.utils.telegram import send_split_message      # ← новый импорт!
 
@@ -11,11 +11,8 @@ router = Router(name="info")
 
 
 @router.message(F.text == "📚 Информация по домашкам")
-async def show_homeworks_info(message: Message):
-    if not await check_authorization(message):
-        return
-    
-    total, status = get_homeworks_info(message.from_user.username)
+async def show_homeworks_info(message: Message, user_ctx: UserContext):
+    total, status = get_homeworks_info(user_ctx)
     
     # Отправляем возможно длинный total с разбиением
     await send_split_message(message, total)
@@ -0,0 +1,51 @@
+from aiogram import Router
+from aiogram.types import InlineQuery, InlineQueryResultArticle, InputTextMessageContent
+
+from src.core.models import UserContext
+from src.core.types import HomeworkRecord
+from src.services.homework_service import classify_homework
+from src.services.search_service import homework_search
+from src.utils.datetime import hours_left_to_deadline, hours_since_delivery, now_utc
+from src.utils.telegram import escape_html
+
+router = Router(name="search")
+
+# Telegram показывает не больше 50 результатов на запрос
+SEARCH_RESULTS_LIMIT = 50
+# Сколько секунд Telegram может отдавать тот же ответ на тот же запрос
+SEARCH_CACHE_SECONDS = 30
+
+
+def describe_deadline(hw: HomeworkRecord, now) -> str:
+    if classify_homework(hw, now) == "overdue":
+        return f"просрочено на ~{int(hours_since_delivery(hw.delivery, now) - 72)} ч"
+    return f"осталось ~{int(hours_left_to_deadline(hw.delivery, now))} ч"
+
+
+def render_search_result(hw: HomeworkRecord, now) -> InlineQueryResultArticle:
+    deadline = describe_deadline(hw, now)
+    return InlineQueryResultArticle(
+        id=str(hw.id),
+        title=f"{hw.student} — {hw.task_name}",
+        description=f"Клан {hw.clan_id}, {deadline}",
+        input_message_content=InputTextMessageContent(
+            message_text=(
+                f"Ученик: {escape_html(hw.student)}\n"
+                f"Задание: {escape_html(hw.task_name)}\n"
+                f"Клан: {hw.clan_id}, {deadline}"
+            )
+        ),
+    )
+
+
+@router.inline_query()
+async def search_homeworks(inline_query: InlineQuery, user_ctx: UserContext):
+    # Наставник ищет только в своих кланах, администратор без кланов — во всех
+    homeworks = homework_search.search(inline_query.query, user_ctx.clan_ids, SEARCH_RESULTS_LIMIT)
+    
+    now = now_utc()
+    await inline_query.answer(
+        [render_search_result(hw, now) for hw in homeworks],
+        cache_time=SEARCH_CACHE_SECONDS,
+        is_personal=True,
+    )
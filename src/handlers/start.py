@@ -2,31 +2,17 @@ from aiogram import Router
 from aiogram.filters import CommandStart
 from aiogram.types import Message
 
+from src.core.models import UserContext
 from src.keyboards.main_menu import get_main_menu
-from src.services.auth_service import is_authorized, get_user_clan_ids, is_admin
 
 router = Router(name="start")
 
 
 @router.message(CommandStart())
-async def cmd_start(message: Message):
-    username = message.from_user.username
-    
-    if is_authorized(username):
-        # Проверяем, есть ли у пользователя кланы
-        clan_ids = get_user_clan_ids(username)
-        has_clans = len(clan_ids) > 0
-        
-        # Проверяем, является ли пользователь администратором
-        is_user_admin = is_admin(username)
-        
-        await message.answer(
-            "Добро пожаловать в помощник проверки ДЗ!\n\n"
-            "Доступные команды:",
-            reply_markup=get_main_menu(has_clans=has_clans, is_admin=is_user_admin)
-        )
-    else:
-        await message.answer(
-            "Доступ запрещён.\n"
-            "Ваш username не найден в списке наставников/админов."
-        )
\ No newline at end of file
+async def cmd_start(message: Message, user_ctx: UserContext):
+    # Неавторизованных пользователей отклоняет UserContextMiddleware
+    await message.answer(
+        "Добро пожаловать в помощник проверки ДЗ!\n\n"
+        "Доступные команды:",
+        reply_markup=get_main_menu(has_clans=user_ctx.has_clans, is_admin=user_ctx.is_admin)
+    )
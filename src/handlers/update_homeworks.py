@@ -5,29 +5,29 @@ from aiogram import Router, F
 from aiogram.types import Message
 from aiogram.enums import ChatAction
 
-from src.handlers.base import check_authorization
-from src.services.auth_service import get_user_clan_ids
+from src.core.models import UserContext
 from src.services.homework_updater import update_homeworks_for_clans
+from src.core.shared_state import lock_owner, shared_state
+from src.services.notification_service import get_new_submission_notifications, send_messages
 
 router = Router(name="update_homeworks")
 
-# Блокировка для предотвращения одновременных обновлений
-_update_lock = set()
+# Блокировка для предотвращения одновременных обновлений (общая для всех процессов бота)
+UPDATE_LOCK_TTL = 60 * 60
+
+
+def _update_lock_name(user_id: int) -> str:
+    return f"update_homeworks:{user_id}"
 
 
 @router.message(F.text == "🔄 Обновить мои домашки")
-async def handle_update_homeworks(message: Message):
+async def handle_update_homeworks(message: Message, user_ctx: UserContext):
     """Обработчик обновления домашних заданий"""
     
-    # Проверка авторизации
-    if not await check_authorization(message):
-        return
-    
-    username = message.from_user.username
     user_id = message.from_user.id
     
-    # Получаем кланы пользователя
-    clan_ids = get_user_clan_ids(username)
+    # Кланы пользователя уже определены в UserContextMiddleware
+    clan_ids = list(user_ctx.clan_ids)
     
     if not clan_ids:
         await message.answer(
@@ -36,17 +36,16 @@ async def handle_update_homeworks(message: Message):
         )
         return
     
-    # Проверка блокировки (пользователь уже обновляет)
-    if user_id in _update_lock:
+    # Проверка и установка блокировки (пользователь уже обновляет)
+    owner = lock_owner()
+    notifications = []
+    if not await shared_state.acquire_lock(_update_lock_name(user_id), owner, UPDATE_LOCK_TTL):
         await message.answer(
             "⏳ Обновление уже выполняется.\n"
             "Пожалуйста, дождитесь завершения предыдущего обновления."
         )
         return
     
-    # Добавляем блокировку
-    _update_lock.add(user_id)
-    
     try:
         # Отправляем индикатор "печатает"
         await message.bot.send_chat_action(message.chat.id, ChatAction.TYPING)
@@ -67,9 +66,15 @@ async def handle_update_homeworks(message: Message):
                 f"✅ Обновление завершено успешно!\n\n"
                 f"📊 Статистика:\n"
                 f"• Обновлено кланов: {result['updated_clans']}\n"
-                f"• Загружено домашек: {result['total_homeworks']}\n\n"
-                f"Данные обновлены и доступны в других разделах бота."
+                f"• Загружено домашек: {result['total_homeworks']}\n"
+                + (f"• Новых на проверку: {result['added']}\n" if result.get("added") else "")
+                + (f"• Проверено с прошлого обновления: {result['removed']}\n" if result.get("removed") else "")
+                + (f"• Отброшено некорректных: {result['rejected']}\n" if result.get("rejected") else "")
+                + "\nДанные обновлены и доступны в других разделах бота."
             )
+            
+            # Остальным наставникам обновлённых кланов — о новых сдачах
+            notifications = get_new_submission_notifications(result["diffs"], exclude=[user_id])
         else:
             await message.answer(
                 f"❌ Ошибка при обновлении:\n\n"
@@ -86,4 +91,9 @@ async def handle_update_homeworks(message: Message):
     
     finally:
         # Снимаем блокировку
-        _update_lock.discard(user_id)
+        await shared_state.release_lock(_update_lock_name(user_id), owner)
+    
+    # Рассылка идёт после снятия блокировки: пачки с паузами не должны
+    # задерживать следующее обновление пользователя
+    if notifications:
+        await send_messages(message.bot, notifications)
@@ -1,9 +1,24 @@
 """
 Клавиатуры для админ-панели
 """
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from functools import lru_cache
 
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    KeyboardButton,
+    ReplyKeyboardMarkup,
+)
 
+
+class JobCallback(CallbackData, prefix="job"):
+    """Кнопка под сообщением о ходе обновления"""
+    action: str
+    name: str
+
+
+@lru_cache(maxsize=None)
 def get_admin_menu() -> ReplyKeyboardMarkup:
     """
     Возвращает меню администратора
@@ -15,7 +30,19 @@ def get_admin_menu() -> ReplyKeyboardMarkup:
         [KeyboardButton(text="👤 Обновить базу наставников")],
         [KeyboardButton(text="📚 Обновить базу домашек")],
         [KeyboardButton(text="➕ Создать администратора")],
+        [KeyboardButton(text="📊 Статистика бота")],
         [KeyboardButton(text="◀️ Назад в главное меню")],
     ]
     
     return ReplyKeyboardMarkup(keyboard=kb, resize_keyboard=True)
+
+
+@lru_cache(maxsize=None)
+def get_job_keyboard(name: str) -> InlineKeyboardMarkup:
+    """Кнопка остановки задачи обновления name"""
+    return InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(
+            text="⏹ Остановить",
+            callback_data=JobCallback(action="cancel", name=name).pack()
+        )
+    ]])
@@ -1,6 +1,9 @@
+from functools import lru_cache
+
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 
 
+@lru_cache(maxsize=None)
 def get_main_menu(has_clans: bool = False, is_admin: bool = False) -> ReplyKeyboardMarkup:
     """
     Возвращает главное меню
@@ -0,0 +1,47 @@
+"""
+Inline-клавиатура для постраничного просмотра списков
+"""
+from functools import lru_cache
+from typing import Optional
+
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+
+class PageCallback(CallbackData, prefix="page"):
+    """Нажатие кнопки листания: какой список и какую страницу показать"""
+    view: str
+    page: int
+
+
+@lru_cache(maxsize=1024)
+def get_pagination_keyboard(view: str, page: int, total: int) -> Optional[InlineKeyboardMarkup]:
+    """
+    Возвращает кнопки ◀️ / номер страницы / ▶️
+    
+    Args:
+        view: имя списка в callback data
+        page: текущая страница, с нуля
+        total: всего страниц
+    
+    Returns:
+        None, если страница одна
+    """
+    if total <= 1:
+        return None
+    
+    row = []
+    if page > 0:
+        row.append(InlineKeyboardButton(
+            text="◀️", callback_data=PageCallback(view=view, page=page - 1).pack()
+        ))
+    # Номер страницы перерисовывает текущую: удобно обновить список
+    row.append(InlineKeyboardButton(
+        text=f"{page + 1}/{total}", callback_data=PageCallback(view=view, page=page).pack()
+    ))
+    if page < total - 1:
+        row.append(InlineKeyboardButton(
+            text="▶️", callback_data=PageCallback(view=view, page=page + 1).pack()
+        ))
+    
+    return InlineKeyboardMarkup(inline_keyboard=[row])
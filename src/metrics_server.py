@@ -0,0 +1,35 @@
+"""
+HTTP-эндпоинт метрик для Prometheus
+"""
+import logging
+from aiohttp import web
+
+from src.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(body=registry.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+
+def create_metrics_app(path: str = "/metrics") -> web.Application:
+    app = web.Application()
+    app.router.add_get(path, metrics_handler)
+    return app
+
+
+async def run_metrics_server(host: str, port: int) -> web.AppRunner:
+    """
+    Запускает отдельный веб-сервер метрик
+
+    Returns:
+        runner для остановки через runner.cleanup()
+    """
+    runner = web.AppRunner(create_metrics_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Метрики доступны на http://{host}:{port}/metrics")
+    return runner
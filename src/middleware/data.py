@@ -0,0 +1,32 @@
+"""
+Middleware загрузки данных
+Перед обработкой обновления дожидается актуальных снимков данных
+"""
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from src.services.data_loader import data_store, DATA_FILES
+from src.utils.profiling import timed
+
+
+class DataMiddleware(BaseMiddleware):
+    """
+    Подгружает снимки данных вне event loop до вызова хендлеров
+
+    Изменения файлов на диске (например, после скриптов обновления)
+    проверяются по mtime не чаще раза в CHECK_INTERVAL секунд, поэтому
+    синхронные сервисы всегда читают уже готовые данные
+    """
+
+    CHECK_INTERVAL = 1.0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        with timed("data_refresh"):
+            await data_store.refresh(list(DATA_FILES), min_interval=self.CHECK_INTERVAL)
+        return await handler(event, data)
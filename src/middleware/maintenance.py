@@ -1,25 +1,36 @@
 """
 Middleware для проверки режима обслуживания
-Блокирует обработку сообщений, когда бот находится в режиме обновления
+Блокирует обработку сообщений, нажатий inline-кнопок и inline-запросов, когда бот находится в режиме обновления
 """
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
-from aiogram.types import Message, TelegramObject
+from aiogram.types import Message, CallbackQuery, InlineQuery, InlineQueryResultsButton, TelegramObject
 import logging
 
 from src.core.maintenance import maintenance_manager
 
 logger = logging.getLogger(__name__)
 
+# Лимит длины текста в ответе на callback query
+CALLBACK_ANSWER_LIMIT = 200
+# Лимит длины текста кнопки над результатами inline-запроса
+INLINE_BUTTON_LIMIT = 64
+
 
 class MaintenanceMiddleware(BaseMiddleware):
     """
     Middleware для блокировки команд во время обслуживания бота
+
+    Статус читается из неизменяемого снимка maintenance_manager.status
+    без await и блокировок
     """
-    
+
     # Команды, которые всегда разрешены (даже в maintenance mode)
-    ALLOWED_COMMANDS = {'/start', '/help'}
-    
+    ALLOWED_COMMANDS = ('/start', '/help')
+    # Кнопки, которые работают и в maintenance mode: остановка задачи
+    # обновления, включившей режим (JobCallback)
+    ALLOWED_CALLBACKS = ('job:',)
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
@@ -27,40 +38,46 @@ class MaintenanceMiddleware(BaseMiddleware):
         data: Dict[str, Any]
     ) -> Any:
         """
-        Проверяет режим обслуживания перед обработкой сообщения
+        Проверяет режим обслуживания перед обработкой события
         """
-        # Проверяем только сообщения
-        if not isinstance(event, Message):
-            return await handler(event, data)
-        
-        message: Message = event
-        
-        # Проверяем режим обслуживания
-        is_maintenance = await maintenance_manager.is_maintenance_active()
-        
-        if not is_maintenance:
+        status = maintenance_manager.status
+
+        if not status.is_active:
             # Режим обслуживания неактивен - продолжаем обработку
             return await handler(event, data)
-        
-        # Режим обслуживания активен
-        # Разрешаем только определенные команды
-        text = message.text or ""
-        
-        # Проверяем, является ли это разрешенной командой
-        if any(text.startswith(cmd) for cmd in self.ALLOWED_COMMANDS):
+
+        maintenance_msg = status.message or "🔧 Бот временно недоступен"
+
+        if isinstance(event, Message):
+            # Разрешаем только определенные команды
+            text = event.text or ""
+            if text.startswith(self.ALLOWED_COMMANDS):
+                return await handler(event, data)
+
+            await event.answer(maintenance_msg)
+        elif isinstance(event, CallbackQuery):
+            if (event.data or "").startswith(self.ALLOWED_CALLBACKS):
+                return await handler(event, data)
+
+            await event.answer(maintenance_msg[:CALLBACK_ANSWER_LIMIT], show_alert=True)
+            text = event.data or ""
+        elif isinstance(event, InlineQuery):
+            # Кнопка над пустым списком результатов открывает чат с ботом (/start разрешён)
+            await event.answer(
+                [], cache_time=0, is_personal=True,
+                button=InlineQueryResultsButton(
+                    text=maintenance_msg[:INLINE_BUTTON_LIMIT], start_parameter="maintenance"
+                )
+            )
+            text = event.query
+        else:
             return await handler(event, data)
-        
-        # Получаем сообщение о блокировке
-        maintenance_msg = await maintenance_manager.get_maintenance_message()
-        
-        # Отправляем сообщение о блокировке
-        await message.answer(maintenance_msg)
-        
-        # НЕ вызываем handler - команда блокируется
+
+        # НЕ вызываем handler - событие блокируется
         logger.info(
-            f"Команда заблокирована (maintenance mode): "
-            f"user={message.from_user.username}, text={text[:50]}"
+            f"Событие заблокировано (maintenance mode): "
+            f"user={event.from_user.username}, text={text[:50]}"
         )
-        
-        # Возвращаем None - команда не обрабатывается
+
+        # Возвращаем None - событие не обрабатывается
         return None
@@ -0,0 +1,38 @@
+"""
+Middleware метрик хендлеров
+Записывает время работы и исключения каждого хендлера
+"""
+import time
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject
+
+from src.core.metrics import HANDLER_DURATION, HANDLER_ERRORS
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Гистограмма bot_handler_duration_seconds по имени хендлера
+
+    Подключается как внутренний middleware, когда хендлер уже выбран
+    фильтрами, поэтому метка — имя функции хендлера
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        handler_object: HandlerObject | None = data.get("handler")
+        name = handler_object.callback.__name__ if handler_object else "unknown"
+
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.labels(name).inc()
+            raise
+        finally:
+            HANDLER_DURATION.labels(name).observe(time.perf_counter() - started)
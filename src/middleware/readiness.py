@@ -0,0 +1,40 @@
+"""
+Middleware готовности бота
+Придерживает обновления, пока не завершён прогрев при запуске
+"""
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from src.core.startup import readiness
+
+STARTING_UP_TEXT = "⏳ Бот запускается, повторите запрос через несколько секунд."
+
+
+class ReadinessMiddleware(BaseMiddleware):
+    """
+    Ждёт завершения прогрева не дольше ReadinessGate.WAIT_TIMEOUT
+
+    Если бот так и не прогрелся, пользователь получает ответ
+    "бот запускается", а обновление не обрабатывается. После прогрева
+    проверка сводится к чтению флага.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        if readiness.is_ready or await readiness.wait(readiness.WAIT_TIMEOUT):
+            return await handler(event, data)
+
+        if isinstance(event, Update):
+            if event.message:
+                await event.message.answer(STARTING_UP_TEXT)
+            elif event.callback_query:
+                await event.callback_query.answer(STARTING_UP_TEXT, show_alert=True)
+            elif event.inline_query:
+                await event.inline_query.answer([], cache_time=0, is_personal=True)
+
+        return None
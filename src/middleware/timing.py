@@ -0,0 +1,52 @@
+"""
+Middleware замера обновлений
+Засекает полное время обработки каждого обновления и логирует медленные
+"""
+import logging
+import time
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from src.config.settings import SLOW_UPDATE_THRESHOLD_MS
+from src.utils.profiling import start_trace, end_trace
+
+logger = logging.getLogger(__name__)
+
+
+class TimingMiddleware(BaseMiddleware):
+    """
+    Замеряет обновление целиком, от внешних middleware до ответа
+
+    Сервисы, обёрнутые в timed(), попадают в трассу обновления. Если
+    обработка дольше threshold, в лог пишется разбивка по этим вызовам.
+    """
+
+    def __init__(self, threshold_ms: float = SLOW_UPDATE_THRESHOLD_MS):
+        self.threshold = threshold_ms / 1000
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        trace, token = start_trace()
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            elapsed = time.perf_counter() - started
+            end_trace(token)
+            if elapsed >= self.threshold:
+                self._log_slow(event, elapsed, trace)
+
+    @staticmethod
+    def _log_slow(event: TelegramObject, elapsed: float, trace):
+        update_id = event.update_id if isinstance(event, Update) else "?"
+        event_type = event.event_type if isinstance(event, Update) else type(event).__name__
+        breakdown = trace.breakdown()
+        logger.warning(
+            f"Медленное обновление {update_id} ({event_type}): {elapsed * 1000:.0f} мс"
+            + (f"\n{breakdown}" if breakdown else "")
+        )
@@ -0,0 +1,50 @@
+"""
+Middleware контекста пользователя
+Один раз на обновление определяет, кто пишет боту, и отклоняет неавторизованных
+"""
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.types import Message, CallbackQuery, InlineQuery, TelegramObject, User
+
+from src.services.auth_service import resolve_user
+
+ACCESS_DENIED_TEXT = "У вас нет доступа к этому боту."
+START_DENIED_TEXT = (
+    "Доступ запрещён.\n"
+    "Ваш username не найден в списке наставников/админов."
+)
+
+
+class UserContextMiddleware(BaseMiddleware):
+    """
+    Кладёт в data["user_ctx"] неизменяемый UserContext
+
+    Хендлеры и сервисы берут роль, кланы и признак администратора из
+    контекста, не пересчитывая их. Неавторизованные пользователи получают
+    отказ, и хендлер не вызывается.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        from_user: User | None = data.get("event_from_user")
+        if from_user is None:
+            return await handler(event, data)
+
+        user_ctx = resolve_user(from_user.username, from_user.id)
+        if user_ctx.is_authorized:
+            data["user_ctx"] = user_ctx
+            return await handler(event, data)
+
+        if isinstance(event, Message):
+            text = event.text or ""
+            await event.answer(START_DENIED_TEXT if text.startswith("/start") else ACCESS_DENIED_TEXT)
+        elif isinstance(event, CallbackQuery):
+            await event.answer(ACCESS_DENIED_TEXT, show_alert=True)
+        elif isinstance(event, InlineQuery):
+            await event.answer([], cache_time=0, is_personal=True)
+
+        return None
@@ -1,10 +1,10 @@
 """
 Сервис для управления администраторами
 """
-import json
 from pathlib import Path
 from datetime import datetime
 from src.config.settings import DATA_DIR
+from src.services.data_loader import data_store
 
 ADMINS_FILE = DATA_DIR / "admins.json"
 
@@ -14,7 +14,7 @@ class AdminServiceError(Exception):
     pass
 
 
-def create_admin(admin_data: dict) -> dict:
+async def create_admin(admin_data: dict) -> dict:
     """
     Создает нового администратора
     
@@ -48,11 +48,10 @@ def create_admin(admin_data: dict) -> dict:
                     "error": f"Поле '{field}' обязательно для заполнения"
                 }
         
-        # Загружаем существующих админов
+        # Загружаем существующих админов (разбор файла вне event loop)
         if ADMINS_FILE.exists():
-            with open(ADMINS_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                admins = data.get("admins", [])
+            data = (await data_store.load(ADMINS_FILE.name)).data
+            admins = list(data.get("admins", []))
         else:
             admins = []
         
@@ -94,14 +93,8 @@ def create_admin(admin_data: dict) -> dict:
             "admins": admins
         }
         
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
-        
-        with open(ADMINS_FILE, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
-        
-        # Очищаем кэш загрузчика данных
-        from src.services.data_loader import load_json
-        load_json.cache_clear()
+        # Сериализуем и записываем вне event loop, снимок подменяется сразу
+        await data_store.write(ADMINS_FILE.name, result)
         
         return {
             "success": True,
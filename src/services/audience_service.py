@@ -0,0 +1,115 @@
+"""
+Индекс аудитории для рассылок
+
+Собирает уникальных получателей (наставников и администраторов) один раз
+на каждую версию загруженных данных, чтобы рассылка не пересобирала
+список и не отправляла одному человеку несколько копий сообщения
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Literal
+
+from src.services.data_loader import get_mentors, get_admins, register_cache
+
+AudienceSegment = Literal["all", "admins", "mentors", "clans"]
+
+
+@dataclass(frozen=True)
+class AudienceMember:
+    """Получатель рассылки с флагами ролей"""
+    telegram_id: int
+    is_mentor: bool = False
+    is_admin: bool = False
+
+
+@dataclass(frozen=True)
+class AudienceIndex:
+    """Предрассчитанные сегменты аудитории"""
+    members: dict[int, AudienceMember]
+    all_ids: frozenset[int]
+    admin_ids: frozenset[int]
+    mentor_ids: frozenset[int]
+    mentor_ids_by_clan: dict[int, frozenset[int]]
+
+
+def parse_telegram_id(value) -> int | None:
+    """Приводит telegram_id из JSON (строка или число) к int"""
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@register_cache
+@lru_cache(maxsize=1)
+def get_audience_index() -> AudienceIndex:
+    """
+    Строит индекс аудитории по текущим данным
+
+    Результат кэшируется до следующего data_loader.clear_cache()
+    """
+    roles: dict[int, dict[str, bool]] = {}
+    by_clan: dict[int, set[int]] = {}
+
+    for mentor in get_mentors():
+        tg_id = parse_telegram_id(mentor.get("telegram_id"))
+        if tg_id is None:
+            continue
+        roles.setdefault(tg_id, {"is_mentor": False, "is_admin": False})["is_mentor"] = True
+        for clan in mentor.get("clans_mentor", []):
+            by_clan.setdefault(clan["id"], set()).add(tg_id)
+
+    for admin in get_admins():
+        tg_id = parse_telegram_id(admin.get("telegram_id"))
+        if tg_id is None:
+            continue
+        roles.setdefault(tg_id, {"is_mentor": False, "is_admin": False})["is_admin"] = True
+
+    members = {
+        tg_id: AudienceMember(telegram_id=tg_id, **flags)
+        for tg_id, flags in roles.items()
+    }
+
+    return AudienceIndex(
+        members=members,
+        all_ids=frozenset(members),
+        admin_ids=frozenset(i for i, m in members.items() if m.is_admin),
+        mentor_ids=frozenset(i for i, m in members.items() if m.is_mentor),
+        mentor_ids_by_clan={
+            clan_id: frozenset(ids) for clan_id, ids in by_clan.items()
+        },
+    )
+
+
+def get_recipients(
+    segment: AudienceSegment = "all",
+    clan_ids: Iterable[int] | None = None
+) -> frozenset[int]:
+    """
+    Возвращает уникальных получателей сегмента
+
+    Args:
+        segment: "all" — все пользователи, "admins" — только администраторы,
+            "mentors" — только наставники, "clans" — наставники кланов clan_ids
+        clan_ids: кланы для сегмента "clans"
+
+    Returns:
+        множество telegram_id
+    """
+    index = get_audience_index()
+
+    if segment == "all":
+        return index.all_ids
+    if segment == "admins":
+        return index.admin_ids
+    if segment == "mentors":
+        return index.mentor_ids
+    if segment == "clans":
+        empty = frozenset()
+        return frozenset().union(
+            *(index.mentor_ids_by_clan.get(clan_id, empty) for clan_id in clan_ids or [])
+        )
+
+    raise ValueError(f"Неизвестный сегмент аудитории: {segment}")
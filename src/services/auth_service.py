@@ -1,100 +1,125 @@
-from src.services.data_loader import get_mentors, get_admins
+from functools import lru_cache
+
+from src.core.models import UserContext
+from src.services.data_loader import get_mentors, get_admins, register_cache
+from src.services.audience_service import get_audience_index, parse_telegram_id
+
+
+def _normalize_tag(tag: str | None) -> str:
+    return (tag or "").lstrip("@")
+
+
+@register_cache
+@lru_cache(maxsize=1)
+def get_user_index() -> dict[str, UserContext]:
+    """
+    Индекс пользователей по telegram username
+
+    Строится один раз на версию данных. Если пользователь указан в
+    нескольких записях, его кланы объединяются; роль "mentor" имеет
+    приоритет над "admin", как и при поиске в get_user_info
+    """
+    index: dict[str, UserContext] = {}
+
+    for role, users in (("mentor", get_mentors()), ("admin", get_admins())):
+        for user in users:
+            username = _normalize_tag(user.get("telegram_tag"))
+            if not username:
+                continue
+
+            clan_ids = tuple(clan["id"] for clan in user.get("clans_mentor", []))
+            current = index.get(username)
+            if current is None:
+                index[username] = UserContext(
+                    username=username,
+                    telegram_id=parse_telegram_id(user.get("telegram_id")),
+                    role=role,
+                    clan_ids=clan_ids,
+                    is_admin=role == "admin",
+                )
+                continue
+
+            merged_clans = current.clan_ids + tuple(
+                clan_id for clan_id in clan_ids if clan_id not in current.clan_ids
+            )
+            index[username] = UserContext(
+                username=username,
+                telegram_id=current.telegram_id or parse_telegram_id(user.get("telegram_id")),
+                role=current.role,
+                clan_ids=merged_clans,
+                is_admin=current.is_admin or role == "admin",
+            )
+
+    return index
+
+
+def resolve_user(username: str | None, telegram_id: int | None = None) -> UserContext:
+    """
+    Сопоставляет пользователя Telegram с наставниками и администраторами
+
+    Returns:
+        UserContext; для неизвестного пользователя role=None
+    """
+    username = _normalize_tag(username)
+    if username:
+        user = get_user_index().get(username)
+        if user is not None:
+            return user
+    return UserContext(username=username or None, telegram_id=telegram_id)
 
 
 def is_authorized(username: str | None) -> bool:
-    if not username:
-        return False
-    
-    username = username.lstrip("@")
-    
-    mentors = get_mentors()
-    admins = get_admins()
-    
-    all_users = mentors + admins
-    
-    return any(
-        user.get("telegram_tag", "").lstrip("@") == username
-        for user in all_users
-    )
+    return resolve_user(username).is_authorized
 
 
 def get_user_clan_ids(username: str | None) -> list[int]:
-    if not username:
-        return []
-    
-    username = username.lstrip("@")
-    
-    mentors = get_mentors()
-    admins = get_admins()
-    
-    for user in mentors + admins:
-        if user.get("telegram_tag", "").lstrip("@") == username:
-            return [clan["id"] for clan in user.get("clans_mentor", [])]
-    
-    return []
+    return list(resolve_user(username).clan_ids)
 
 
 def get_mentor_telegram_ids_by_clan(clan_id: int) -> list[str]:
-    mentors = get_mentors()
-    ids = []
-    
-    for mentor in mentors:
-        if any(clan["id"] == clan_id for clan in mentor.get("clans_mentor", [])):
-            tg_id = mentor.get("telegram_id")
-            if tg_id:
-                ids.append(str(tg_id))
-    
-    return ids
+    ids = get_audience_index().mentor_ids_by_clan.get(clan_id, frozenset())
+    return [str(tg_id) for tg_id in sorted(ids)]
 
 
 def is_admin(username: str | None) -> bool:
     """
     Проверяет, является ли пользователь администратором
-    
+
     Args:
         username: Telegram username пользователя
-        
+
     Returns:
         True если пользователь является администратором, иначе False
     """
-    if not username:
-        return False
-    
-    username = username.lstrip("@")
-    admins = get_admins()
-    
-    return any(
-        admin.get("telegram_tag", "").lstrip("@") == username
-        for admin in admins
-    )
+    return resolve_user(username).is_admin
 
 
 def get_user_info(username: str | None) -> dict | None:
     """
     Получает полную информацию о пользователе (наставник или админ)
-    
+
     Args:
         username: Telegram username пользователя
-        
+
     Returns:
         Словарь с информацией о пользователе или None если не найден
     """
     if not username:
         return None
-    
+
     username = username.lstrip("@")
-    
+
     mentors = get_mentors()
     admins = get_admins()
-    
+
     # Ищем сначала в наставниках
     for mentor in mentors:
-        if mentor.get("telegram_tag", "").lstrip("@") == username:
+        if _normalize_tag(mentor.get("telegram_tag")) == username:
             return {**mentor, "role": "mentor"}
-    
+
     # Затем в админах
     for admin in admins:
-        if admin.get("telegram_tag", "").lstrip("@") == username:
+        if _normalize_tag(admin.get("telegram_tag")) == username:
             return {**admin, "role": "admin"}
-    
-    return None
\ No newline at end of file
+
+    return None
@@ -1,17 +1,571 @@
-from pathlib import Path
+"""
+Загрузка данных из JSON
+
+Данные хранятся в DataStore как неизменяемые снимки (Snapshot). Разбор и
+сериализация JSON выполняются в пуле потоков. Хендлеры ожидают готовые
+снимки, а синхронные геттеры (get_mentors и др.) читают уже загруженные данные.
+
+Домашки в снимке хранятся не словарями API, а компактными HomeworkRecord.
+Файл homeworks.json разложен по шардам кланов (src/core/homework_shards.py):
+снимок собирается из них, при перезагрузке перечитываются только
+изменившиеся шарды, а обновление клана пишет только его шард.
+"""
+import asyncio
+import codecs
 import json
-from functools import lru_cache
-from src.config.settings import DATA_DIR
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from src.config.settings import DATA_DIR, SNAPSHOT_COMPRESSION, SNAPSHOT_COMPRESSION_LEVEL
+from src.core.metrics import registry, SNAPSHOT_LOADS
+from src.core.types import HomeworkRecord
+from src.core.homework_schema import is_stored_record
+from src.core.homework_shards import MANIFEST_NAME, SHARDS_DIRNAME, read_manifest, write_json_atomic, write_shards
+from src.core.snapshot_codec import open_read
+
+logger = logging.getLogger(__name__)
+
+# Производные кэши (индексы), которые строятся поверх загруженных данных
+# и должны сбрасываться при смене снимка
+_dependent_caches: list[Callable] = []
+
+# Преобразования элементов списков верхнего уровня: {файл: {ключ: функция}}.
+# Применяются по мере разбора JSON, в пуле потоков
+ItemParser = Callable[[Any], Any]
+_item_parsers: dict[str, dict[str, ItemParser]] = {}
+
+# Файлы, разложенные по шардам: {файл: (каталог шардов, ключ списка, шард элемента)}
+_sharded_files: dict[str, tuple[str, str, Callable[[Any], int]]] = {}
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Загруженное содержимое файла данных"""
+    filename: str
+    data: dict
+    version: int
+    mtime: float
+    size: int
+    load_seconds: float
+    # Для write_shards: шарды, которые при сборке снимка перечитаны с диска
+    # или пропали из манифеста, кроме записанных (их изменил другой процесс)
+    changed_shards: frozenset[int] = frozenset()
+
+
+# Файл читается и декодируется частями, чтобы не удерживать GIL надолго
+READ_CHUNK_SIZE = 1024 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _skip_ws(text: str, idx: int) -> int:
+    return _WHITESPACE.match(text, idx).end()
+
+
+def _expect(text: str, idx: int, char: str) -> int:
+    idx = _skip_ws(text, idx)
+    if text[idx:idx + 1] != char:
+        raise json.JSONDecodeError(f"Expecting '{char}'", text, idx)
+    return _skip_ws(text, idx + 1)
+
+
+def _decode_list(text: str, idx: int, parse_item: ItemParser | None = None) -> tuple[list, int]:
+    """
+    Декодирует список по одному элементу
+
+    parse_item применяется к каждому элементу сразу после декодирования,
+    поэтому исходные элементы не накапливаются в памяти все одновременно
+    """
+    items = []
+    idx = _skip_ws(text, idx + 1)
+    if text[idx:idx + 1] == "]":
+        return items, idx + 1
+    while True:
+        item, idx = _decoder.raw_decode(text, idx)
+        items.append(parse_item(item) if parse_item else item)
+        idx = _skip_ws(text, idx)
+        if text[idx:idx + 1] == "]":
+            return items, idx + 1
+        idx = _expect(text, idx, ",")
+
+
+def _loads_incremental(text: str, item_parsers: dict[str, ItemParser] | None = None) -> Any:
+    """
+    Разбирает JSON-объект, декодируя элементы списков верхнего уровня по одному
+
+    json.loads разбирает весь документ одним вызовом C-кода и удерживает GIL
+    до конца, поэтому в потоке он всё равно останавливает event loop.
+    Между отдельными элементами GIL отпускается, и loop продолжает работать.
+
+    item_parsers — преобразования элементов списков по ключу верхнего уровня
+    """
+    item_parsers = item_parsers or {}
+    idx = _skip_ws(text, 0)
+    if text[idx:idx + 1] != "{":
+        return json.loads(text)
+
+    result = {}
+    idx = _skip_ws(text, idx + 1)
+    if text[idx:idx + 1] == "}":
+        return result
+
+    while True:
+        key, idx = _decoder.raw_decode(text, idx)
+        idx = _expect(text, idx, ":")
+        if text[idx:idx + 1] == "[":
+            value, idx = _decode_list(text, idx, item_parsers.get(key))
+        else:
+            value, idx = _decoder.raw_decode(text, idx)
+        result[key] = value
+
+        idx = _skip_ws(text, idx)
+        if text[idx:idx + 1] == "}":
+            return result
+        idx = _expect(text, idx, ",")
+
+
+def _read_text(path: Path) -> str:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parts = []
+    # Сжатые файлы распаковываются потоком, теми же частями
+    with open_read(path) as f:
+        while chunk := f.read(READ_CHUNK_SIZE):
+            parts.append(decoder.decode(chunk))
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
+def _read_json(path: Path, item_parsers: dict[str, ItemParser] | None = None) -> dict:
+    return _loads_incremental(_read_text(path), item_parsers)
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, HomeworkRecord):
+        return obj.to_stored()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _write_json(path: Path, data: Any, indent: int | None = 2) -> int:
+    """Атомарно записывает JSON (indent=None — без отступов и пробелов)"""
+    return write_json_atomic(path, data, indent, default=_json_default)
+
+
+def _parse_items(filename: str, data: dict) -> dict:
+    """Применяет преобразования элементов к уже разобранным данным"""
+    item_parsers = _item_parsers.get(filename)
+    if not item_parsers:
+        return data
+    return {
+        key: [item_parsers[key](item) for item in value] if key in item_parsers else value
+        for key, value in data.items()
+    }
+
+
+class ShardedFile:
+    """
+    Файл данных, разложенный по шардам: каталог с манифестом и файлами шардов
+
+    Разобранные шарды запоминаются вместе с mtime, поэтому при перезагрузке
+    читаются только изменившиеся. Пока манифеста нет, читается обычный
+    файл (legacy_path); первая запись шардов раскладывает его целиком.
+    """
+
+    def __init__(self, directory: Path, legacy_path: Path, key: str, shard_key: Callable[[Any], int]):
+        self.directory = directory
+        self.legacy_path = legacy_path
+        self.key = key
+        self.shard_key = shard_key
+        self.size = 0
+        # {шард: (mtime_ns файла, элементы)}
+        self._shards: dict[int, tuple[int, list]] = {}
+        # Шарды, изменившиеся на диске с прошлой сборки (см. _assemble)
+        self.changed: set[int] = set()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / MANIFEST_NAME
+
+    def watched_path(self) -> Path:
+        """Файл, по mtime которого видно, что данные изменились"""
+        return self.manifest_path if self.manifest_path.exists() else self.legacy_path
+
+    def read(self, item_parsers: dict[str, ItemParser] | None) -> dict:
+        manifest = read_manifest(self.directory)
+        if manifest is None:
+            self._shards = {}
+            self.size = self.legacy_path.stat().st_size
+            return _read_json(self.legacy_path, item_parsers)
+        return self._assemble(manifest, item_parsers)
+
+    def write(
+        self,
+        shards: dict[int, list],
+        current: list | None,
+        item_parsers: dict[str, ItemParser] | None
+    ) -> dict:
+        """
+        Записывает шарды и возвращает собранные данные
+
+        current — элементы текущего снимка: пока раскладки нет, из них
+        раскладываются шарды остальных кланов
+        """
+        parse_item = (item_parsers or {}).get(self.key)
+        if parse_item:
+            shards = {shard: [parse_item(item) for item in items] for shard, items in shards.items()}
+
+        if not self.manifest_path.exists():
+            if current is None and self.legacy_path.exists():
+                current = _read_json(self.legacy_path, item_parsers).get(self.key, [])
+            migrated: dict[int, list] = {}
+            for item in current or []:
+                migrated.setdefault(self.shard_key(item), []).append(item)
+            migrated.update(shards)
+            shards = migrated
+            logger.info(f"{self.legacy_path.name} раскладывается по шардам: {len(shards)} в {self.directory}")
+
+        manifest = write_shards(
+            self.directory, shards, default=_json_default,
+            codec=SNAPSHOT_COMPRESSION, level=SNAPSHOT_COMPRESSION_LEVEL
+        )
+        for shard, items in shards.items():
+            if items:
+                mtime = (self.directory / manifest["clans"][str(shard)]["file"]).stat().st_mtime_ns
+                self._shards[shard] = (mtime, items)
+        data = self._assemble(manifest, item_parsers)
+        self.changed -= shards.keys()
+        return data
+
+    def _assemble(self, manifest: dict, item_parsers: dict[str, ItemParser] | None) -> dict:
+        """Собирает данные по манифесту, перечитывая только изменившиеся шарды"""
+        shards = {}
+        reread: set[int] = set()
+        for shard_key, entry in manifest["clans"].items():
+            shard = int(shard_key)
+            path = self.directory / entry["file"]
+            try:
+                mtime = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                logger.warning(f"Шард {path} есть в манифесте, но не найден")
+                continue
+            cached = self._shards.get(shard)
+            if cached is None or cached[0] != mtime:
+                cached = (mtime, _read_json(path, item_parsers).get(self.key, []))
+                reread.add(shard)
+            shards[shard] = cached
+        # Перечитанные и удалённые из манифеста шарды
+        self.changed = reread | (self._shards.keys() - shards.keys())
+        self._shards = shards
+        self.size = sum(entry.get("size", 0) for entry in manifest["clans"].values())
+
+        if reread:
+            logger.info(f"Шарды {self.directory.name}: перечитано {len(reread)} из {len(shards)}")
+
+        return {
+            "schema_version": manifest.get("schema_version"),
+            "exported_at": manifest.get("updated_at"),
+            self.key: [item for shard in sorted(shards) for item in shards[shard][1]],
+        }
+
+
+class DataStore:
+    """Хранилище снимков JSON-файлов из DATA_DIR"""
+
+    def __init__(self, data_dir: Path):
+        self._data_dir = data_dir
+        self._sharded: dict[str, ShardedFile] = {}
+        self._snapshots: dict[str, Snapshot] = {}
+        self._version = 0
+        self._file_locks: dict[str, asyncio.Lock] = {}
+        self._checked_at = 0.0
+
+    @property
+    def version(self) -> int:
+        """Общая версия данных, растёт при каждой смене любого снимка"""
+        return self._version
+
+    def snapshots(self) -> list[Snapshot]:
+        return list(self._snapshots.values())
+
+    def version_of(self, filename: str) -> int | None:
+        """Версия загруженного снимка файла; None, если он не загружен"""
+        snapshot = self._snapshots.get(filename)
+        return snapshot.version if snapshot else None
+
+    def _path(self, filename: str) -> Path:
+        sharded = self._sharded_file(filename)
+        return sharded.watched_path() if sharded else self._data_dir / filename
+
+    def _sharded_file(self, filename: str) -> ShardedFile | None:
+        sharded = self._sharded.get(filename)
+        if sharded is None and filename in _sharded_files:
+            dirname, key, shard_key = _sharded_files[filename]
+            sharded = self._sharded[filename] = ShardedFile(
+                self._data_dir / dirname, self._data_dir / filename, key, shard_key
+            )
+        return sharded
+
+    def _read(self, filename: str) -> dict:
+        sharded = self._sharded_file(filename)
+        if sharded:
+            return sharded.read(_item_parsers.get(filename))
+        return _read_json(self._path(filename), _item_parsers.get(filename))
+
+    def _write(self, filename: str, data: dict, indent: int | None) -> dict:
+        _write_json(self._path(filename), data, indent)
+        return _parse_items(filename, data)
+
+    def _file_lock(self, filename: str) -> asyncio.Lock:
+        lock = self._file_locks.get(filename)
+        if lock is None:
+            lock = self._file_locks[filename] = asyncio.Lock()
+        return lock
+
+    def _swap(
+        self,
+        filename: str,
+        data: dict,
+        stat: os.stat_result,
+        load_seconds: float,
+        changed_shards: frozenset[int] = frozenset()
+    ) -> Snapshot:
+        """Атомарно заменяет снимок и сбрасывает производные кэши"""
+        self._version += 1
+        sharded = self._sharded_file(filename)
+        snapshot = Snapshot(
+            filename=filename,
+            data=data,
+            version=self._version,
+            mtime=stat.st_mtime,
+            size=sharded.size if sharded else stat.st_size,
+            load_seconds=load_seconds,
+            changed_shards=changed_shards,
+        )
+        self._snapshots[filename] = snapshot
+        for cached in _dependent_caches:
+            cached.cache_clear()
+        return snapshot
+
+    def _stat(self, filename: str) -> os.stat_result:
+        path = self._path(filename)
+        if not path.exists():
+            raise FileNotFoundError(f"Файл не найден: {path}")
+        return path.stat()
+
+    def _is_stale(self, filename: str) -> bool:
+        snapshot = self._snapshots.get(filename)
+        if snapshot is None:
+            return True
+        try:
+            return self._path(filename).stat().st_mtime != snapshot.mtime
+        except FileNotFoundError:
+            return False
+
+    def get(self, filename: str) -> Snapshot:
+        """
+        Возвращает загруженный снимок
+
+        Если файл ещё не загружен, он читается синхронно — это запасной
+        путь для скриптов; в боте снимки загружаются заранее через load()
+        """
+        snapshot = self._snapshots.get(filename)
+        if snapshot is not None:
+            return snapshot
+
+        stat = self._stat(filename)
+        started = time.perf_counter()
+        data = self._read(filename)
+        elapsed = time.perf_counter() - started
+        SNAPSHOT_LOADS.labels(filename, "sync").inc()
+        logger.warning(f"Синхронная загрузка {filename} в event loop: {elapsed * 1000:.0f} мс")
+        return self._swap(filename, data, stat, elapsed)
+
+    async def load(self, filename: str, force: bool = False) -> Snapshot:
+        """Загружает файл вне event loop, если он изменился или ещё не загружен"""
+        async with self._file_lock(filename):
+            if not force and not self._is_stale(filename):
+                return self._snapshots[filename]
+
+            stat = self._stat(filename)
+            started = time.perf_counter()
+            data = await asyncio.to_thread(self._read, filename)
+            elapsed = time.perf_counter() - started
+            SNAPSHOT_LOADS.labels(filename, "load").inc()
+
+            snapshot = self._swap(filename, data, stat, elapsed)
+            logger.info(
+                f"Загружен {filename}: {stat.st_size / 1024:.0f} КБ за {elapsed * 1000:.0f} мс, "
+                f"версия {snapshot.version}"
+            )
+            return snapshot
+
+    async def refresh(self, filenames: list[str] | None = None, min_interval: float = 0.0):
+        """
+        Перезагружает изменившиеся на диске файлы
+
+        Args:
+            filenames: файлы для проверки (по умолчанию — все загруженные)
+            min_interval: не проверять mtime чаще, чем раз в min_interval секунд
+        """
+        filenames = filenames or list(self._snapshots)
+        now = time.monotonic()
+        recently_checked = min_interval and now - self._checked_at < min_interval
+        if recently_checked and all(f in self._snapshots for f in filenames):
+            return
+        self._checked_at = now
+
+        for filename in filenames:
+            if self._is_stale(filename):
+                try:
+                    await self.load(filename)
+                except FileNotFoundError:
+                    logger.error(f"Файл данных не найден: {filename}")
+
+    async def write(self, filename: str, data: dict, indent: int | None = 2) -> Snapshot:
+        """Сериализует и записывает файл в пуле потоков, затем подменяет снимок"""
+        if self._sharded_file(filename):
+            raise ValueError(f"{filename} разложен по шардам, запись — через write_shards")
+
+        async with self._file_lock(filename):
+            started = time.perf_counter()
+            data = await asyncio.to_thread(self._write, filename, data, indent)
+            elapsed = time.perf_counter() - started
+            SNAPSHOT_LOADS.labels(filename, "write").inc()
+            stat = self._path(filename).stat()
+            snapshot = self._swap(filename, data, stat, elapsed)
+            logger.info(
+                f"Записан {filename}: {stat.st_size / 1024:.0f} КБ за {elapsed * 1000:.0f} мс, "
+                f"версия {snapshot.version}"
+            )
+            return snapshot
+
+    async def write_shards(self, filename: str, shards: dict[int, list]) -> Snapshot:
+        """
+        Перезаписывает отдельные шарды файла и подменяет снимок
+
+        Остальные шарды не читаются и не пишутся (кроме первой записи
+        поверх обычного файла, см. ShardedFile)
+
+        Args:
+            filename: файл, разложенный по шардам
+            shards: {шард: новые элементы}; пустой список удаляет шард
+        """
+        sharded = self._sharded_file(filename)
+        if sharded is None:
+            raise ValueError(f"{filename} не разложен по шардам")
+
+        async with self._file_lock(filename):
+            current = self._snapshots.get(filename)
+            items = current.data.get(sharded.key, []) if current else None
+            started = time.perf_counter()
+            data = await asyncio.to_thread(sharded.write, shards, items, _item_parsers.get(filename))
+            elapsed = time.perf_counter() - started
+            SNAPSHOT_LOADS.labels(filename, "write").inc()
+            stat = self._stat(filename)
+            snapshot = self._swap(filename, data, stat, elapsed, frozenset(sharded.changed))
+            logger.info(
+                f"Записаны шарды {filename}: {len(shards)} за {elapsed * 1000:.0f} мс, "
+                f"версия {snapshot.version}"
+            )
+            return snapshot
+
+    def invalidate(self, filename: str | None = None):
+        """Забывает снимок (или все снимки), следующее чтение загрузит файл заново"""
+        if filename is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(filename, None)
+        self._version += 1
+        for cached in _dependent_caches:
+            cached.cache_clear()
+
+
+# Глобальное хранилище данных бота
+data_store = DataStore(DATA_DIR)
+
+DATA_FILES = ("mentors.json", "admins.json", "homeworks.json")
+
+
+@registry.add_collector
+def _collect_snapshots():
+    snapshots = data_store.snapshots()
+    yield (
+        "bot_snapshot_size_bytes", "gauge", "Размер файла загруженного снимка",
+        [("bot_snapshot_size_bytes", {"file": s.filename}, s.size) for s in snapshots]
+    )
+    yield (
+        "bot_snapshot_load_seconds", "gauge", "Время последней загрузки или записи снимка",
+        [("bot_snapshot_load_seconds", {"file": s.filename}, s.load_seconds) for s in snapshots]
+    )
+    yield (
+        "bot_data_version", "gauge", "Версия данных (растёт при каждой смене снимка)",
+        [("bot_data_version", {}, data_store.version)]
+    )
 
 
-@lru_cache(maxsize=1)
 def load_json(filename: str) -> dict:
-    path = DATA_DIR / filename
-    if not path.exists():
-        raise FileNotFoundError(f"Файл не найден: {path}")
-    
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return data_store.get(filename).data
+
+
+def register_cache(func: Callable) -> Callable:
+    """
+    Регистрирует функцию с lru_cache как производный кэш данных
+
+    Кэш такой функции сбрасывается при каждой смене снимка
+    """
+    _dependent_caches.append(func)
+    return func
+
+
+def registered_caches() -> list[Callable]:
+    """Производные кэши данных, зарегистрированные через register_cache"""
+    return list(_dependent_caches)
+
+
+def register_item_parser(filename: str, key: str) -> Callable:
+    """
+    Регистрирует преобразование элементов списка data[key] файла filename
+
+    Снимок хранит преобразованные элементы. Функция применяется и к данным,
+    переданным в DataStore.write, поэтому должна принимать как исходные
+    элементы, так и уже преобразованные
+    """
+    def decorator(func: ItemParser) -> ItemParser:
+        _item_parsers.setdefault(filename, {})[key] = func
+        return func
+    return decorator
+
+
+def register_sharded_file(filename: str, dirname: str, key: str, shard_key: Callable[[Any], int]):
+    """
+    Раскладывает список data[key] файла filename по шардам в каталоге dirname
+
+    shard_key возвращает шард элемента (уже преобразованного парсером)
+    """
+    _sharded_files[filename] = (dirname, key, shard_key)
+
+
+register_sharded_file("homeworks.json", SHARDS_DIRNAME, "homeworks", shard_key=lambda hw: hw.clan_id)
+
+
+@register_item_parser("homeworks.json", "homeworks")
+def _parse_homework(hw: dict | HomeworkRecord) -> HomeworkRecord:
+    if isinstance(hw, HomeworkRecord):
+        return hw
+    # Файлы схемы 1 (полные ответы API) читаются до следующего обновления
+    if is_stored_record(hw):
+        return HomeworkRecord.from_stored(hw)
+    return HomeworkRecord.from_api(hw)
+
+
+def clear_cache() -> None:
+    """Сбрасывает загруженные снимки и все построенные по ним индексы"""
+    data_store.invalidate()
 
 
 def get_mentors() -> list[dict]:
@@ -22,5 +576,5 @@ def get_admins() -> list[dict]:
     return load_json("admins.json")["admins"]
 
 
-def get_homeworks() -> list[dict]:
-    return load_json("homeworks.json")["homeworks"]
\ No newline at end of file
+def get_homeworks() -> list[HomeworkRecord]:
+    return load_json("homeworks.json")["homeworks"]
@@ -0,0 +1,109 @@
+"""
+Слияние свежих домашек клана со снимком по id
+
+При обновлении клана его домашки из API сравниваются с домашками того же
+клана в текущем снимке по id (множества ключей словарей, O(n)):
+    - added — id есть только в ответе API: новые сдачи на проверку;
+    - removed — id есть только в снимке: домашку проверили;
+    - changed — id есть в обоих, но поля записи отличаются (например,
+      домашку пересдали и сменилась дата сдачи).
+
+Для неизменившихся домашек в новый шард попадает запись из снимка, а не
+только что разобранная копия, поэтому в памяти бота остаётся один объект.
+"""
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from src.core.types import HomeworkRecord
+
+
+@dataclass
+class ClanDiff:
+    """Изменения домашек клана между снимком и ответом API"""
+    clan_id: int
+    added: list[HomeworkRecord] = field(default_factory=list)
+    removed: list[HomeworkRecord] = field(default_factory=list)
+    changed: list[HomeworkRecord] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+def _fields(hw: HomeworkRecord) -> tuple:
+    # Строки интернированы, поэтому сравнение кортежей дешёвое
+    return (hw.clan_id, hw.delivery, hw.status, hw.first_name, hw.last_name, hw.topic, hw.type_name)
+
+
+def group_by_clan(homeworks: Iterable[HomeworkRecord], clan_ids: Iterable[int]) -> dict[int, list[HomeworkRecord]]:
+    """Домашки кланов clan_ids из снимка за один проход; у каждого клана есть список"""
+    grouped: dict[int, list[HomeworkRecord]] = {clan_id: [] for clan_id in clan_ids}
+    for hw in homeworks:
+        items = grouped.get(hw.clan_id)
+        if items is not None:
+            items.append(hw)
+    return grouped
+
+
+def merge_clan(
+    clan_id: int,
+    current: Iterable[HomeworkRecord],
+    fresh: Iterable[HomeworkRecord]
+) -> tuple[list[HomeworkRecord], ClanDiff]:
+    """
+    Сливает свежие домашки клана с домашками из снимка
+
+    Args:
+        clan_id: клан
+        current: его домашки в текущем снимке
+        fresh: его домашки из API (полный список на проверке)
+
+    Returns:
+        (новые домашки клана в порядке ответа API, изменения)
+    """
+    old = {hw.id: hw for hw in current}
+    new = {hw.id: hw for hw in fresh}
+    diff = ClanDiff(clan_id)
+
+    added_ids = new.keys() - old.keys()
+    diff.removed = [old[hw_id] for hw_id in old.keys() - new.keys()]
+
+    merged = []
+    for hw_id, hw in new.items():
+        if hw_id in added_ids:
+            diff.added.append(hw)
+            merged.append(hw)
+            continue
+        previous = old[hw_id]
+        if _fields(previous) == _fields(hw):
+            diff.unchanged += 1
+            merged.append(previous)
+        else:
+            diff.changed.append(hw)
+            merged.append(hw)
+
+    return merged, diff
+
+
+def merge_clans(
+    current: Iterable[HomeworkRecord],
+    fresh: dict[int, list[HomeworkRecord]]
+) -> tuple[dict[int, list[HomeworkRecord]], list[ClanDiff]]:
+    """
+    Сливает свежие домашки нескольких кланов со снимком
+
+    Args:
+        current: все домашки текущего снимка
+        fresh: {клан: его домашки из API}; клан без домашек — пустой список
+
+    Returns:
+        (шарды для записи {клан: домашки}, изменения по кланам)
+    """
+    grouped = group_by_clan(current, fresh)
+    shards = {}
+    diffs = []
+    for clan_id, items in fresh.items():
+        shards[clan_id], diff = merge_clan(clan_id, grouped[clan_id], items)
+        diffs.append(diff)
+    return shards, diffs
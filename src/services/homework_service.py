@@ -1,39 +1,55 @@
-from collections import defaultdict
 from datetime import datetime
+from src.core.models import UserContext
+from src.core.types import HomeworkRecord
 from src.services.data_loader import get_homeworks
-from src.services.auth_service import get_user_clan_ids
+from src.services.homework_stats import homework_stats
 from src.utils.datetime import (
-    parse_delivery_date,
     hours_since_delivery,
     hours_left_to_deadline,
     now_utc
 )
+from src.services.render_cache import render_cache, render_key
 from src.utils.telegram import escape_html
+from src.utils.profiling import timed
 
+NO_HOMEWORKS_TEXT = "У вас нет домашних заданий на проверке."
+NO_EXPIRING_TEXT = "На данный момент нет домашних заданий, которые истекают в ближайшие 24 часа."
+EXPIRING_HEADER = "Домашние задания, истекающие в ближайшие 24 часа:"
 
-def get_relevant_homeworks(username: str | None) -> list[dict]:
-    if not username:
+# Страница списка истекающих домашек: не больше строк и символов
+EXPIRING_PAGE_LINES = 20
+EXPIRING_PAGE_CHARS = 3500
+
+
+@timed("get_relevant_homeworks")
+def get_relevant_homeworks(user: UserContext) -> list[HomeworkRecord]:
+    if not user.is_authorized:
         return []
     
-    clan_ids = get_user_clan_ids(username)
+    return get_homeworks_for_clans(user.clan_ids)
+
+
+@timed("get_homeworks_for_clans")
+def get_homeworks_for_clans(clan_ids: tuple[int, ...]) -> list[HomeworkRecord]:
     if not clan_ids:
         # Админы без кланов могут видеть всё (можно изменить логику)
-        return [hw for hw in get_homeworks() if hw.get("status") == "Ожидает проверки"]
+        return [hw for hw in get_homeworks() if hw.status == "Ожидает проверки"]
     
+    clan_set = set(clan_ids)
     return [
         hw for hw in get_homeworks()
-        if hw.get("clan_id") in clan_ids and hw.get("status") == "Ожидает проверки"
+        if hw.clan_id in clan_set and hw.status == "Ожидает проверки"
     ]
 
 
-def classify_homework(hw: dict, now: datetime | None = None) -> str | None:
-    if hw.get("status") != "Ожидает проверки":
+def classify_homework(hw: HomeworkRecord, now: datetime | None = None) -> str | None:
+    if hw.status != "Ожидает проверки":
         return None
     
     if now is None:
         now = now_utc()
     
-    delivery = parse_delivery_date(hw["delivery_date"])
+    delivery = hw.delivery
     hours_passed = hours_since_delivery(delivery, now)
     
     if hours_passed > 72:
@@ -43,25 +59,32 @@ def classify_homework(hw: dict, now: datetime | None = None) -> str | None:
     return "in_time"
 
 
-def get_homeworks_info(username: str | None) -> tuple[str, str]:
-    now = now_utc()
-    hws = get_relevant_homeworks(username)
-    
-    if not hws:
-        return "У вас нет домашних заданий на проверке.", ""
+def get_homeworks_info(user: UserContext) -> tuple[str, str]:
+    if not user.is_authorized:
+        return NO_HOMEWORKS_TEXT, ""
+    
+    return render_cache.get_or_render(
+        render_key("info", user.clan_ids),
+        lambda: render_homeworks_info(user.clan_ids)
+    )
+
 
-    by_clan = defaultdict(list)
-    for hw in hws:
-        by_clan[hw["clan_id"]].append(hw)
+@timed("render_homeworks_info")
+def render_homeworks_info(clan_ids: tuple[int, ...]) -> tuple[str, str]:
+    # Счётчики по кланам ведутся инкрементально, без прохода по всем домашкам
+    clans = homework_stats.counts(clan_ids)
+    
+    if not clans:
+        return NO_HOMEWORKS_TEXT, ""
     
     total_lines = ["📊 Домашние задания на проверке:"]
-    for clan_id, clan_hws in sorted(by_clan.items()):
-        total_lines.append(f"Клан {clan_id}: {len(clan_hws)}")
+    for clan in clans:
+        total_lines.append(f"Клан {clan.clan_id}: {clan.total}")
     
     total_text = "\n".join(total_lines)
     
-    overdue = sum(1 for hw in hws if classify_homework(hw, now) == "overdue")
-    pending = len(hws) - overdue
+    overdue = sum(clan.overdue for clan in clans)
+    pending = sum(clan.total for clan in clans) - overdue
     
     status_lines = [
         "Статус:",
@@ -72,39 +95,72 @@ def get_homeworks_info(username: str | None) -> tuple[str, str]:
     return total_text, "\n".join(status_lines)
 
 
-def get_expiring_homeworks_text(username: str | None) -> str:
-    now = now_utc()                         # ← исправлено
-    hws = get_relevant_homeworks(username)
+def get_expiring_page(user: UserContext, page: int) -> tuple[str, int, int]:
+    """
+    Страница списка истекающих домашек
+
+    Страницы отрисовываются один раз и берутся из кэша, поэтому
+    листание не пересчитывает список
+
+    Returns:
+        (текст страницы, номер страницы с нуля, всего страниц)
+    """
+    if not user.is_authorized:
+        return NO_EXPIRING_TEXT, 0, 1
+    
+    pages = render_cache.get_or_render(
+        render_key("expiring_pages", user.clan_ids),
+        lambda: render_expiring_pages(user.clan_ids)
+    )
+    page = min(max(page, 0), len(pages) - 1)
+    return pages[page], page, len(pages)
+
+
+@timed("render_expiring_pages")
+def render_expiring_pages(clan_ids: tuple[int, ...]) -> tuple[str, ...]:
+    """Список истекающих домашек, разбитый на страницы по EXPIRING_PAGE_LINES строк"""
+    lines = render_expiring_lines(clan_ids)
+    if not lines:
+        return (NO_EXPIRING_TEXT,)
+    
+    header = f"{EXPIRING_HEADER[:-1]} ({len(lines)}):"
+    pages = []
+    current: list[str] = []
+    size = len(header)
+    for line in lines:
+        if current and (len(current) == EXPIRING_PAGE_LINES or size + len(line) + 1 > EXPIRING_PAGE_CHARS):
+            pages.append("\n".join([header, *current]))
+            current = []
+            size = len(header)
+        current.append(line)
+        size += len(line) + 1
+    pages.append("\n".join([header, *current]))
+    
+    return tuple(pages)
+
+
+def render_expiring_lines(clan_ids: tuple[int, ...]) -> list[str]:
+    """Строки истекающих домашек, от самых срочных"""
+    now = now_utc()
+    hws = get_homeworks_for_clans(clan_ids)
     
     expiring = [
         hw for hw in hws
         if classify_homework(hw, now) == "expiring_soon"
     ]
     
-    if not expiring:
-        return "На данный момент нет домашних заданий, которые истекают в ближайшие 24 часа."
+    lines = []
     
-    lines = ["Домашние задания, истекающие в ближайшие 24 часа:"]
-    
-    for hw in sorted(
-        expiring,
-        key=lambda x: hours_left_to_deadline(parse_delivery_date(x["delivery_date"]), now)
-    ):
-        delivery = parse_delivery_date(hw["delivery_date"])
-        hours_left = hours_left_to_deadline(delivery, now)
-        student = hw["user"]["first_name"].strip() + " " + hw["user"].get("last_name", "").strip()
-        
-        # Используем lesson.topic вместо type.name
-        lesson = hw["homework"].get("lesson", {})
-        task_name = lesson.get("topic", hw["homework"]["type"]["name"])  # fallback на type.name
+    for hw in sorted(expiring, key=lambda x: hours_left_to_deadline(x.delivery, now)):
+        hours_left = hours_left_to_deadline(hw.delivery, now)
         
         # Экранируем HTML-спецсимволы
-        student_safe = escape_html(student.strip() or '??')
-        task_name_safe = escape_html(task_name)
+        student_safe = escape_html(hw.student)
+        task_name_safe = escape_html(hw.task_name)
         
         lines.append(
             f"• {student_safe} — {task_name_safe} "
-            f"(клан {hw['clan_id']}, осталось ~{int(hours_left)} ч)"
+            f"(клан {hw.clan_id}, осталось ~{int(hours_left)} ч)"
         )
     
-    return "\n".join(lines)
\ No newline at end of file
+    return lines
\ No newline at end of file
@@ -0,0 +1,188 @@
+"""
+Счётчики домашек на проверке по кланам
+
+Экран "Информация по домашкам" показывает по каждому клану число домашек
+и сколько из них просрочено. Категория домашки меняется только когда
+проходит её граница: через 48 часов после сдачи она становится
+истекающей, через 72 — просроченной (как в classify_homework). Поэтому
+таблица счётчиков строится один раз на снимок homeworks.json, а дальше:
+    - при обновлении кланов через бот пересчитываются только эти кланы;
+    - при чтении курсоры клана сдвигаются через прошедшие границы.
+
+У всех домашек одинаковые сдвиги границ от даты сдачи, поэтому очередь
+границ клана — это его даты сдачи по возрастанию и два курсора в ней.
+Сводка для пользователя стоит O(число его кланов) плюс пройденные границы.
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from src.core.metrics import registry
+from src.core.types import HomeworkRecord
+from src.services.data_loader import data_store
+from src.utils.datetime import now_utc
+
+PENDING_STATUS = "Ожидает проверки"
+
+# Сдвиги границ от даты сдачи: дедлайн 72 часа, "истекает" — последние 24
+EXPIRING_AFTER = timedelta(hours=72 - 24).total_seconds()
+OVERDUE_AFTER = timedelta(hours=72).total_seconds()
+
+HOMEWORKS_FILENAME = "homeworks.json"
+
+
+@dataclass(frozen=True)
+class ClanCounts:
+    """Домашки клана на проверке по категориям на момент чтения"""
+    clan_id: int
+    in_time: int
+    expiring: int
+    overdue: int
+
+    @property
+    def total(self) -> int:
+        return self.in_time + self.expiring + self.overdue
+
+
+class ClanStats:
+    """
+    Очередь границ одного клана
+
+    deliveries — даты сдачи (timestamp) домашек на проверке по возрастанию.
+    Домашки до _expiring_at уже истекают, до _overdue_at — просрочены.
+    """
+
+    __slots__ = ("deliveries", "_expiring_at", "_overdue_at")
+
+    def __init__(self, deliveries: list[float]):
+        self.deliveries = deliveries
+        self._expiring_at = 0
+        self._overdue_at = 0
+
+    def advance(self, now: float):
+        """Сдвигает курсоры через границы, пройденные к моменту now"""
+        deliveries = self.deliveries
+        count = len(deliveries)
+
+        expiring_at = self._expiring_at
+        # hours_left <= 24: граница включается
+        while expiring_at < count and deliveries[expiring_at] + EXPIRING_AFTER <= now:
+            expiring_at += 1
+        self._expiring_at = expiring_at
+
+        overdue_at = self._overdue_at
+        # hours_passed > 72: граница не включается
+        while overdue_at < count and deliveries[overdue_at] + OVERDUE_AFTER < now:
+            overdue_at += 1
+        self._overdue_at = overdue_at
+
+    def counts(self, clan_id: int, now: float) -> ClanCounts:
+        self.advance(now)
+        return ClanCounts(
+            clan_id=clan_id,
+            in_time=len(self.deliveries) - self._expiring_at,
+            expiring=self._expiring_at - self._overdue_at,
+            overdue=self._overdue_at,
+        )
+
+
+def _build_clans(homeworks: Iterable[HomeworkRecord]) -> dict[int, ClanStats]:
+    deliveries: dict[int, list[float]] = {}
+    for hw in homeworks:
+        if hw.status == PENDING_STATUS:
+            deliveries.setdefault(hw.clan_id, []).append(hw.delivery.timestamp())
+    return {clan_id: ClanStats(sorted(values)) for clan_id, values in deliveries.items()}
+
+
+class HomeworkStats:
+    """
+    Таблица ClanStats, привязанная к версии снимка homeworks.json
+
+    Если снимок сменился не через apply_clan_refresh (скрипт выгрузки,
+    перезагрузка файла) или вместе с записанными кланами в него попали
+    шарды, изменённые другим процессом, таблица перестраивается при
+    следующем чтении
+    """
+
+    def __init__(self):
+        self._clans: dict[int, ClanStats] = {}
+        self._version: Optional[int] = None
+        self.rebuilds = 0
+        self.clan_refreshes = 0
+
+    def _current(self) -> dict[int, ClanStats]:
+        snapshot = data_store.get(HOMEWORKS_FILENAME)
+        if snapshot.version != self._version:
+            self._clans = _build_clans(snapshot.data["homeworks"])
+            self._version = snapshot.version
+            self.rebuilds += 1
+        return self._clans
+
+    def counts(self, clan_ids: Iterable[int] = ()) -> list[ClanCounts]:
+        """
+        Счётчики кланов по возрастанию id
+
+        Пустой clan_ids означает "все кланы" (администраторы без кланов);
+        кланы без домашек на проверке не возвращаются
+        """
+        clans = self._current()
+        now = now_utc().timestamp()
+
+        wanted = set(clan_ids)
+        if wanted:
+            selected = sorted(clan_id for clan_id in wanted if clan_id in clans)
+        else:
+            selected = sorted(clans)
+
+        return [clans[clan_id].counts(clan_id, now) for clan_id in selected]
+
+    def apply_clan_refresh(
+        self,
+        clan_ids: Iterable[int],
+        homeworks: Iterable[HomeworkRecord],
+        base_version: Optional[int],
+        version: int,
+        other_changed: frozenset[int] = frozenset()
+    ):
+        """
+        Заменяет счётчики обновлённых кланов
+
+        Args:
+            clan_ids: обновлённые кланы
+            homeworks: их новые домашки
+            base_version: версия снимка, поверх которого сделано обновление
+            version: версия записанного снимка
+            other_changed: кланы, которые снимок перечитал с диска
+                (Snapshot.changed_shards) — их изменил другой процесс
+
+        Если таблица построена не по base_version или в снимок попали
+        чужие изменения, таблица перестроится целиком при следующем чтении
+        """
+        if self._version is None or self._version != base_version:
+            return
+        if other_changed:
+            self._version = None
+            return
+
+        for clan_id in clan_ids:
+            self._clans.pop(clan_id, None)
+        for clan_id, stats in _build_clans(homeworks).items():
+            self._clans[clan_id] = stats
+
+        self._version = version
+        self.clan_refreshes += 1
+
+
+# Глобальная таблица счётчиков
+homework_stats = HomeworkStats()
+
+
+@registry.add_collector
+def _collect_homework_stats():
+    yield (
+        "bot_homework_stats_updates_total", "counter", "Обновления счётчиков домашек по кланам",
+        [
+            ("bot_homework_stats_updates_total", {"kind": "rebuild"}, homework_stats.rebuilds),
+            ("bot_homework_stats_updates_total", {"kind": "clans"}, homework_stats.clan_refreshes),
+        ]
+    )
@@ -1,26 +1,49 @@
 """
-Сервис для обновления домашних заданий конкретных кланов через API
+Сервис для обновления домашних заданий через API
+
+Все обновления в процессе бота (кланы наставника, полная выгрузка из
+админ-панели, скрипт scripts/homeworks.py) идут через общую сессию
+aiohttp и один токен API (api_session) и пишут шарды через data_store,
+поэтому снимок в памяти подменяется сразу после записи.
 """
-import json
 import os
 import asyncio
+import json
+import logging
 import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
 import aiohttp
 from urllib.parse import quote
 
 from src.config.settings import DATA_DIR, BASE_DIR
-from dotenv import load_dotenv
+from src.core.homework_schema import IngestReport, project_homeworks
+from src.core.homework_shards import SHARDS_DIRNAME, clan_priority, read_manifest
+from src.core.metrics import API_REQUEST_DURATION, API_RESPONSES
+from src.core.types import HomeworkRecord, JobProgress
+from src.services.data_loader import data_store
+from src.services.homework_diff import ClanDiff, group_by_clan, merge_clan, merge_clans
+from src.services.homework_stats import homework_stats
+from src.utils.refresh_trace import RefreshTrace, new_trace_path, ms
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 # Конфигурация API
 API_BASE_URL = os.getenv("BASE_URL")
 LOGIN_URL = f"{API_BASE_URL}/login"
 DELAY_BASE = float(os.getenv("DELAY_BASE", 4.5))
 DELAY_JITTER = float(os.getenv("DELAY_JITTER", 1.8))
+DELAY_MIN = float(os.getenv("DELAY_MIN", 1.0))  # минимальная пауза между страницами
+
+# Повторы при 429, 5xx и обрывах соединения
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", 5))
+RETRY_BACKOFF = float(os.getenv("RETRY_BACKOFF", 1.0))  # секунд, удваивается с каждой попыткой
+RATE_LIMIT_DELAY = 60.0  # если API не прислал Retry-After
 
 HOMEWORKS_FILE = DATA_DIR / "homeworks.json"
 
@@ -30,28 +53,143 @@ class HomeworkUpdateError(Exception):
     pass
 
 
+class TokenExpiredError(HomeworkUpdateError):
+    """API ответил 401: токен нужно получить заново"""
+    pass
+
+
+@dataclass
+class FetchStats:
+    """Счётчики запросов к API за одно обновление"""
+    requests: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+
+
+@dataclass(frozen=True)
+class ClanRefresh:
+    """Загрузка домашек одного клана из API"""
+    clan_id: int
+    finished_at: datetime
+    seconds: float
+    pages: int
+    items: int
+
+
+# Последняя загрузка каждого клана в этом процессе, от давних к свежим
+last_clan_refreshes: "OrderedDict[int, ClanRefresh]" = OrderedDict()
+
+
+def record_clan_refresh(refresh: ClanRefresh):
+    last_clan_refreshes.pop(refresh.clan_id, None)
+    last_clan_refreshes[refresh.clan_id] = refresh
+
+
+def parse_retry_after(value: Optional[str], default: float = RATE_LIMIT_DELAY) -> float:
+    """Значение заголовка Retry-After (секунды или HTTP-дата) в секундах"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+
+
 async def login(email: str, password: str, session: aiohttp.ClientSession) -> str:
     """Авторизация и получение токена"""
+    started = time.perf_counter()
+    status = "error"
     try:
         async with session.post(
             LOGIN_URL,
             json={"email": email, "password": password},
             timeout=aiohttp.ClientTimeout(total=15)
         ) as resp:
+            status = str(resp.status)
             resp.raise_for_status()
             data = await resp.json()
             return data["access_token"]
     except Exception as e:
         raise HomeworkUpdateError(f"Ошибка авторизации: {e}")
+    finally:
+        API_REQUEST_DURATION.labels("login").observe(time.perf_counter() - started)
+        API_RESPONSES.labels("login", status).inc()
+
+
+class ApiSession:
+    """
+    Сессия aiohttp и токен API ЕГЭLand, общие для всех обновлений процесса
+
+    Сессия создаётся при первом запросе, авторизация выполняется один раз и
+    повторяется, только если API ответил 401. Закрывается при остановке
+    бота (или в конце скрипта) через close()
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._token: Optional[str] = None
+        self._login_lock = asyncio.Lock()
+
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def token(self, trace: Optional[RefreshTrace] = None) -> str:
+        """Текущий токен; при первом вызове — авторизация"""
+        async with self._login_lock:
+            if self._token is None:
+                email = os.getenv("API_EMAIL")
+                password = os.getenv("API_PASSWORD")
+                if not email or not password:
+                    raise HomeworkUpdateError("API_EMAIL или API_PASSWORD не настроены")
+                started = time.perf_counter()
+                self._token = await login(email, password, self.session())
+                if trace is not None:
+                    trace.emit("login", ms=ms(time.perf_counter() - started))
+            return self._token
+
+    def invalidate(self, token: str):
+        """Сбрасывает токен, если его ещё не обновил другой запрос"""
+        if self._token == token:
+            self._token = None
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+        self._session = None
+        self._token = None
+
+
+# Общая сессия API процесса
+api_session = ApiSession()
 
 
 async def get_clan_homeworks_page(
     token: str, 
     clan_id: int, 
     page: int,
-    session: aiohttp.ClientSession
+    session: aiohttp.ClientSession,
+    stats: Optional[FetchStats] = None,
+    trace: Optional[RefreshTrace] = None
 ) -> tuple[list, dict]:
-    """Получение одной страницы домашних заданий клана"""
+    """
+    Получение одной страницы домашних заданий клана
+
+    На 429 ждёт столько, сколько указано в Retry-After; ошибки 5xx и обрывы
+    соединения повторяет с экспоненциальной паузой, всего до MAX_RETRIES раз.
+    В trace пишется событие page с разбивкой времени страницы
+    """
+    if stats is None:
+        stats = FetchStats()
+    if trace is None:
+        trace = RefreshTrace()
+
     headers = {
         "Authorization": f"Bearer {token}",
         "Accept": "application/json",
@@ -66,33 +204,134 @@ async def get_clan_homeworks_page(
 
     url = f"{API_BASE_URL}/clan/{clan_id}/homeworks"
 
-    try:
-        async with session.get(
-            url, 
-            headers=headers, 
-            params=params, 
-            timeout=aiohttp.ClientTimeout(total=30)
-        ) as resp:
-            if resp.status == 429:
-                await asyncio.sleep(60)
-                return await get_clan_homeworks_page(token, clan_id, page, session)
+    upstream = parse = backoff = 0.0
+    status = "error"
 
-            resp.raise_for_status()
-            data = await resp.json()
-            return data.get("data", []), data.get("meta", {})
+    def emit_page(items: int):
+        trace.emit(
+            "page", clan=clan_id, page=page, items=items,
+            upstream_ms=ms(upstream), parse_ms=ms(parse), backoff_ms=ms(backoff),
+            retries=attempt, status=status
+        )
 
-    except Exception as e:
-        raise HomeworkUpdateError(f"Ошибка загрузки домашек клана {clan_id}: {e}")
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt:
+            stats.retries += 1
+        stats.requests += 1
+        started = time.perf_counter()
+        received = None
+        error = None
+        status = "error"
+
+        try:
+            async with session.get(
+                url, 
+                headers=headers, 
+                params=params, 
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as resp:
+                status = str(resp.status)
+                if resp.status == 429:
+                    stats.rate_limited += 1
+                    delay = parse_retry_after(resp.headers.get("Retry-After"))
+                elif resp.status >= 500:
+                    delay = RETRY_BACKOFF * 2 ** attempt
+                elif resp.status == 401:
+                    raise TokenExpiredError("токен API недействителен")
+                else:
+                    resp.raise_for_status()
+                    body = await resp.read()
+                    received = time.perf_counter()
+                    upstream += received - started
+                    data = json.loads(body)
+                    parse += time.perf_counter() - received
+                    homeworks = data.get("data", [])
+                    emit_page(len(homeworks))
+                    return homeworks, data.get("meta", {})
 
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            delay = RETRY_BACKOFF * 2 ** attempt
+        except Exception as e:
+            error = e
+        finally:
+            elapsed = time.perf_counter() - started
+            if received is None:
+                upstream += elapsed
+            API_REQUEST_DURATION.labels("clan_homeworks").observe(elapsed)
+            API_RESPONSES.labels("clan_homeworks", status).inc()
 
-def add_clan_context(homework: dict, clan_id: int):
-    """Добавляет clan_id к домашке"""
-    homework["clan_id"] = clan_id
+        if error is not None:
+            emit_page(0)
+            if isinstance(error, TokenExpiredError):
+                raise error
+            raise HomeworkUpdateError(f"Ошибка загрузки домашек клана {clan_id}: {error}")
+
+        if attempt < MAX_RETRIES:
+            backoff += delay
+            await asyncio.sleep(delay)
+
+    emit_page(0)
+
+    raise HomeworkUpdateError(
+        f"Ошибка загрузки домашек клана {clan_id}: "
+        f"не удалось получить страницу {page} за {MAX_RETRIES + 1} попыток"
+    )
+
+
+async def fetch_clan_homeworks(
+    clan_id: int,
+    stats: FetchStats,
+    ingest: IngestReport,
+    trace: RefreshTrace
+) -> list[HomeworkRecord]:
+    """
+    Загружает все страницы домашек клана на проверке через api_session
+
+    Если токен истёк, авторизуется заново и повторяет страницу один раз.
+    Загрузка клана попадает в last_clan_refreshes и событие трассы clan
+    """
+    session = api_session.session()
+    records_all: list[HomeworkRecord] = []
+    page = 1
+    clan_started = time.perf_counter()
+
+    while True:
+        token = await api_session.token(trace)
+        try:
+            homeworks, meta = await get_clan_homeworks_page(token, clan_id, page, session, stats, trace)
+        except TokenExpiredError:
+            api_session.invalidate(token)
+            token = await api_session.token(trace)
+            homeworks, meta = await get_clan_homeworks_page(token, clan_id, page, session, stats, trace)
+
+        if not homeworks:
+            break
+
+        # Из ответа API сохраняются только поля схемы
+        records, report = project_homeworks(homeworks, clan_id)
+        ingest.merge(report)
+        records_all.extend(HomeworkRecord.from_stored(record) for record in records)
+
+        if page >= meta.get("last_page", 1):
+            break
+
+        # Случайная задержка
+        sleep_time = max(DELAY_MIN, DELAY_BASE + random.uniform(-DELAY_JITTER, DELAY_JITTER))
+        trace.emit("sleep", clan=clan_id, page=page, ms=ms(sleep_time))
+        await asyncio.sleep(sleep_time)
+        page += 1
+
+    clan_seconds = time.perf_counter() - clan_started
+    trace.emit("clan", clan=clan_id, pages=page, items=len(records_all), ms=ms(clan_seconds))
+    record_clan_refresh(ClanRefresh(clan_id, datetime.now(), clan_seconds, page, len(records_all)))
+    return records_all
 
 
 async def update_homeworks_for_clans(clan_ids: list[int]) -> dict:
     """
     Обновляет домашние задания для указанных кланов
+
+    Ход прогона пишется в трассу data/traces/clans_*.jsonl (см. refresh_trace)
     
     Args:
         clan_ids: список ID кланов для обновления
@@ -103,6 +342,13 @@ async def update_homeworks_for_clans(clan_ids: list[int]) -> dict:
             "success": bool,
             "updated_clans": int,
             "total_homeworks": int,
+            "requests": int,       # запросов страниц к API
+            "retries": int,        # из них повторов
+            "rejected": int,       # домашек, не прошедших проверку схемы
+            "added": int,          # новых сдач на проверку
+            "removed": int,        # проверенных с прошлого обновления
+            "changed": int,        # изменившихся (например, пересданных)
+            "diffs": list[ClanDiff],  # изменения по кланам; пусто, если снимка не было
             "error": Optional[str]
         }
     """
@@ -125,85 +371,241 @@ async def update_homeworks_for_clans(clan_ids: list[int]) -> dict:
             "error": "API_EMAIL или API_PASSWORD не настроены"
         }
     
+    stats = FetchStats()
+    ingest = IngestReport()
+    trace = RefreshTrace(new_trace_path("clans"))
+    run_started = time.perf_counter()
+    trace.emit("run_start", source="updater", clans=len(clan_ids), started_at=datetime.now().isoformat())
+    new_homeworks = []
+
     try:
-        # Создаем сессию для всех запросов
-        async with aiohttp.ClientSession() as session:
-            # Авторизация
-            token = await login(email, password, session)
-            
-            # Загружаем существующие домашки
-            if HOMEWORKS_FILE.exists():
-                with open(HOMEWORKS_FILE, "r", encoding="utf-8") as f:
-                    existing_data = json.load(f)
-                    existing_homeworks = existing_data.get("homeworks", [])
-            else:
-                existing_homeworks = []
-            
-            # Удаляем старые домашки обновляемых кланов
-            other_clans_homeworks = [
-                hw for hw in existing_homeworks
-                if hw.get("clan_id") not in clan_ids
-            ]
-            
-            # Загружаем новые домашки для указанных кланов
-            new_homeworks = []
-            
-            for clan_id in clan_ids:
-                page = 1
-                clan_count = 0
-                
-                while True:
-                    homeworks, meta = await get_clan_homeworks_page(
-                        token, clan_id, page, session
-                    )
-                    
-                    if not homeworks:
-                        break
-                    
-                    for hw in homeworks:
-                        add_clan_context(hw, clan_id)
-                    
-                    new_homeworks.extend(homeworks)
-                    clan_count += len(homeworks)
-                    
-                    last_page = meta.get("last_page", 1)
-                    
-                    if page >= last_page:
-                        break
-                    
-                    page += 1
-                    # Случайная задержка
-                    sleep_time = DELAY_BASE + random.uniform(-DELAY_JITTER, DELAY_JITTER)
-                    await asyncio.sleep(max(1.0, sleep_time))
+        # Загружаем новые домашки для указанных кланов
+        for clan_id in clan_ids:
+            new_homeworks.extend(await fetch_clan_homeworks(clan_id, stats, ingest, trace))
         
-        # Объединяем домашки: старые (других кланов) + новые (обновленных кланов)
-        all_homeworks = other_clans_homeworks + new_homeworks
+        # Снимок, поверх которого пишутся шарды, — перечитываются только
+        # изменившиеся на диске шарды
+        try:
+            base = await data_store.load(HOMEWORKS_FILE.name)
+        except FileNotFoundError:
+            base = None
         
-        # Сохраняем результат
-        result = {
-            "exported_at": datetime.now().isoformat(),
-            "total_pending": len(all_homeworks),
-            "homeworks": all_homeworks
-        }
+        # Перезаписываются только шарды обновлённых кланов; клан без
+        # домашек на проверке получает пустой список и удаляется
+        fresh = {clan_id: [] for clan_id in clan_ids}
+        for hw in new_homeworks:
+            fresh[hw.clan_id].append(hw)
+        shards, diffs = merge_clans(base.data["homeworks"] if base else (), fresh)
+        # Без прошлого снимка все домашки выглядели бы новыми
+        if base is None:
+            diffs = []
+        added = sum(len(diff.added) for diff in diffs)
+        removed = sum(len(diff.removed) for diff in diffs)
+        changed = sum(len(diff.changed) for diff in diffs)
         
-        with open(HOMEWORKS_FILE, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        if ingest.rejected or ingest.repaired:
+            logger.warning(f"Проверка домашек: {ingest.summary()}")
         
-        # Очищаем кэш загрузчика данных
-        from src.services.data_loader import load_json
-        load_json.cache_clear()
+        started = time.perf_counter()
+        snapshot = await data_store.write_shards(HOMEWORKS_FILE.name, shards)
+        # Счётчики остальных кланов не изменились
+        homework_stats.apply_clan_refresh(
+            clan_ids, new_homeworks, base.version if base else None, snapshot.version,
+            snapshot.changed_shards
+        )
+        trace.emit(
+            "write", items=len(new_homeworks), added=added, removed=removed, changed=changed,
+            ms=ms(time.perf_counter() - started)
+        )
+        trace.emit(
+            "run_end", ms=ms(time.perf_counter() - run_started), items=len(new_homeworks),
+            requests=stats.requests, retries=stats.retries, rejected=ingest.rejected, ok=True, error=None
+        )
         
         return {
             "success": True,
             "updated_clans": len(clan_ids),
             "total_homeworks": len(new_homeworks),
+            "requests": stats.requests,
+            "retries": stats.retries,
+            "rejected": ingest.rejected,
+            "added": added,
+            "removed": removed,
+            "changed": changed,
+            "diffs": diffs,
             "error": None
         }
         
     except Exception as e:
+        trace.emit(
+            "run_end", ms=ms(time.perf_counter() - run_started), items=len(new_homeworks),
+            requests=stats.requests, retries=stats.retries, rejected=ingest.rejected, ok=False, error=str(e)
+        )
         return {
             "success": False,
             "updated_clans": 0,
             "total_homeworks": 0,
+            "requests": stats.requests,
+            "retries": stats.retries,
+            "rejected": ingest.rejected,
+            "added": 0,
+            "removed": 0,
+            "changed": 0,
+            "diffs": [],
             "error": str(e)
         }
+
+    finally:
+        trace.close()
+
+
+def mentor_clan_ids(mentors: list[dict]) -> list[int]:
+    """Уникальные кланы всех наставников"""
+    clan_ids = set()
+    for mentor in mentors:
+        for clan in mentor.get("clans_mentor", []):
+            if clan_id := clan.get("id"):
+                clan_ids.add(clan_id)
+    return sorted(clan_ids)
+
+
+async def refresh_all_homeworks(
+    progress: Optional[Callable[[JobProgress], None]] = None,
+    trace_path: Optional[Path] = None,
+    on_diff: Optional[Callable[[ClanDiff], None]] = None
+) -> dict:
+    """
+    Полная выгрузка домашек всех кланов из базы наставников
+
+    Кланы загружаются по приоритету (clan_priority: сначала самые срочные
+    по прошлой выгрузке), и каждый публикуется сразу после загрузки:
+    шард пишется через data_store, снимок в памяти подменяется. Свежие
+    домашки клана сливаются с его домашками в снимке (merge_clan), как и
+    при обновлении кланов наставника. Клан, который не удалось загрузить,
+    остаётся с прошлыми данными; кланы, которых больше нет у наставников,
+    удаляются в конце.
+
+    Отмена (CancelledError) прерывает выгрузку между запросами; уже
+    опубликованные кланы остаются обновлёнными.
+
+    Args:
+        progress: вызывается после каждого клана
+        trace_path: файл JSONL-трассы прогона (None — без трассы)
+        on_diff: вызывается с изменениями каждого опубликованного клана
+            (для уведомлений о новых сдачах); без прошлого снимка не
+            вызывается — все домашки выглядели бы новыми
+
+    Returns:
+        dict с информацией об обновлении:
+        {
+            "success": bool,
+            "updated_clans": int,
+            "failed_clans": list[int],  # оставлены с прошлыми данными
+            "total_homeworks": int,
+            "requests": int,
+            "retries": int,
+            "rejected": int,
+            "added": int,          # новых домашек на проверку
+            "removed": int,        # проверенных с прошлой выгрузки
+            "changed": int,
+            "error": Optional[str]
+        }
+    """
+    stats = FetchStats()
+    ingest = IngestReport()
+    trace = RefreshTrace(trace_path)
+    run_started = time.perf_counter()
+    total = 0
+    failed: list[int] = []
+    updated = 0
+    added = removed = changed = 0
+
+    def finish(ok: bool, error: Optional[str]) -> dict:
+        trace.emit(
+            "run_end", ms=ms(time.perf_counter() - run_started), items=total,
+            requests=stats.requests, retries=stats.retries, rejected=ingest.rejected, ok=ok, error=error
+        )
+        return {
+            "success": ok,
+            "updated_clans": updated,
+            "failed_clans": failed,
+            "total_homeworks": total,
+            "requests": stats.requests,
+            "retries": stats.retries,
+            "rejected": ingest.rejected,
+            "added": added,
+            "removed": removed,
+            "changed": changed,
+            "error": error
+        }
+
+    try:
+        mentors = (await data_store.load("mentors.json")).data["mentors"]
+        # Сначала кланы с самыми срочными домашками по прошлой выгрузке
+        clan_ids = clan_priority(mentor_clan_ids(mentors), read_manifest(DATA_DIR / SHARDS_DIRNAME))
+        # Домашки кланов в снимке до выгрузки — один проход по снимку
+        try:
+            base = await data_store.load(HOMEWORKS_FILE.name)
+        except FileNotFoundError:
+            base = None
+        current = group_by_clan(base.data["homeworks"], clan_ids) if base else None
+        trace.emit("run_start", source="full", clans=len(clan_ids), started_at=datetime.now().isoformat())
+        if progress is not None:
+            progress(JobProgress(total=len(clan_ids), unit="кланов"))
+
+        write_seconds = 0.0
+        for done, clan_id in enumerate(clan_ids, 1):
+            try:
+                records = await fetch_clan_homeworks(clan_id, stats, ingest, trace)
+            except HomeworkUpdateError as e:
+                logger.warning(f"Клан {clan_id} не загружен, остаются прошлые данные: {e}")
+                failed.append(clan_id)
+            else:
+                diff = None
+                if current is not None:
+                    records, diff = merge_clan(clan_id, current.pop(clan_id), records)
+                    added += len(diff.added)
+                    removed += len(diff.removed)
+                    changed += len(diff.changed)
+                # Клан публикуется сразу, не дожидаясь остальных
+                started = time.perf_counter()
+                base_version = data_store.version_of(HOMEWORKS_FILE.name)
+                snapshot = await data_store.write_shards(HOMEWORKS_FILE.name, {clan_id: records})
+                homework_stats.apply_clan_refresh(
+                    [clan_id], records, base_version, snapshot.version, snapshot.changed_shards
+                )
+                elapsed = time.perf_counter() - started
+                write_seconds += elapsed
+                trace.emit("publish", clan=clan_id, items=len(records), ms=ms(elapsed))
+                if diff is not None and on_diff is not None:
+                    on_diff(diff)
+                total += len(records)
+                updated += 1
+
+            if progress is not None:
+                progress(JobProgress(
+                    done=done, total=len(clan_ids), unit="кланов", items=total,
+                    failed=len(failed), current=f"клан {clan_id}"
+                ))
+
+        # Кланы, которых больше нет у наставников
+        manifest = read_manifest(DATA_DIR / SHARDS_DIRNAME) or {"clans": {}}
+        stale = set(manifest["clans"]) - {str(clan_id) for clan_id in clan_ids}
+        if stale:
+            started = time.perf_counter()
+            await data_store.write_shards(HOMEWORKS_FILE.name, {int(key): [] for key in stale})
+            write_seconds += time.perf_counter() - started
+        trace.emit("write", items=total, ms=ms(write_seconds))
+
+        if ingest.rejected or ingest.repaired:
+            logger.warning(f"Проверка домашек: {ingest.summary()}")
+        return finish(True, None)
+
+    except asyncio.CancelledError:
+        finish(False, "cancelled")
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка полной выгрузки домашек: {e}", exc_info=True)
+        return finish(False, str(e))
+    finally:
+        trace.close()
@@ -0,0 +1,214 @@
+"""
+Сервис обновления базы наставников через API
+
+Загружает всех наставников постранично через общую сессию API
+(api_session), оставляет тех, у кого есть Telegram и кланы, и записывает
+mentors.json через data_store: снимок, индекс пользователей и аудитория
+рассылок обновляются сразу после записи.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+import aiohttp
+
+from src.core.metrics import API_REQUEST_DURATION, API_RESPONSES
+from src.core.types import JobProgress
+from src.services.data_loader import data_store
+from src.services.homework_updater import (
+    API_BASE_URL,
+    MAX_RETRIES,
+    RETRY_BACKOFF,
+    HomeworkUpdateError,
+    TokenExpiredError,
+    api_session,
+    parse_retry_after,
+)
+
+logger = logging.getLogger(__name__)
+
+MENTORS_URL = f"{API_BASE_URL}/mentors"
+PER_PAGE = int(os.getenv("PER_PAGE", 200))
+DELAY = float(os.getenv("DELAY", 1.0))  # пауза между страницами
+RATE_LIMIT_DELAY = 25.0  # если API не прислал Retry-After
+
+MENTORS_FILE = "mentors.json"
+
+
+def clean_mentor(mentor: dict) -> dict:
+    """Приводим данные наставника к удобному виду"""
+    return {
+        "id": mentor.get("id"),
+        "first_name": mentor.get("first_name"),
+        "last_name": mentor.get("last_name"),
+        "full_name": f"{mentor.get('first_name', '')} {mentor.get('last_name', '')}".strip(),
+        "email": mentor.get("email"),
+        "phone": mentor.get("phone"),
+        "vk_id": mentor.get("vk_id"),
+        "telegram_id": mentor.get("telegram_id"),
+        "telegram_tag": mentor.get("telegram_tag"),
+        "clans_mentor": [
+            {
+                "id": c.get("id"),
+                "name": c.get("name"),
+                "slogan": c.get("slogan"),
+                "target": c.get("target"),
+                "class": c.get("class"),
+                "max_students_count": c.get("max_students_count"),
+            }
+            for c in mentor.get("clansMentor", [])
+        ],
+        "courses": [
+            {
+                "id": course.get("id"),
+                "name": course.get("name"),
+                "subject": course.get("subject", {}).get("name")
+                if course.get("subject") else None,
+            }
+            for course in mentor.get("courses", [])
+        ],
+    }
+
+
+def has_telegram_and_clans(mentor: dict) -> bool:
+    """Наставник может пользоваться ботом: указан Telegram и есть кланы"""
+    return mentor.get("telegram_tag") not in (None, "") and bool(mentor.get("clans_mentor"))
+
+
+async def get_mentors_page(token: str, page: int, session: aiohttp.ClientSession) -> dict:
+    """
+    Получение одной страницы наставников
+
+    На 429 ждёт Retry-After, ошибки 5xx и обрывы соединения повторяет с
+    экспоненциальной паузой, всего до MAX_RETRIES раз
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    params = {
+        "page": page,
+        "per_page": PER_PAGE,
+    }
+
+    for attempt in range(MAX_RETRIES + 1):
+        started = time.perf_counter()
+        status = "error"
+        try:
+            async with session.get(
+                MENTORS_URL,
+                headers=headers,
+                params=params,
+                timeout=aiohttp.ClientTimeout(total=15)
+            ) as resp:
+                status = str(resp.status)
+                if resp.status == 429:
+                    delay = parse_retry_after(resp.headers.get("Retry-After"), RATE_LIMIT_DELAY)
+                elif resp.status == 401:
+                    raise TokenExpiredError("токен API недействителен")
+                elif resp.status >= 500:
+                    delay = RETRY_BACKOFF * 2 ** attempt
+                else:
+                    resp.raise_for_status()
+                    return await resp.json()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            delay = RETRY_BACKOFF * 2 ** attempt
+        except aiohttp.ClientResponseError as e:
+            raise HomeworkUpdateError(f"Ошибка загрузки наставников, страница {page}: {e}")
+        finally:
+            API_REQUEST_DURATION.labels("mentors").observe(time.perf_counter() - started)
+            API_RESPONSES.labels("mentors", status).inc()
+
+        if attempt < MAX_RETRIES:
+            await asyncio.sleep(delay)
+
+    raise HomeworkUpdateError(
+        f"Ошибка загрузки наставников: не удалось получить страницу {page} за {MAX_RETRIES + 1} попыток"
+    )
+
+
+async def refresh_mentors(progress: Optional[Callable[[JobProgress], None]] = None) -> dict:
+    """
+    Загружает всех наставников и записывает mentors.json
+
+    Файл пишется один раз в конце, поэтому при ошибке или отмене
+    (CancelledError) остаётся прежняя база
+
+    Args:
+        progress: вызывается после каждой страницы
+
+    Returns:
+        dict с информацией об обновлении:
+        {
+            "success": bool,
+            "pages": int,
+            "total_mentors": int,  # уникальных наставников в API
+            "saved_mentors": int,  # из них с Telegram и кланами
+            "error": Optional[str]
+        }
+    """
+    mentors: list[dict] = []
+    seen_ids = set()
+    page = 1
+    last_meta = {}
+
+    try:
+        session = api_session.session()
+        while True:
+            token = await api_session.token()
+            try:
+                data = await get_mentors_page(token, page, session)
+            except TokenExpiredError:
+                api_session.invalidate(token)
+                data = await get_mentors_page(await api_session.token(), page, session)
+
+            page_mentors = data.get("data", [])
+            last_meta = data.get("meta", {})
+            if not page_mentors:
+                break
+
+            for mentor in page_mentors:
+                mid = mentor.get("id")
+                if mid and mid not in seen_ids:
+                    seen_ids.add(mid)
+                    mentors.append(clean_mentor(mentor))
+
+            last_page = last_meta.get("last_page", page)
+            if progress is not None:
+                progress(JobProgress(done=page, total=last_page, unit="страниц", items=len(mentors)))
+
+            if page >= last_page:
+                break
+
+            page += 1
+            await asyncio.sleep(DELAY)
+
+        # Наставники без Telegram или без кланов боту не нужны
+        saved = [mentor for mentor in mentors if has_telegram_and_clans(mentor)]
+        result = {
+            "export_date": datetime.now().isoformat(),
+            "total_unique_mentors": len(saved),
+            "total_from_meta": last_meta.get("total"),
+            "per_page": PER_PAGE,
+            "mentors": saved,
+        }
+        await data_store.write(MENTORS_FILE, result, indent=2)
+        logger.info(f"База наставников обновлена: {len(saved)} из {len(mentors)}")
+
+        return {
+            "success": True,
+            "pages": page,
+            "total_mentors": len(mentors),
+            "saved_mentors": len(saved),
+            "error": None
+        }
+
+    except Exception as e:
+        logger.error(f"Ошибка обновления базы наставников: {e}", exc_info=True)
+        return {
+            "success": False,
+            "pages": page,
+            "total_mentors": len(mentors),
+            "saved_mentors": 0,
+            "error": str(e)
+        }
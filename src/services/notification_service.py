@@ -1,20 +1,36 @@
+import asyncio
+import logging
 from datetime import datetime, timedelta
+from typing import Iterable
+from aiogram.exceptions import TelegramRetryAfter
+
+from src.core.metrics import NOTIFICATION_QUEUE_DEPTH, NOTIFICATIONS_SENT
 from src.services.data_loader import get_homeworks
 from src.services.auth_service import get_mentor_telegram_ids_by_clan
-from src.utils.datetime import parse_delivery_date, hours_left_to_deadline
+from src.services.homework_diff import ClanDiff
+from src.utils.datetime import hours_left_to_deadline
 from src.utils.telegram import escape_html
 
+logger = logging.getLogger(__name__)
+
+# Лимит Telegram — около 30 сообщений в секунду в разные чаты
+BROADCAST_BATCH_SIZE = 25
+BROADCAST_BATCH_INTERVAL = 1.0
+# Сколько раз повторять сообщение после ответа 429
+BROADCAST_MAX_RETRIES = 3
+# Сколько новых домашек перечислять в одном уведомлении
+NEW_SUBMISSIONS_LIST_LIMIT = 10
+
 
 def get_pending_notifications() -> list[tuple[str, str]]:
     now = datetime.now()
     notifications = []
     
     for hw in get_homeworks():
-        if hw.get("status") != "Ожидает проверки":
+        if hw.status != "Ожидает проверки":
             continue
             
-        delivery = parse_delivery_date(hw["delivery_date"])
-        hours_left = hours_left_to_deadline(delivery, now)
+        hours_left = hours_left_to_deadline(hw.delivery, now)
         
         # Окна отправки с небольшой гистерезисом, чтобы не спамить
         if 23.7 <= hours_left <= 24.3:
@@ -24,18 +40,12 @@ def get_pending_notifications() -> list[tuple[str, str]]:
         else:
             continue
             
-        clan_id = hw["clan_id"]
+        clan_id = hw.clan_id
         tg_ids = get_mentor_telegram_ids_by_clan(clan_id)
         
-        student = (hw["user"]["first_name"] + " " + hw["user"].get("last_name", "")).strip() or "??"
-        
-        # Используем lesson.topic вместо type.name
-        lesson = hw["homework"].get("lesson", {})
-        task = lesson.get("topic", hw["homework"]["type"]["name"])  # fallback на type.name
-        
         # Экранируем HTML-спецсимволы
-        student_safe = escape_html(student)
-        task_safe = escape_html(task)
+        student_safe = escape_html(hw.student)
+        task_safe = escape_html(hw.task_name)
         
         text = (
             f"⚠️ Напоминание\n"
@@ -48,4 +58,139 @@ def get_pending_notifications() -> list[tuple[str, str]]:
         for tg_id in tg_ids:
             notifications.append((tg_id, text))
     
-    return notifications
\ No newline at end of file
+    return notifications
+
+
+def get_new_submission_notifications(
+    diffs: Iterable[ClanDiff],
+    exclude: Iterable[int | str] = ()
+) -> list[tuple[str, str]]:
+    """
+    Уведомления наставникам о новых домашках на проверку
+
+    Одно сообщение на клан и наставника: новые домашки по дате сдачи,
+    не больше NEW_SUBMISSIONS_LIST_LIMIT строк
+
+    Args:
+        diffs: изменения кланов после обновления (см. homework_diff)
+        exclude: telegram_id, которым не отправлять (например, тому, кто
+            запустил обновление и уже видит итог)
+    """
+    excluded = {str(tg_id) for tg_id in exclude}
+    notifications = []
+
+    for diff in diffs:
+        if not diff.added:
+            continue
+        tg_ids = [tg_id for tg_id in get_mentor_telegram_ids_by_clan(diff.clan_id) if tg_id not in excluded]
+        if not tg_ids:
+            continue
+
+        added = sorted(diff.added, key=lambda hw: hw.delivery)
+        lines = [
+            f"• {escape_html(hw.student)} — {escape_html(hw.task_name)}"
+            for hw in added[:NEW_SUBMISSIONS_LIST_LIMIT]
+        ]
+        if len(added) > NEW_SUBMISSIONS_LIST_LIMIT:
+            lines.append(f"…и ещё {len(added) - NEW_SUBMISSIONS_LIST_LIMIT}")
+
+        text = (
+            f"📥 Новые домашки на проверку: {len(added)}\n"
+            f"Клан: {diff.clan_id}\n\n"
+            + "\n".join(lines)
+        )
+
+        for tg_id in tg_ids:
+            notifications.append((tg_id, text))
+
+    return notifications
+
+
+async def _send_with_retry(bot, chat_id: int | str, text: str):
+    """Отправляет сообщение, выжидая retry_after при ответе 429"""
+    for attempt in range(BROADCAST_MAX_RETRIES + 1):
+        try:
+            return await bot.send_message(chat_id, text)
+        except TelegramRetryAfter as e:
+            if attempt == BROADCAST_MAX_RETRIES:
+                raise
+            NOTIFICATIONS_SENT.labels("retried").inc()
+            await asyncio.sleep(e.retry_after)
+
+
+async def send_messages(
+    bot,
+    messages: Iterable[tuple[int | str, str]],
+    batch_size: int = BROADCAST_BATCH_SIZE,
+    batch_interval: float = BROADCAST_BATCH_INTERVAL
+) -> tuple[int, int]:
+    """
+    Отправляет сообщения (chat_id, текст) пачками
+
+    Сообщения внутри пачки отправляются параллельно, между пачками
+    выдерживается пауза, чтобы не превысить лимиты Telegram. На ответ 429
+    сообщение повторяется после указанного Telegram retry_after
+
+    Args:
+        bot: экземпляр бота
+        messages: пары (telegram_id получателя, текст)
+        batch_size: количество одновременных отправок
+        batch_interval: пауза между пачками в секундах
+
+    Returns:
+        (успешно отправлено, ошибок)
+    """
+    messages = list(messages)
+    sent_count = 0
+    failed_count = 0
+    # Глубина очереди рассылки: сообщения, которые ещё не отправлены
+    NOTIFICATION_QUEUE_DEPTH.inc(len(messages))
+    processed = 0
+
+    try:
+        for start in range(0, len(messages), batch_size):
+            batch = messages[start:start + batch_size]
+            results = await asyncio.gather(
+                *(_send_with_retry(bot, chat_id, text) for chat_id, text in batch),
+                return_exceptions=True
+            )
+
+            for (chat_id, _), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    failed_count += 1
+                    NOTIFICATIONS_SENT.labels("failed").inc()
+                    logger.error(f"Не удалось отправить уведомление {chat_id}: {result}")
+                else:
+                    sent_count += 1
+                    NOTIFICATIONS_SENT.labels("sent").inc()
+
+            processed += len(batch)
+            NOTIFICATION_QUEUE_DEPTH.dec(len(batch))
+
+            if start + batch_size < len(messages):
+                await asyncio.sleep(batch_interval)
+    finally:
+        NOTIFICATION_QUEUE_DEPTH.dec(len(messages) - processed)
+
+    return sent_count, failed_count
+
+
+async def broadcast(
+    bot,
+    recipients: Iterable[int | str],
+    text: str,
+    batch_size: int = BROADCAST_BATCH_SIZE,
+    batch_interval: float = BROADCAST_BATCH_INTERVAL
+) -> tuple[int, int]:
+    """
+    Рассылает одно сообщение списку получателей (см. send_messages)
+
+    Returns:
+        (успешно отправлено, ошибок)
+    """
+    return await send_messages(
+        bot,
+        ((chat_id, text) for chat_id in recipients),
+        batch_size=batch_size,
+        batch_interval=batch_interval
+    )
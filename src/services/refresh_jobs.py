@@ -0,0 +1,167 @@
+"""
+Фоновые задачи обновления данных в процессе бота
+
+Полная выгрузка домашек и обновление базы наставников запускаются из
+админ-панели как asyncio-задачи, а не подпроцессами: они используют общую
+сессию и токен API и пишут данные через data_store, поэтому снимки
+подменяются сразу, без перезапуска интерпретатора и повторной загрузки.
+
+Задача сообщает прогресс (JobProgress) синхронным вызовом; отдельный
+наблюдатель раз в PROGRESS_INTERVAL секунд передаёт изменившийся прогресс
+в on_progress (правка сообщения администратора) и проверяет флаг отмены.
+Флаг хранится в shared_state, поэтому отменить задачу можно из любого
+процесса бота; задача своего процесса отменяется сразу.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from src.core.shared_state import lock_owner, shared_state, WORKER_ID
+from src.core.types import JobProgress, ProgressCallback
+
+logger = logging.getLogger(__name__)
+
+# Задача дольше TTL считается зависшей, и её блокировка снимается
+JOB_LOCK_TTL = 3 * 60 * 60
+# Как часто передавать прогресс и проверять флаг отмены, секунд
+PROGRESS_INTERVAL = 5.0
+
+
+class RefreshJob:
+    """Запущенная задача обновления"""
+
+    def __init__(self, name: str, title: str, owner: str):
+        self.name = name
+        self.title = title
+        self.owner = owner  # владелец блокировки задачи
+        self.progress = JobProgress()
+        self.cancelled = False
+        self.task: Optional[asyncio.Task] = None
+        self._started = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    def report(self, progress: JobProgress):
+        self.progress = progress
+
+
+def _lock_name(name: str) -> str:
+    return f"refresh_job:{name}"
+
+
+def _cancel_key(name: str) -> str:
+    return f"refresh_job_cancel:{name}"
+
+
+class RefreshJobs:
+    """Задачи обновления процесса; одна задача каждого вида на все процессы"""
+
+    def __init__(self):
+        self._jobs: dict[str, RefreshJob] = {}
+
+    def get(self, name: str) -> Optional[RefreshJob]:
+        """Задача name, если она выполняется в этом процессе"""
+        return self._jobs.get(name)
+
+    async def is_running(self, name: str) -> bool:
+        """Выполняется ли задача name в каком-либо процессе бота"""
+        return await shared_state.is_locked(_lock_name(name))
+
+    async def start(
+        self,
+        name: str,
+        title: str,
+        run: Callable[[ProgressCallback], Awaitable[Any]],
+        on_progress: Callable[[RefreshJob], Awaitable[None]],
+        on_done: Callable[[RefreshJob, Any, Optional[BaseException]], Awaitable[None]]
+    ) -> Optional[RefreshJob]:
+        """
+        Запускает задачу в фоне
+
+        Args:
+            name: вид задачи ("homeworks", "mentors")
+            title: название для сообщений
+            run: корутина задачи; получает функцию для сообщения прогресса
+            on_progress: вызывается, когда прогресс изменился
+            on_done: вызывается в конце с результатом run или ошибкой;
+                при отмене job.cancelled = True
+
+        Returns:
+            задача или None, если задача этого вида уже выполняется
+        """
+        owner = lock_owner()
+        if not await shared_state.acquire_lock(_lock_name(name), owner, JOB_LOCK_TTL):
+            return None
+        # Флаг мог остаться от процесса, остановленного во время отмены
+        await shared_state.set_value(_cancel_key(name), None)
+
+        job = self._jobs[name] = RefreshJob(name, title, owner)
+        job.task = asyncio.create_task(self._run(job, run, on_progress, on_done))
+        return job
+
+    async def cancel(self, name: str) -> bool:
+        """
+        Просит остановить задачу name
+
+        Returns:
+            False, если такая задача нигде не выполняется
+        """
+        if not await self.is_running(name):
+            return False
+        await shared_state.set_value(_cancel_key(name), WORKER_ID)
+        job = self._jobs.get(name)
+        if job is not None and job.task is not None:
+            job.task.cancel()
+        return True
+
+    async def shutdown(self):
+        """Отменяет задачи процесса и дожидается их завершения"""
+        tasks = [job.task for job in self._jobs.values() if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _watch(self, job: RefreshJob, on_progress: Callable[[RefreshJob], Awaitable[None]]):
+        reported = None
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            if await shared_state.get_value(_cancel_key(job.name)):
+                job.task.cancel()
+                return
+            if job.progress != reported:
+                reported = job.progress
+                try:
+                    await on_progress(job)
+                except Exception as e:
+                    logger.warning(f"Не удалось показать прогресс {job.name}: {e}")
+
+    async def _run(self, job, run, on_progress, on_done):
+        watcher = asyncio.create_task(self._watch(job, on_progress))
+        result = None
+        error = None
+        try:
+            result = await run(job.report)
+        except asyncio.CancelledError:
+            job.cancelled = True
+            logger.info(f"Задача {job.name} отменена")
+        except Exception as e:
+            error = e
+            logger.error(f"Ошибка задачи {job.name}: {e}", exc_info=True)
+        finally:
+            watcher.cancel()
+            await asyncio.gather(watcher, return_exceptions=True)
+            self._jobs.pop(job.name, None)
+            await shared_state.set_value(_cancel_key(job.name), None)
+            await shared_state.release_lock(_lock_name(job.name), job.owner)
+
+        try:
+            await on_done(job, result, error)
+        except Exception as e:
+            logger.error(f"Не удалось сообщить о завершении {job.name}: {e}")
+
+
+# Задачи обновления процесса бота
+refresh_jobs = RefreshJobs()
@@ -0,0 +1,79 @@
+"""
+Кэш готовых текстов для экранов с домашками
+
+Текст экранов "Информация по домашкам" и "Истекающие домашки" зависит
+только от набора кланов пользователя, версии данных и текущего времени
+(с точностью до минуты). Ключ кэша — (экран, frozenset кланов, версия,
+временная корзина), поэтому наставники с одинаковыми кланами получают
+один и тот же готовый текст, а смена снимка данных сбрасывает кэш.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable
+
+from src.core.metrics import registry
+from src.services.data_loader import data_store, register_cache
+from src.utils.datetime import now_utc
+
+# Размер временной корзины: в её пределах текст считается актуальным
+TIME_BUCKET_SECONDS = 60
+
+
+class RenderCache:
+    """Ограниченный LRU-кэш отрисованных текстов"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_render(self, key: Hashable, render: Callable[[], Any]) -> Any:
+        entries = self._entries
+        try:
+            value = entries[key]
+        except KeyError:
+            self.misses += 1
+            value = render()
+            entries[key] = value
+            if len(entries) > self.maxsize:
+                entries.popitem(last=False)
+            return value
+
+        self.hits += 1
+        entries.move_to_end(key)
+        return value
+
+    def cache_clear(self):
+        """Сбрасывает кэш (интерфейс как у functools.lru_cache)"""
+        self._entries.clear()
+
+
+render_cache = register_cache(RenderCache())
+
+
+@registry.add_collector
+def _collect_render_cache():
+    yield (
+        "bot_render_cache_requests_total", "counter", "Обращения к кэшу отрисовки экранов",
+        [
+            ("bot_render_cache_requests_total", {"result": "hit"}, render_cache.hits),
+            ("bot_render_cache_requests_total", {"result": "miss"}, render_cache.misses),
+        ]
+    )
+    yield (
+        "bot_render_cache_entries", "gauge", "Записей в кэше отрисовки",
+        [("bot_render_cache_entries", {}, len(render_cache))]
+    )
+
+
+def render_key(view: str, clan_ids: Iterable[int]) -> tuple:
+    """
+    Ключ кэша для экрана
+
+    Пустой набор кланов означает "все кланы" (администраторы без кланов)
+    """
+    bucket = int(now_utc().timestamp()) // TIME_BUCKET_SECONDS
+    return view, frozenset(clan_ids), data_store.version, bucket
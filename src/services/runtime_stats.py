@@ -0,0 +1,150 @@
+"""
+Сводка состояния бота для администраторов (/stats)
+
+Все значения уже лежат в памяти процесса: снимки data_store, счётчики
+кэшей, метрики реестра, монитор event loop и журнал загрузок кланов.
+Сводка не читает файлы данных и не обходит домашки, поэтому её стоимость
+не зависит от объёма данных.
+"""
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Optional
+
+from src.core.metrics import HANDLER_DURATION, NOTIFICATION_QUEUE_DEPTH, registry
+from src.services.data_loader import data_store, registered_caches
+from src.services.homework_updater import last_clan_refreshes
+from src.services.render_cache import render_cache
+from src.utils.loop_monitor import loop_monitor
+from src.utils.telegram import escape_html
+
+# Сколько последних обновлений кланов и самых медленных хендлеров показывать
+RECENT_CLAN_REFRESHES = 10
+SLOWEST_HANDLERS = 3
+
+
+def process_rss_bytes() -> Optional[int]:
+    """
+    Текущий RSS процесса из /proc (Linux); на других системах — пиковый
+    RSS из getrusage, None если узнать нельзя
+    """
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: байты на macOS, килобайты на Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@registry.add_collector
+def _collect_process():
+    rss = process_rss_bytes()
+    if rss is not None:
+        yield (
+            "process_resident_memory_bytes", "gauge", "Резидентная память процесса",
+            [("process_resident_memory_bytes", {}, rss)]
+        )
+
+
+def _format_size(size: float) -> str:
+    if size >= 2**20:
+        return f"{size / 2**20:.1f} МБ"
+    return f"{size / 1024:.0f} КБ"
+
+
+def _format_age(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f} с"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} мин"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} ч"
+    return f"{seconds / 86400:.1f} дн"
+
+
+def _hit_rate(hits: int, misses: int) -> str:
+    total = hits + misses
+    if not total:
+        return "обращений не было"
+    return f"{hits * 100 / total:.0f}% попаданий ({hits}/{total})"
+
+
+def _snapshot_lines() -> list[str]:
+    now = time.time()
+    lines = [
+        f"• {escape_html(s.filename)}: v{s.version}, {_format_age(now - s.mtime)} назад, "
+        f"{_format_size(s.size)}, загрузка {s.load_seconds * 1000:.0f} мс"
+        for s in sorted(data_store.snapshots(), key=lambda s: s.filename)
+    ]
+    return lines or ["• не загружены"]
+
+
+def _cache_lines() -> list[str]:
+    lines = [f"• экраны: {_hit_rate(render_cache.hits, render_cache.misses)}"]
+    for cached in registered_caches():
+        # Производные индексы на functools.lru_cache
+        cache_info = getattr(cached, "cache_info", None)
+        if cache_info is None:
+            continue
+        info = cache_info()
+        lines.append(f"• {escape_html(cached.__name__)}: {_hit_rate(info.hits, info.misses)}")
+    return lines
+
+
+def _clan_refresh_lines() -> list[str]:
+    if not last_clan_refreshes:
+        return ["• с запуска бота не было"]
+    lines = []
+    for refresh in reversed(last_clan_refreshes.values()):
+        lines.append(
+            f"• клан {refresh.clan_id}: {refresh.seconds:.1f} с, {refresh.pages} стр., "
+            f"{refresh.items} дз, {refresh.finished_at:%d.%m %H:%M}"
+        )
+        if len(lines) == RECENT_CLAN_REFRESHES:
+            break
+    return lines
+
+
+def _handler_lines() -> list[str]:
+    total = HANDLER_DURATION.merged()
+    p95 = total.quantile(0.95)
+    if p95 is None:
+        return ["• вызовов не было"]
+    lines = [f"• p95 всех: {p95 * 1000:.0f} мс ({total.count} вызовов)"]
+
+    by_handler = [
+        (child.quantile(0.95), values[0], child.count)
+        for values, child in HANDLER_DURATION.children().items()
+        if child.count
+    ]
+    for handler_p95, name, count in sorted(by_handler, reverse=True)[:SLOWEST_HANDLERS]:
+        lines.append(f"• {escape_html(name)}: p95 {handler_p95 * 1000:.0f} мс ({count})")
+    return lines
+
+
+def render_runtime_stats() -> str:
+    """Текст сводки для /stats"""
+    rss = process_rss_bytes()
+    sections = [
+        f"📊 <b>Состояние бота</b> на {datetime.now():%d.%m.%Y %H:%M:%S}",
+        "<b>Снимки данных</b> (версия данных v{}):\n{}".format(
+            data_store.version, "\n".join(_snapshot_lines())
+        ),
+        "<b>Кэши</b>:\n" + "\n".join(_cache_lines()),
+        "<b>Последние загрузки кланов</b>:\n" + "\n".join(_clan_refresh_lines()),
+        "<b>Хендлеры</b>:\n" + "\n".join(_handler_lines()),
+        (
+            f"📨 Очередь рассылки: {NOTIFICATION_QUEUE_DEPTH.value:.0f}\n"
+            f"⏱ Задержка event loop: сейчас {loop_monitor.last_lag * 1000:.0f} мс, "
+            f"максимум {loop_monitor.max_lag * 1000:.0f} мс\n"
+            f"💾 Память процесса: {_format_size(rss) if rss is not None else 'неизвестно'}"
+        ),
+    ]
+    return "\n\n".join(sections)
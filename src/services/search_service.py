@@ -0,0 +1,164 @@
+"""
+Поиск домашек на проверке по ученику и теме урока
+
+Для inline-режима (@bot Ива…): каждое нажатие клавиши — отдельный
+запрос, поэтому поиск идёт по префиксному индексу, а не перебором.
+
+Имя, фамилия и тема (или тип задания) разбиваются на слова, слова
+нормализуются (casefold, ё → е). Индекс — отсортированный список слов и
+параллельный список домашек с этим словом, упорядоченных по дате сдачи;
+слова с префиксом запроса занимают в нём непрерывный отрезок, который
+находится бинарным поиском. Списки отрезка сливаются (heapq.merge) от
+самых срочных домашек, поэтому поиск останавливается, как только набрано
+нужное число результатов, даже для запроса из одной буквы.
+
+Индексы строятся на снимок данных: по одному на клан (для наставников)
+и общий (для администраторов без кланов), лениво при первом запросе.
+"""
+import heapq
+import re
+import sys
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+from src.core.types import HomeworkRecord
+from src.services.data_loader import get_homeworks, register_cache
+from src.utils.profiling import timed
+
+PENDING_STATUS = "Ожидает проверки"
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text: Optional[str]) -> list[str]:
+    """Слова текста в виде для индекса: регистр сложен, ё заменена на е"""
+    if not text:
+        return []
+    return _WORD.findall(text.casefold().replace("ё", "е"))
+
+
+def _delivery(hw: HomeworkRecord):
+    return hw.delivery
+
+
+def record_words(hw: HomeworkRecord) -> set[str]:
+    return {
+        *normalize(hw.first_name),
+        *normalize(hw.last_name),
+        *normalize(hw.task_name),
+    }
+
+
+class PrefixIndex:
+    """
+    Отсортированные слова и домашки, в которых они встречаются
+
+    record_words — слова каждой домашки по её id, чтобы проверять
+    остальные слова запроса без повторной нормализации
+    """
+
+    __slots__ = ("words", "postings", "record_words")
+
+    def __init__(self, homeworks: Iterable[HomeworkRecord]):
+        by_word: dict[str, list[HomeworkRecord]] = {}
+        self.record_words: dict[int, tuple[str, ...]] = {}
+        # Одна сортировка вместо сортировки списка каждого слова
+        for hw in sorted(homeworks, key=_delivery):
+            words = tuple(sys.intern(word) for word in record_words(hw))
+            self.record_words[hw.id] = words
+            for word in words:
+                by_word.setdefault(word, []).append(hw)
+
+        self.words = sorted(by_word)
+        self.postings = [tuple(by_word[word]) for word in self.words]
+
+    def matches(self, hw: HomeworkRecord, terms: list[str]) -> bool:
+        """Каждое слово из terms — начало какого-то слова домашки"""
+        words = self.record_words[hw.id]
+        return all(any(word.startswith(term) for word in words) for term in terms)
+
+    def prefix_postings(self, prefix: str) -> list[tuple[HomeworkRecord, ...]]:
+        """Списки домашек (по дате сдачи) всех слов, начинающихся с prefix"""
+        words = self.words
+        start = i = bisect_left(words, prefix)
+        while i < len(words) and words[i].startswith(prefix):
+            i += 1
+        return self.postings[start:i]
+
+
+class HomeworkSearch:
+    """Индексы поиска по текущему снимку; сбрасываются при смене снимка"""
+
+    def __init__(self):
+        self._by_clan: Optional[dict[int, list[HomeworkRecord]]] = None
+        self._clan_indexes: dict[int, PrefixIndex] = {}
+        self._all: Optional[PrefixIndex] = None
+
+    def cache_clear(self):
+        """Сбрасывает индексы (интерфейс как у functools.lru_cache)"""
+        self._by_clan = None
+        self._clan_indexes = {}
+        self._all = None
+
+    def _clan_index(self, clan_id: int) -> PrefixIndex:
+        index = self._clan_indexes.get(clan_id)
+        if index is None:
+            if self._by_clan is None:
+                by_clan: dict[int, list[HomeworkRecord]] = {}
+                for hw in get_homeworks():
+                    if hw.status == PENDING_STATUS:
+                        by_clan.setdefault(hw.clan_id, []).append(hw)
+                self._by_clan = by_clan
+            index = self._clan_indexes[clan_id] = PrefixIndex(self._by_clan.get(clan_id, ()))
+        return index
+
+    def _all_index(self) -> PrefixIndex:
+        if self._all is None:
+            self._all = PrefixIndex(hw for hw in get_homeworks() if hw.status == PENDING_STATUS)
+        return self._all
+
+    @timed("search_homeworks")
+    def search(self, query: str, clan_ids: tuple[int, ...], limit: int = 50) -> list[HomeworkRecord]:
+        """
+        Домашки, у которых каждое слово запроса — начало какого-то слова
+        имени, фамилии или темы
+
+        Args:
+            query: текст запроса
+            clan_ids: кланы пользователя; пустой кортеж — все кланы
+            limit: сколько домашек вернуть
+
+        Returns:
+            limit самых срочных (раньше сданных) из всех подходящих
+        """
+        terms = normalize(query)
+        if not terms:
+            return []
+
+        # Самое длинное слово запроса даёт самый короткий отрезок индекса
+        lead = max(terms, key=len)
+        rest = [term for term in terms if term is not lead]
+
+        if clan_ids:
+            indexes = {clan_id: self._clan_index(clan_id) for clan_id in clan_ids}
+        else:
+            indexes = {None: self._all_index()}
+        postings = [posting for index in indexes.values() for posting in index.prefix_postings(lead)]
+
+        # Домашка встречается в списках нескольких слов с префиксом
+        seen: set[int] = set()
+        found: list[HomeworkRecord] = []
+        for hw in heapq.merge(*postings, key=_delivery):
+            if hw.id in seen:
+                continue
+            seen.add(hw.id)
+            index = indexes[hw.clan_id] if clan_ids else indexes[None]
+            if rest and not index.matches(hw, rest):
+                continue
+            found.append(hw)
+            if len(found) >= limit:
+                break
+        return found
+
+
+homework_search = register_cache(HomeworkSearch())
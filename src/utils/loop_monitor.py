@@ -0,0 +1,79 @@
+"""
+Мониторинг блокировок event loop
+
+Фоновая задача регулярно засыпает на interval секунд и измеряет, насколько
+позже она просыпается. Опоздание — время, в течение которого loop был занят
+синхронной работой (разбор JSON, тяжёлые вычисления в хендлерах и т.п.)
+"""
+import asyncio
+import logging
+import time
+
+from src.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Измеряет задержки event loop"""
+
+    def __init__(self, interval: float = 0.1, warn_threshold: float = 0.1):
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_blocked = 0.0
+        self.samples = 0
+        self._task: asyncio.Task | None = None
+
+    def reset(self):
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_blocked = 0.0
+        self.samples = 0
+
+    def _record(self, lag: float):
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self.total_blocked += lag
+        self.samples += 1
+        if lag >= self.warn_threshold:
+            logger.warning(f"Event loop был заблокирован на {lag * 1000:.0f} мс")
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self._record(max(0.0, time.perf_counter() - started - self.interval))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Глобальный монитор event loop бота
+loop_monitor = LoopLagMonitor()
+
+
+@registry.add_collector
+def _collect_loop_lag():
+    yield (
+        "bot_event_loop_lag_seconds", "gauge", "Задержка event loop: последняя и максимальная",
+        [
+            ("bot_event_loop_lag_seconds", {"stat": "last"}, loop_monitor.last_lag),
+            ("bot_event_loop_lag_seconds", {"stat": "max"}, loop_monitor.max_lag),
+        ]
+    )
+    yield (
+        "bot_event_loop_blocked_seconds_total", "counter", "Суммарное время блокировки event loop",
+        [("bot_event_loop_blocked_seconds_total", {}, loop_monitor.total_blocked)]
+    )
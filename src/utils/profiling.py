@@ -0,0 +1,190 @@
+"""
+Профилирование обработки обновлений
+
+- UpdateTrace и timed(): вложенные таймеры вокруг сервисных вызовов внутри
+  одного обновления. Текущая трасса хранится в contextvar, поэтому вне
+  обновления timed() стоит одно чтение contextvar.
+- SamplingProfiler: выборочный профилировщик. Отдельный поток раз в
+  interval секунд снимает стек потока event loop через
+  sys._current_frames() и считает одинаковые стеки. Результат — формат
+  collapsed stacks ("модуль:функция;модуль:функция N"), который понимают
+  flamegraph.pl и speedscope.
+"""
+import asyncio
+import functools
+import inspect
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class Span:
+    """Замер одного вызова внутри обновления"""
+    name: str
+    depth: int
+    duration: float = 0.0
+
+
+@dataclass
+class UpdateTrace:
+    """Вложенные замеры одного обновления"""
+    spans: list[Span] = field(default_factory=list)
+    depth: int = 0
+
+    def breakdown(self) -> str:
+        """Разбивка по вложенным вызовам, по строке на замер"""
+        return "\n".join(
+            f"{'  ' * (span.depth + 1)}{span.name}: {span.duration * 1000:.1f} мс"
+            for span in self.spans
+        )
+
+
+_current_trace: ContextVar[Optional[UpdateTrace]] = ContextVar("update_trace", default=None)
+
+
+def start_trace() -> tuple[UpdateTrace, Token]:
+    """Начинает трассу обновления; токен передаётся в end_trace"""
+    trace = UpdateTrace()
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token: Token):
+    _current_trace.reset(token)
+
+
+class timed:
+    """
+    Замер вызова в трассе текущего обновления
+
+    Используется как контекстный менеджер или декоратор (в том числе
+    для корутин):
+        with timed("render_expiring"): ...
+
+        @timed("send_split_message")
+        async def send_split_message(...): ...
+
+    Без активной трассы ничего не записывает.
+    """
+
+    __slots__ = ("name", "_trace", "_span", "_started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self._trace = trace = _current_trace.get()
+        if trace is not None:
+            self._span = Span(self.name, trace.depth)
+            trace.spans.append(self._span)
+            trace.depth += 1
+            self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        trace = self._trace
+        if trace is not None:
+            self._span.duration = time.perf_counter() - self._started
+            trace.depth -= 1
+        return False
+
+    def __call__(self, func):
+        name = self.name
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current_trace.get() is None:
+                    return await func(*args, **kwargs)
+                with timed(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return func(*args, **kwargs)
+            with timed(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class ProfilerBusyError(Exception):
+    """Профилировщик уже запущен"""
+    pass
+
+
+class SamplingProfiler:
+    """Выборочный профилировщик потока event loop"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._lock.locked()
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        return f"{module}:{code.co_qualname}"
+
+    def _sample(self, thread_id: int, duration: float, stacks: Counter):
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                stacks[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    async def profile(self, duration: float) -> Counter:
+        """
+        Снимает стеки потока event loop в течение duration секунд
+
+        Returns:
+            Counter {collapsed stack: число выборок}
+
+        Raises:
+            ProfilerBusyError: если профилирование уже идёт
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("Профилирование уже запущено")
+        try:
+            stacks: Counter = Counter()
+            await asyncio.to_thread(self._sample, threading.get_ident(), duration, stacks)
+            return stacks
+        finally:
+            self._lock.release()
+
+
+def to_collapsed(stacks: Counter) -> str:
+    """Формат collapsed stacks для flamegraph.pl / speedscope"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def is_idle(stack: str) -> bool:
+    """Event loop ждёт событий в selector — поток простаивает"""
+    return stack.endswith("Selector.select")
+
+
+def top_functions(stacks: Counter, limit: int = 5) -> list[tuple[str, int]]:
+    """Функции, чаще всего оказывавшиеся на вершине стека (без простоя)"""
+    leaves: Counter = Counter()
+    for stack, count in stacks.items():
+        if not is_idle(stack):
+            leaves[stack.rsplit(";", 1)[-1]] += count
+    return leaves.most_common(limit)
+
+
+# Глобальный профилировщик бота
+profiler = SamplingProfiler()
@@ -0,0 +1,96 @@
+"""
+Трасса обновления домашек в формате JSONL
+
+Каждое событие — отдельная строка JSON с полями "t" (секунд от начала
+прогона) и "event". События:
+    run_start  source, clans, started_at
+    login      ms
+    page       clan, page, items, upstream_ms, parse_ms, backoff_ms, retries, status
+    sleep      clan, page, ms             — пауза между страницами (DELAY_*)
+    clan       clan, pages, items, ms
+    publish    clan, items, ms            — запись шарда клана и подмена снимка
+    write      items, ms
+    run_end    ms, items, requests, retries, rejected, ok, error
+
+upstream_ms — ожидание ответа API по всем попыткам страницы, backoff_ms —
+паузы перед повторами (Retry-After и экспоненциальная пауза после 5xx).
+Полная выгрузка (refresh_all_homeworks) пишет трассу из админ-панели и из
+scripts/homeworks.py (переменная REFRESH_TRACE_FILE);
+сводку строит scripts/analyze_refresh_trace.py.
+"""
+import json
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from src.config.settings import REFRESH_TRACE_DIR, REFRESH_TRACE_KEEP
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshTrace:
+    """
+    Запись событий одного прогона обновления
+
+    Без path ничего не пишет, поэтому вызывающий код не проверяет,
+    включена ли трассировка. Ошибки записи выключают трассу, а не
+    обновление.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self._file = None
+        self._started = time.perf_counter()
+        if path is not None:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(path, "w", encoding="utf-8")
+            except OSError as e:
+                logger.warning(f"Трасса обновления отключена: {e}")
+
+    def emit(self, event: str, **fields):
+        if self._file is None:
+            return
+        record = {"t": round(time.perf_counter() - self._started, 3), "event": event, **fields}
+        try:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+        except OSError as e:
+            logger.warning(f"Трасса обновления отключена: {e}")
+            self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def new_trace_path(operation: str) -> Optional[Path]:
+    """
+    Путь для трассы нового прогона; старые трассы операции удаляются
+
+    Returns:
+        None, если трассировка выключена (REFRESH_TRACE_KEEP=0)
+    """
+    if REFRESH_TRACE_KEEP <= 0:
+        return None
+
+    existing = sorted(REFRESH_TRACE_DIR.glob(f"{operation}_*.jsonl"))
+    for old in existing[:max(0, len(existing) - REFRESH_TRACE_KEEP + 1)]:
+        old.unlink(missing_ok=True)
+
+    return REFRESH_TRACE_DIR / f"{operation}_{datetime.now():%Y%m%d_%H%M%S_%f}.jsonl"
+
+
+def ms(seconds: float) -> float:
+    """Секунды в миллисекунды для полей трассы"""
+    return round(seconds * 1000, 1)
@@ -2,6 +2,8 @@
 import html
 from aiogram.types import Message
 
+from src.utils.profiling import timed
+
 TELEGRAM_LIMIT = 4096
 PREFIX_TEMPLATE = "Часть {i}/{total}\n\n"
 
@@ -19,6 +21,7 @@ def escape_html(text: str) -> str:
     return html.escape(text, quote=False)
 
 
+@timed("send_split_message")
 async def send_split_message(
     message: Message,
     text: str,
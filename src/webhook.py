@@ -0,0 +1,70 @@
+"""
+Webhook-режим: приём обновлений Telegram через aiohttp веб-сервер
+"""
+import logging
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+logger = logging.getLogger(__name__)
+
+
+def create_webhook_app(
+    bot: Bot,
+    dp: Dispatcher,
+    path: str,
+    secret_token: str | None,
+    base_url: str | None = None
+) -> web.Application:
+    """
+    Создаёт aiohttp-приложение, которое принимает обновления по webhook
+
+    Args:
+        bot: экземпляр бота
+        dp: диспетчер
+        path: путь, на который Telegram присылает обновления
+        secret_token: секрет для заголовка X-Telegram-Bot-Api-Secret-Token,
+            запросы с другим значением отклоняются
+        base_url: публичный адрес сервера; если указан, webhook
+            регистрируется в Telegram при старте
+
+    Returns:
+        web.Application, запуск и остановка которого вызывают
+        startup/shutdown-хуки диспетчера
+    """
+    app = web.Application()
+
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=secret_token
+    ).register(app, path=path)
+
+    if base_url:
+        async def register_webhook(bot: Bot):
+            url = base_url.rstrip("/") + path
+            await bot.set_webhook(url, secret_token=secret_token)
+            logger.info(f"Webhook зарегистрирован: {url}")
+
+        dp.startup.register(register_webhook)
+
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(
+    app: web.Application,
+    host: str,
+    port: int
+) -> web.AppRunner:
+    """
+    Запускает веб-сервер и возвращает runner для последующей остановки
+
+    runner.cleanup() корректно завершает приложение и shutdown-хуки диспетчера
+    """
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    logger.info(f"Webhook-сервер слушает {host}:{port}")
+    return runner